@@ -0,0 +1,19 @@
+import importlib
+
+"""
+Submodules are imported on first access (PEP 562), e.g. dataset_analysis.analyzer_utils,
+importing the package itself does not import pandas, NLTK or the plotting libraries.
+"""
+
+_SUBMODULES = ['analysis', 'analyzer_utils', 'benchmark', 'export_utils', 'figure_export',
+               'file_utils', 'filtering', 'profiling_utils', 'viz_utils']
+
+
+def __getattr__(name: str):
+  if name in _SUBMODULES:
+    return importlib.import_module('.' + name, __name__)
+  raise AttributeError('module ' + __name__ + ' has no attribute ' + name)
+
+
+def __dir__():
+  return sorted(list(globals().keys()) + _SUBMODULES)
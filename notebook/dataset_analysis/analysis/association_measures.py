@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+from nltk.probability import FreqDist
+
+
+class AssociationMeasures:
+  """
+  Panel of association measures of n-grams (2 to 4 words), computed for all n-grams at once.
+  The contingency tables of all n-grams are built once from the counts of their sub-n-grams,
+  then each measure is a NumPy column operation on the tables, instead of one finder.score_ngrams()
+  call (and one Python call per n-gram) per measure.
+
+  Measures follow nltk.metrics.association.NgramAssocMeasures (same formulas, same cell order of the
+  contingency tables), scores can differ from NLTK in the last digits (floating point order of operations).
+  Chi-square uses the generic n-gram formula for bigrams too (NLTK: n_xx * phi_sq, same value).
+  Source:
+  - https://www.nltk.org/_modules/nltk/metrics/association.html
+  - Manning, Schütze. Foundations of Statistical Natural Language Processing (1999), chapter 5.
+  """
+
+  MEASURES: List[str] = ['likelihood_ratio', 'pmi', 'student_t', 'chi_sq', 'poisson_stirling']
+
+  _SMALL = 1e-20 # As NLTK, avoids divisions by 0
+
+
+  def __init__(self, ngrams: List[Tuple[str, ...]], marginals: np.ndarray):
+    """
+    ngrams: N-grams of n words.
+    marginals: Array (nb n-grams, 2**n), marginals[:, mask] is the number of windows containing the words
+      of the n-gram at the positions of the bits of mask (any word elsewhere):
+      marginals[:, 0] is the total, marginals[:, 2**n - 1] the count of the n-gram.
+    """
+    self.__ngrams: List[Tuple[str, ...]] = ngrams
+    self.__n: int = int(np.log2(marginals.shape[1]))
+    self.__marginals: np.ndarray = marginals
+    self.__contingency: np.ndarray = None
+    self.__expected: np.ndarray = None
+
+
+  @staticmethod
+  def from_finder(finder) -> 'AssociationMeasures':
+    """
+    N-grams of a Bigram, Trigram or QuadgramCollocationFinder (after its filters) with their marginals.
+    """
+    ngram_fd = finder.ngram_fd
+    ngrams = list(ngram_fd.keys())
+    n = finder.default_ws
+
+    # Counts of the sub-n-grams per pattern (offsets from the first word), as in the finders from_words()
+    pattern_fds: Dict[Tuple[int, ...], FreqDist] = {(0,): finder.word_fd}
+    if n == 3:
+      pattern_fds.update({(0, 1): finder.bigram_fd, (0, 2): finder.wildcard_fd})
+    elif n == 4:
+      pattern_fds.update({(0, 1): finder.ii, (0, 2): finder.ixi, (0, 3): finder.ixxi,
+                          (0, 1, 2): finder.iii, (0, 1, 3): finder.iixi, (0, 2, 3): finder.ixii})
+
+    marginals = np.zeros((len(ngrams), 2**n), dtype=np.float64)
+    marginals[:, 0] = finder.N
+    ngram_counts = np.fromiter((ngram_fd[ngram] for ngram in ngrams), dtype=np.float64, count=len(ngrams))
+    if n == 2:
+      ngram_counts /= finder.window_size - 1.0 # Church and Hanks (1990), see BigramCollocationFinder.score_ngram()
+    marginals[:, 2**n - 1] = ngram_counts
+
+    for mask in range(1, 2**n - 1):
+      positions = [position for position in range(n) if mask >> position & 1]
+      pattern_fd = pattern_fds[tuple(position - positions[0] for position in positions)]
+      if len(positions) == 1: # word_fd keys are words
+        keys = (ngram[positions[0]] for ngram in ngrams)
+      else:
+        keys = (tuple(ngram[position] for position in positions) for ngram in ngrams)
+      marginals[:, mask] = np.fromiter((pattern_fd[key] for key in keys), dtype=np.float64, count=len(ngrams))
+    return AssociationMeasures(ngrams, marginals)
+
+
+  def __len__(self):
+    return len(self.__ngrams)
+
+
+  def get_ngrams(self) -> List[Tuple[str, ...]]:
+    return self.__ngrams
+
+
+  def get_contingency(self) -> np.ndarray:
+    """
+    Contingency tables (nb n-grams, 2**n), NLTK cell order: bit i of the cell index is set when word i is absent,
+    e.g. (n_ii, n_oi, n_io, n_oo) for bigrams.
+    """
+    if self.__contingency is None:
+      # Inclusion-exclusion over the present words (Möbius transform over supersets)
+      cells = self.__marginals.copy()
+      for position in range(self.__n):
+        bit = 1 << position
+        without_bit = np.array([mask for mask in range(2**self.__n) if not mask & bit])
+        cells[:, without_bit] -= cells[:, without_bit | bit]
+      # cells[:, mask] counts the windows with exactly the words of mask: NLTK cell = complement of mask
+      self.__contingency = cells[:, ::-1]
+    return self.__contingency
+
+
+  def get_expected(self) -> np.ndarray:
+    """
+    Expected values of the contingency tables under the independence of the words.
+    """
+    if self.__expected is None:
+      totals = self.__marginals[:, [0]]
+      unigrams = self.__marginals[:, [1 << position for position in range(self.__n)]]
+      cells = np.arange(2**self.__n)
+      absent = (cells[:, np.newaxis] >> np.arange(self.__n)) & 1 # (cells, words)
+      factors = np.where(absent[np.newaxis, :, :] == 1,
+                         totals[:, :, np.newaxis] - unigrams[:, np.newaxis, :],
+                         unigrams[:, np.newaxis, :])
+      self.__expected = factors.prod(axis=2) / totals ** (self.__n - 1)
+    return self.__expected
+
+
+  # region Measures, see NgramAssocMeasures
+
+  def __ngram_counts(self) -> np.ndarray:
+    return self.__marginals[:, -1]
+
+
+  def __independence_expected(self) -> np.ndarray:
+    unigrams = self.__marginals[:, [1 << position for position in range(self.__n)]]
+    return unigrams.prod(axis=1) / self.__marginals[:, 0] ** (self.__n - 1)
+
+
+  def likelihood_ratio(self) -> np.ndarray:
+    contingency = self.get_contingency()
+    with np.errstate(divide='ignore', invalid='ignore'):
+      terms = contingency * np.log(contingency / (self.get_expected() + AssociationMeasures._SMALL) + AssociationMeasures._SMALL)
+    return 2 * np.where(contingency == 0, 0.0, terms).sum(axis=1)
+
+
+  def pmi(self) -> np.ndarray:
+    return np.log2(self.__ngram_counts()) - np.log2(self.__independence_expected())
+
+
+  def student_t(self) -> np.ndarray:
+    return (self.__ngram_counts() - self.__independence_expected()) / np.sqrt(self.__ngram_counts() + AssociationMeasures._SMALL)
+
+
+  def chi_sq(self) -> np.ndarray:
+    expected = self.get_expected()
+    return ((self.get_contingency() - expected) ** 2 / (expected + AssociationMeasures._SMALL)).sum(axis=1)
+
+
+  def poisson_stirling(self) -> np.ndarray:
+    ngram_counts = self.__ngram_counts()
+    return ngram_counts * (np.log2(ngram_counts / self.__independence_expected()) - 1)
+
+  # endregion
+
+
+  def to_df(self, measures: List[str] = MEASURES) -> pd.DataFrame:
+    """
+    One row per n-gram, one score column per measure, sorted by the first measure (desc) then by n-gram.
+    """
+    unknown_measures = [measure for measure in measures if measure not in AssociationMeasures.MEASURES]
+    if len(unknown_measures) > 0:
+      raise ValueError(', '.join(unknown_measures) + ' must be in [' + ', '.join(AssociationMeasures.MEASURES) + '].')
+
+    panel_df = pd.DataFrame({'ngrams': self.__n,
+                             'potential mwe': [' '.join(ngram) for ngram in self.__ngrams],
+                             'count': self.__ngram_counts()})
+    for measure in measures:
+      panel_df[measure] = getattr(self, measure)()
+    if len(measures) > 0:
+      # Same order as finder.score_ngrams(): score (desc) then n-gram
+      scores = panel_df[measures[0]].tolist()
+      order = sorted(range(len(self.__ngrams)), key=lambda i: (-scores[i], self.__ngrams[i]))
+      panel_df = panel_df.iloc[order].reset_index(drop=True)
+    return panel_df
@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from typing import List
+
+
+class AuthorTable:
+  """
+  Interned authorship table: author IDs, sponsors and years are integer codes and the dataset is
+  one edge array 'paper x author' (one edge per author of a paper) carrying the year and sponsor codes of the paper.
+  Career and productivity metrics are group reductions over the codes (bincount, reduceat on edges sorted by author)
+  instead of groupbys over author ID strings.
+
+  Missing years and sponsors are coded -1, the edges without year (resp. sponsor) are ignored
+  by the year (resp. sponsor) metrics.
+  """
+
+  MISSING: int = -1
+
+
+  def __init__(self,
+               dois: np.ndarray,
+               authors: pd.Index,
+               sponsors: pd.Index,
+               years: np.ndarray,
+               edge_papers: np.ndarray,
+               edge_authors: np.ndarray,
+               edge_years: np.ndarray,
+               edge_sponsors: np.ndarray):
+    """
+    dois: DOI of each paper (paper code = position).
+    authors, sponsors: Levels of the author and sponsor codes.
+    years: Levels of the year codes, consecutive years (year code = year - years[0]).
+    edge_*: Paper, author, year and sponsor codes of each edge.
+    """
+    self.__dois: np.ndarray = dois
+    self.__authors: pd.Index = authors
+    self.__sponsors: pd.Index = sponsors
+    self.__years: np.ndarray = years
+    self.__edge_papers: np.ndarray = edge_papers
+    self.__edge_authors: np.ndarray = edge_authors
+    self.__edge_years: np.ndarray = edge_years
+    self.__edge_sponsors: np.ndarray = edge_sponsors
+
+
+  @staticmethod
+  def from_df(df: pd.DataFrame) -> 'AuthorTable':
+    """
+    Columns: 'Author(s) ID' (Scopus format, e.g. '57190000001;57190000002;'), 'DOI', 'Year', 'Sponsor (clean)'.
+    df is not modified.
+    """
+    author_lists = [str(author_ids).split(';') if isinstance(author_ids, str) else [] for author_ids in df['Author(s) ID']]
+    nb_authors_per_paper = np.fromiter((len(author_list) for author_list in author_lists), dtype=np.int64, count=len(author_lists))
+    edge_papers = np.repeat(np.arange(len(author_lists), dtype=np.int32), nb_authors_per_paper)
+    author_ids = pd.Series([author_id for author_list in author_lists for author_id in author_list], dtype=object)
+    kept = (author_ids != '').to_numpy() # Separators are placed at the end of the string
+    edge_authors, authors = pd.factorize(author_ids[kept])
+    edge_papers = edge_papers[kept]
+
+    paper_sponsors, sponsors = pd.factorize(df['Sponsor (clean)'])
+    paper_years = pd.to_numeric(df['Year'], errors='coerce').to_numpy(dtype=np.float64)
+    valid_years = ~np.isnan(paper_years)
+    if valid_years.any():
+      years = np.arange(int(paper_years[valid_years].min()), int(paper_years[valid_years].max()) + 1)
+    else:
+      years = np.array([], dtype=np.int64)
+    paper_year_codes = np.full(len(paper_years), AuthorTable.MISSING, dtype=np.int16)
+    paper_year_codes[valid_years] = paper_years[valid_years].astype(np.int64) - (years[0] if len(years) > 0 else 0)
+
+    return AuthorTable(dois=df['DOI'].to_numpy(),
+                       authors=authors,
+                       sponsors=sponsors,
+                       years=years,
+                       edge_papers=edge_papers,
+                       edge_authors=edge_authors.astype(np.int32),
+                       edge_years=paper_year_codes[edge_papers],
+                       edge_sponsors=paper_sponsors.astype(np.int16)[edge_papers])
+
+
+  def __len__(self):
+    return len(self.__edge_papers)
+
+
+  def get_authors(self) -> pd.Index:
+    return self.__authors
+
+
+  def get_sponsors(self) -> pd.Index:
+    return self.__sponsors
+
+
+  def get_years(self) -> np.ndarray:
+    return self.__years
+
+
+  def get_edges(self) -> np.ndarray:
+    """
+    Edge array (nb edges, 4): paper, author, year and sponsor codes.
+    """
+    return np.stack([self.__edge_papers, self.__edge_authors, self.__edge_years, self.__edge_sponsors], axis=1)
+
+
+  def get_edges_df(self) -> pd.DataFrame:
+    """
+    Decoded edges: 'DOI', 'Author(s) ID', 'Year', 'Sponsor (clean)', one author per row.
+    """
+    years = np.where(self.__edge_years >= 0, self.__year_levels()[self.__edge_years], np.nan)
+    return pd.DataFrame({'DOI': self.__dois[self.__edge_papers],
+                         'Author(s) ID': self.__authors[self.__edge_authors],
+                         'Year': years if np.isnan(years).any() else years.astype(np.int64),
+                         'Sponsor (clean)': self.__sponsor_levels()[self.__edge_sponsors]})
+
+
+  def __year_levels(self) -> np.ndarray:
+    return self.__years if len(self.__years) > 0 else np.zeros(1, dtype=np.int64)
+
+
+  def __sponsor_levels(self) -> np.ndarray:
+    return np.append(self.__sponsors.to_numpy(dtype=object), np.nan) # Code -1: no sponsor
+
+
+  def __nb_authors(self) -> int:
+    return len(self.__authors)
+
+
+  def __group_reduce(self, ufunc: np.ufunc, edge_authors: np.ndarray, values: np.ndarray, empty) -> np.ndarray:
+    """
+    ufunc reduction of values per author (edges sorted by author), empty for the authors without edge.
+    """
+    order = np.argsort(edge_authors, kind='stable')
+    counts = np.bincount(edge_authors, minlength=self.__nb_authors())
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    result = np.full(self.__nb_authors(), empty, dtype=np.result_type(values, np.asarray(empty)))
+    non_empty = counts > 0
+    if non_empty.any():
+      result[non_empty] = ufunc.reduceat(values[order], starts[non_empty])
+    return result
+
+
+  def __nb_distinct(self, edge_authors: np.ndarray, codes: np.ndarray, nb_codes: int) -> np.ndarray:
+    """
+    Number of distinct codes per author.
+    """
+    pairs = np.unique(edge_authors.astype(np.int64) * nb_codes + codes)
+    return np.bincount(pairs // nb_codes, minlength=self.__nb_authors())
+
+
+  def papers_per_author(self) -> np.ndarray:
+    return np.bincount(self.__edge_authors, minlength=self.__nb_authors())
+
+
+  def authors_per_paper(self) -> np.ndarray:
+    return np.bincount(self.__edge_papers, minlength=len(self.__dois))
+
+
+  def yearly_output(self) -> np.ndarray:
+    """
+    Number of papers per author and year, array (nb authors, nb years).
+    """
+    dated = self.__edge_years >= 0
+    keys = self.__edge_authors[dated].astype(np.int64) * len(self.__years) + self.__edge_years[dated]
+    return np.bincount(keys, minlength=self.__nb_authors() * len(self.__years)).reshape(self.__nb_authors(), len(self.__years))
+
+
+  def yearly_output_df(self) -> pd.DataFrame:
+    """
+    Crosstab 'author x Year' of the number of papers.
+    """
+    return pd.DataFrame(self.yearly_output(),
+                        index=pd.Index(self.__authors, name='Author(s) ID'),
+                        columns=pd.Index(self.__years, name='Year'))
+
+
+  def sponsor_output(self) -> np.ndarray:
+    """
+    Number of papers per author and sponsor, array (nb authors, nb sponsors).
+    """
+    sponsored = self.__edge_sponsors >= 0
+    keys = self.__edge_authors[sponsored].astype(np.int64) * len(self.__sponsors) + self.__edge_sponsors[sponsored]
+    return np.bincount(keys, minlength=self.__nb_authors() * len(self.__sponsors)).reshape(self.__nb_authors(), len(self.__sponsors))
+
+
+  def sponsor_output_df(self) -> pd.DataFrame:
+    """
+    Crosstab 'author x Sponsor (clean)' of the number of papers, sponsors sorted by name.
+    """
+    order = np.argsort(self.__sponsors.to_numpy(dtype=object), kind='stable')
+    return pd.DataFrame(self.sponsor_output()[:, order],
+                        index=pd.Index(self.__authors, name='Author(s) ID'),
+                        columns=pd.Index(self.__sponsors[order], name='Sponsor (clean)'))
+
+
+  def __sponsor_sequences(self):
+    """
+    Author and sponsor codes of the edges with a year and a sponsor, sorted by author, year and paper (dataset order).
+    """
+    known = (self.__edge_years >= 0) & (self.__edge_sponsors >= 0)
+    order = np.lexsort((self.__edge_papers[known], self.__edge_years[known], self.__edge_authors[known]))
+    return self.__edge_authors[known][order], self.__edge_sponsors[known][order]
+
+
+  def sponsor_switches(self) -> np.ndarray:
+    """
+    Number of sponsor changes between consecutive papers of each author, papers sorted by year
+    (papers of a same year in dataset order).
+    """
+    authors, sponsors = self.__sponsor_sequences()
+    switches = (authors[1:] == authors[:-1]) & (sponsors[1:] != sponsors[:-1])
+    return np.bincount(authors[1:][switches], minlength=self.__nb_authors())
+
+
+  def career_df(self) -> pd.DataFrame:
+    """
+    One row per author (index 'Author(s) ID'):
+    'papers', 'first year', 'last year', 'career length' (years), 'active years' (years with a paper),
+    'papers per active year', 'sponsors' (number of distinct sponsors), 'first sponsor', 'last sponsor', 'sponsor switches'.
+    """
+    dated = self.__edge_years >= 0
+    dated_authors, dated_years = self.__edge_authors[dated], self.__edge_years[dated]
+    year_levels = self.__year_levels()
+    first_year_codes = self.__group_reduce(np.minimum, dated_authors, dated_years, np.iinfo(np.int16).max)
+    last_year_codes = self.__group_reduce(np.maximum, dated_authors, dated_years, AuthorTable.MISSING)
+    has_year = last_year_codes >= 0
+    first_years = np.where(has_year, year_levels[np.where(has_year, first_year_codes, 0)], np.nan)
+    last_years = np.where(has_year, year_levels[np.where(has_year, last_year_codes, 0)], np.nan)
+    active_years = self.__nb_distinct(dated_authors, dated_years, max(len(self.__years), 1))
+
+    # First and last sponsors of the sponsor sequences
+    sorted_authors, sorted_sponsors = self.__sponsor_sequences()
+    counts = np.bincount(sorted_authors, minlength=self.__nb_authors())
+    ends = np.cumsum(counts)
+    has_sponsor = counts > 0
+    first_sponsor_codes = np.full(self.__nb_authors(), AuthorTable.MISSING)
+    last_sponsor_codes = np.full(self.__nb_authors(), AuthorTable.MISSING)
+    first_sponsor_codes[has_sponsor] = sorted_sponsors[(ends - counts)[has_sponsor]]
+    last_sponsor_codes[has_sponsor] = sorted_sponsors[ends[has_sponsor] - 1]
+    sponsor_levels = self.__sponsor_levels()
+
+    papers = self.papers_per_author()
+    sponsored = self.__edge_sponsors >= 0
+    return pd.DataFrame({'papers': papers,
+                         'first year': first_years,
+                         'last year': last_years,
+                         'career length': last_years - first_years + 1,
+                         'active years': active_years,
+                         'papers per active year': np.bincount(dated_authors, minlength=self.__nb_authors()) / np.maximum(active_years, 1),
+                         'sponsors': self.__nb_distinct(self.__edge_authors[sponsored], self.__edge_sponsors[sponsored],
+                                                        max(len(self.__sponsors), 1)),
+                         'first sponsor': sponsor_levels[first_sponsor_codes],
+                         'last sponsor': sponsor_levels[last_sponsor_codes],
+                         'sponsor switches': self.sponsor_switches()},
+                        index=pd.Index(self.__authors, name='Author(s) ID'))
+
+
+  def productivity_summary(self, metrics: List[str] = ['papers', 'career length', 'active years', 'papers per active year']) -> pd.DataFrame:
+    """
+    Distribution of career metrics over the authors (as papers_per_author_summary()).
+    """
+    return self.career_df()[metrics].describe().loc[['mean', 'std', 'min', '25%', '50%', '75%', 'max']]
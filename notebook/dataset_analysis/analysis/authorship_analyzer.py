@@ -1,26 +1,49 @@
 import pandas as pd
 import numpy as np
 
+from .author_table import AuthorTable
+
 
 class AuthorshipAnalyzer:
     """
-
+    Authorship statistics, one author per row of a prepared table.
+    Once prepared, an analyzer is only read: metrics return new frames.
+    analyze() prepares a new analyzer without modifying the dataset,
+    so that one loaded dataset can serve concurrent analyses.
+    Career and productivity metrics over the years are computed on an interned AuthorTable, see get_author_table().
     """
 
     def __init__(self, df: pd.DataFrame):
         """
-        Columns: 'Author(s) ID', 'DOI', 'Sponsor (clean)'
+        Columns: 'Author(s) ID', 'DOI', 'Sponsor (clean)' and 'Year' (career metrics)
         """
         self.__df: pd.DataFrame = df
         self.__prep_df: pd.DataFrame = None
+        self.__author_table: AuthorTable = None
     
 
+    @staticmethod
+    def analyze(df: pd.DataFrame) -> 'AuthorshipAnalyzer':
+        """
+        Return a new prepared analyzer, df is not modified.
+        """
+        analyzer = AuthorshipAnalyzer(df)
+        analyzer.prepare()
+        return analyzer
+
+
     def prepare(self):
+        self.__prep_df = AuthorshipAnalyzer.prepare_df(self.__df)
+
+
+    @staticmethod
+    def prepare_df(df: pd.DataFrame) -> pd.DataFrame:
         """
         Initially, one author(s) can contains multiple authors.
+        Return a new frame 'DOI', 'Author(s) ID', 'Sponsor (clean)' with one author per row.
         """
         # Prepare the dataframe with minimal columns and one author per row.
-        filt_df = self.__df[['Author(s) ID', 'DOI', 'Sponsor (clean)']]
+        filt_df = df[['Author(s) ID', 'DOI', 'Sponsor (clean)']]
 
         prep_df = pd.DataFrame(filt_df['Author(s) ID'].str.split(';').tolist(),
                                index=filt_df['DOI']).stack()
@@ -28,13 +51,37 @@ class AuthorshipAnalyzer:
         prep_df.columns = ['DOI', 'Author(s) ID']
         prep_df = prep_df[prep_df['Author(s) ID'] != ''] # Because separators are placed at the end of the string
 
-        # Get sponsor column
-        sponsors = []
-        for doi in prep_df['DOI']:
-            sponsor =  filt_df[filt_df['DOI'] == doi]['Sponsor (clean)'].iloc[0]
-            sponsors.append(sponsor)
-        prep_df['Sponsor (clean)'] = sponsors
-        self.__prep_df = prep_df
+        # Get sponsor column (sponsor of the first row of the DOI)
+        doi_sponsors = filt_df.drop_duplicates('DOI').set_index('DOI')['Sponsor (clean)']
+        prep_df['Sponsor (clean)'] = prep_df['DOI'].map(doi_sponsors).values
+        return prep_df
+
+
+    def get_prep_df(self) -> pd.DataFrame:
+        return self.__prep_df
+
+
+    def get_author_table(self) -> AuthorTable:
+        """
+        Interned authors and edges 'paper x author', built on first use.
+        """
+        if self.__author_table is None:
+            self.__author_table = AuthorTable.from_df(self.__df)
+        return self.__author_table
+
+
+    def career_metrics(self) -> pd.DataFrame:
+        """
+        One row per author: first/last year, career length, active years, yearly output and sponsor switches, see AuthorTable.career_df().
+        """
+        return self.get_author_table().career_df()
+
+
+    def yearly_output(self) -> pd.DataFrame:
+        """
+        Crosstab 'author x Year' of the number of papers.
+        """
+        return self.get_author_table().yearly_output_df()
 
 
     def authors_per_paper_summary(self):
@@ -4,95 +4,128 @@ import numpy as np
 
 class CategoryAnalyzer:
   """
-  
+  Count the codes of one category of the coding table (columns 'DOI', 'Code').
+  A document coded several times with the same code is counted once: unique DOI-Code pairs
+  are computed once, on demand, into an integer-coded pair table (DOI and Code indices).
+  Counts, matrix and co-occurrences are derived from this table, the input frame is never copied.
+  Counts and co-occurrences are cached, they must not be modified in place.
   """
 
 
   def __init__(self, filtered_df: pd.DataFrame):
       self.__filtered_df: pd.DataFrame = filtered_df
 
+      # Lazy integer-coded pair table, see __prepare_pairs()
+      self.__dois: pd.Index = None
+      self.__codes: pd.Index = None
+      self.__pair_doi_codes: np.ndarray = None
+      self.__pair_code_codes: np.ndarray = None
+
+      # Lazy results
+      self.__counts_df: pd.DataFrame = None
+      self.__co_occurrences_df: pd.DataFrame = None
+
+
+  def __prepare_pairs(self):
+    """
+    Unique DOI-Code pairs sorted by DOI then Code.
+    Rows with a missing DOI or Code are ignored (as by a groupby).
+    """
+    if self.__pair_doi_codes is not None:
+      return
+
+    doi_codes, dois = pd.factorize(self.__filtered_df['DOI'], sort=True)
+    code_codes, codes = pd.factorize(self.__filtered_df['Code'], sort=True)
+    valid = (doi_codes >= 0) & (code_codes >= 0)
+
+    # Unique pair ids, sorted by DOI then Code
+    pair_ids = np.unique(doi_codes[valid].astype(np.int64) * len(codes) + code_codes[valid])
+    pair_doi_codes, pair_code_codes = np.divmod(pair_ids, max(len(codes), 1))
+
+    # Only keep the DOIs and codes of the pairs (order is preserved)
+    used_dois, self.__pair_doi_codes = np.unique(pair_doi_codes, return_inverse=True)
+    used_codes, self.__pair_code_codes = np.unique(pair_code_codes, return_inverse=True)
+    self.__dois = dois[used_dois]
+    self.__codes = codes[used_codes]
+
+
+  def get_pairs(self) -> pd.DataFrame:
+    """
+    Unique DOI-Code pairs, sorted by DOI then Code.
+    """
+    self.__prepare_pairs()
+    return pd.DataFrame({'DOI': self.__dois[self.__pair_doi_codes],
+                         'Code': self.__codes[self.__pair_code_codes]})
+
 
   def count(self) -> pd.DataFrame:
     """
     Count per category
     """
-    filtered_df = self.__filtered_df.copy()
+    if self.__counts_df is not None:
+      return self.__counts_df
 
-    print(filtered_df.columns)
-    # TODO be sure to keep unique categories to not count twice
+    print(self.__filtered_df.columns)
 
-    nb_papers = len(filtered_df['DOI'].unique())
+    nb_papers = len(self.__filtered_df['DOI'].unique())
     print(nb_papers)
     #assert len(DOIs) == len(df_ST_art.DOI.unique())
 
-    nb_codes = len(filtered_df)
+    nb_codes = len(self.__filtered_df)
     print(nb_codes)
 
-    # Important. Get unique DOI-Code to have unique rows
-    filtered_df = filtered_df.groupby(['DOI', 'Code']).first().reset_index()
+    # Important. Unique DOI-Code to have unique rows
+    self.__prepare_pairs()
 
-    filtered_df_groups = filtered_df.pivot_table(values='DOI',
-                                                  index=['Code'],
-                                                  aggfunc='count').reset_index() \
-                                                  .sort_values(['DOI', 'Code'], ascending=[0, 1])
-    filtered_df_groups.rename(columns={"DOI": "Nb"}, inplace = True)
+    filtered_df_groups = pd.DataFrame({'Code': self.__codes,
+                                       'Nb': np.bincount(self.__pair_code_codes, minlength=len(self.__codes))}) \
+                                       .sort_values(['Nb', 'Code'], ascending=[0, 1])
     filtered_df_groups["Perc."] = round(filtered_df_groups["Nb"]/nb_papers*100, 1)
+    self.__counts_df = filtered_df_groups
     return filtered_df_groups
 
 
   def count_matrix(self):
-    filtered_df = self.__filtered_df.copy()
-
-    # Prepare
-    # Important. Get unique DOI-Code to have unique rows
-    filtered_df = filtered_df.groupby(['DOI', 'Code']).first().reset_index()
-
-    unique_codes = filtered_df['Code'].unique()
-    #print(unique_codes)
-
-    filtered_df_selection = filtered_df[filtered_df['Code'].isin(unique_codes)]
-    filtered_df_selection = filtered_df_selection[['DOI', 'Code']]
-    #print(filtered_df_selection)
-    #print(len(filtered_df_selection))
+    """
+    Binary matrix DOI x Code with a total column 'All'.
+    """
+    self.__prepare_pairs()
 
-    filtered_df_matrix = pd.crosstab(index=filtered_df_selection['DOI'], columns=filtered_df_selection['Code'], margins=True)
-    filtered_df_matrix =filtered_df_matrix[:-1] # remove last row (column total)
+    matrix = np.zeros((len(self.__dois), len(self.__codes) + 1), dtype=np.int64)
+    matrix[self.__pair_doi_codes, self.__pair_code_codes] = 1
+    matrix[:, -1] = matrix[:, :-1].sum(axis=1)
 
-    return filtered_df_matrix
+    return pd.DataFrame(matrix,
+                        index=pd.Index(self.__dois, name='DOI'),
+                        columns=pd.Index(self.__codes.tolist() + ['All'], dtype=object, name='Code'))
 
 
   def count_co_occurrences(self):
-    filtered_df_matrix = self.count_matrix()
-    filtered_df_matrix = filtered_df_matrix[filtered_df_matrix.columns[:-1]] # Remove last column (total column)
-    print(filtered_df_matrix.columns)
+    """
+    Count the combinations of codes of the documents, codes are joined by 'x'.
+    """
+    if self.__co_occurrences_df is not None:
+      return self.__co_occurrences_df
 
-    nb_papers = len(filtered_df_matrix)
+    self.__prepare_pairs()
 
-    doi_coding_arr = []
-    for doi, row in filtered_df_matrix.iterrows():
-      coding_combination = []
-      for k, v in row.items():
-        if v > 0:
-          #print(doi, k, v)
-          coding_combination.append(k)
+    print(pd.Index(self.__codes.tolist(), dtype=object, name='Code'))
 
-      # One combination per row
-      doi_coding_arr.append({"DOI": doi,
-                             "Coding": "x".join(coding_combination)})
+    nb_papers = len(self.__dois)
 
-    doi_coding_df = pd.DataFrame(doi_coding_arr)
+    # Pairs are sorted by DOI then Code: one combination per DOI
+    codes = pd.Series(self.__codes[self.__pair_code_codes])
+    doi_coding = codes.groupby(self.__pair_doi_codes, sort=True).agg('x'.join)
 
     # Count
-    doi_coding_df_groups = doi_coding_df.pivot_table(values='DOI',
-                                                  index=['Coding'],
-                                                  aggfunc='count').reset_index() \
-                                                  .sort_values(['DOI', 'Coding'], ascending=[0, 1])
-    doi_coding_df_groups.rename(columns={"DOI": "Nb"}, inplace = True)
+    doi_coding_df_groups = doi_coding.groupby(doi_coding).size().rename_axis('Coding').reset_index(name='Nb') \
+                                     .sort_values(['Nb', 'Coding'], ascending=[0, 1])
     doi_coding_df_groups["Perc."] = round(doi_coding_df_groups["Nb"]/nb_papers*100, 1)
+    self.__co_occurrences_df = doi_coding_df_groups
     return doi_coding_df_groups
 
 
   def count_to_latex(self):
-    return self.__filtered_df_groups.to_latex(index=False,
-                                              formatters={"name": str.upper},
-                                              float_format="{:.1f}".format)
+    return self.count().to_latex(index=False,
+                                 formatters={"name": str.upper},
+                                 float_format="{:.1f}".format)
@@ -0,0 +1,221 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+
+class CodingAnalyzer:
+  """
+  Batch version of CategoryAnalyzer over the whole coding table (columns 'Category', 'DOI', 'Code',
+  optionally 'Year' and 'Theme').
+  Category, DOI and Code are integer-coded once and unique (Category, DOI, Code) triples are computed
+  in one pass: counts, DOI x Code matrices, co-occurrences, per-year and per-theme breakdowns
+  of all categories are derived from these triples.
+
+  Per-category results are the same as CategoryAnalyzer(df[df['Category'] == category]).
+  Results are computed on demand and cached, they must not be modified in place.
+  """
+
+
+  def __init__(self, coding_df: pd.DataFrame):
+    self.__coding_df: pd.DataFrame = coding_df
+
+    # Integer-coded triples, see __prepare_triples()
+    self.__categories: pd.Index = None
+    self.__dois: pd.Index = None
+    self.__codes: pd.Index = None
+    self.__row_category_codes: np.ndarray = None
+    self.__row_doi_codes: np.ndarray = None
+    self.__row_code_codes: np.ndarray = None
+    self.__triple_category_codes: np.ndarray = None
+    self.__triple_doi_codes: np.ndarray = None
+    self.__triple_code_codes: np.ndarray = None
+    self.__nb_papers: np.ndarray = None # Per category
+
+    # Lazy results
+    self.__counts_df: pd.DataFrame = None
+    self.__co_occurrences_df: pd.DataFrame = None
+    self.__year_counts_df: pd.DataFrame = None
+    self.__theme_counts_df: pd.DataFrame = None
+
+
+  def __prepare_triples(self):
+    """
+    Unique (Category, DOI, Code) triples sorted by Category, DOI then Code.
+    Rows with a missing Category, DOI or Code are ignored (as by a groupby).
+    """
+    if self.__triple_category_codes is not None:
+      return
+
+    self.__row_category_codes, self.__categories = pd.factorize(self.__coding_df['Category'], sort=True)
+    self.__row_doi_codes, self.__dois = pd.factorize(self.__coding_df['DOI'], sort=True)
+    self.__row_code_codes, self.__codes = pd.factorize(self.__coding_df['Code'], sort=True)
+    nb_categories, nb_dois, nb_codes = len(self.__categories), len(self.__dois), len(self.__codes)
+
+    # Papers of a category, also those with a missing code (CategoryAnalyzer.count())
+    valid = (self.__row_category_codes >= 0) & (self.__row_doi_codes >= 0)
+    category_doi_ids = np.unique(self.__row_category_codes[valid].astype(np.int64) * nb_dois + self.__row_doi_codes[valid])
+    self.__nb_papers = np.bincount(category_doi_ids // max(nb_dois, 1), minlength=nb_categories)
+    # A missing DOI is counted once in its category as by Series.unique()
+    missing_doi_categories = np.unique(self.__row_category_codes[(self.__row_category_codes >= 0) & (self.__row_doi_codes < 0)])
+    self.__nb_papers[missing_doi_categories] += 1
+
+    valid &= self.__row_code_codes >= 0
+    triple_ids = np.unique((self.__row_category_codes[valid].astype(np.int64) * nb_dois
+                            + self.__row_doi_codes[valid]) * nb_codes
+                           + self.__row_code_codes[valid])
+    category_doi_ids, self.__triple_code_codes = np.divmod(triple_ids, max(nb_codes, 1))
+    self.__triple_category_codes, self.__triple_doi_codes = np.divmod(category_doi_ids, max(nb_dois, 1))
+
+
+  def __category_code(self, category: str) -> int:
+    self.__prepare_triples()
+    position = self.__categories.get_indexer([category])[0]
+    if position < 0:
+      raise ValueError(str(category) + ' must be in [' + ', '.join(map(str, self.__categories)) + '].')
+    return position
+
+
+  def get_categories(self) -> List[str]:
+    self.__prepare_triples()
+    return self.__categories.tolist()
+
+
+  # region All categories (long tables)
+
+  def count(self) -> pd.DataFrame:
+    """
+    Number and percentage of papers per Category and Code.
+    """
+    if self.__counts_df is None:
+      self.__prepare_triples()
+      nb_codes = len(self.__codes)
+      ids, nb = np.unique(self.__triple_category_codes * nb_codes + self.__triple_code_codes, return_counts=True)
+      category_codes, code_codes = np.divmod(ids, max(nb_codes, 1))
+      self.__counts_df = pd.DataFrame({'Category': self.__categories[category_codes],
+                                       'Code': self.__codes[code_codes],
+                                       'Nb': nb.astype(np.int64)})
+      self.__counts_df['Perc.'] = round(self.__counts_df['Nb']/self.__nb_papers[category_codes]*100, 1)
+    return self.__counts_df
+
+
+  def count_co_occurrences(self) -> pd.DataFrame:
+    """
+    Number and percentage of papers per Category and combination of codes (joined by 'x').
+    """
+    if self.__co_occurrences_df is None:
+      self.__prepare_triples()
+      # Triples are sorted by Category, DOI then Code: one combination per (Category, DOI)
+      category_doi_ids = self.__triple_category_codes * len(self.__dois) + self.__triple_doi_codes
+      codings = pd.Series(self.__codes[self.__triple_code_codes]).groupby(category_doi_ids, sort=True).agg('x'.join)
+      category_codes = codings.index.to_numpy() // max(len(self.__dois), 1)
+
+      co_occurrences_df = pd.DataFrame({'Category': self.__categories[category_codes], 'Coding': codings.values})
+      co_occurrences_df = co_occurrences_df.groupby(['Category', 'Coding']).size().reset_index(name='Nb')
+      nb_coded_papers = np.bincount(category_codes, minlength=len(self.__categories))
+      co_occurrences_df['Perc.'] = round(co_occurrences_df['Nb']
+                                         / nb_coded_papers[self.__categories.get_indexer(co_occurrences_df['Category'])]*100, 1)
+      self.__co_occurrences_df = co_occurrences_df
+    return self.__co_occurrences_df
+
+
+  def count_per_year(self) -> pd.DataFrame:
+    """
+    Number of papers per Category, Year and Code. The year of a paper is its first year in the coding table.
+    """
+    if self.__year_counts_df is None:
+      self.__prepare_triples()
+      doi_years = self.__first_per_doi('Year')
+      self.__year_counts_df = self.__count_by(self.__triple_category_codes, doi_years, 'Year')
+    return self.__year_counts_df
+
+
+  def count_per_theme(self) -> pd.DataFrame:
+    """
+    Number of papers per Theme, Category and Code. The theme of a category is its first theme in the coding table.
+    """
+    if self.__theme_counts_df is None:
+      self.__prepare_triples()
+      category_themes = self.__coding_df['Theme'].groupby(self.__row_category_codes).first() \
+                                                .reindex(range(len(self.__categories))).to_numpy()
+      theme_counts_df = self.count().copy()
+      theme_counts_df.insert(0, 'Theme', category_themes[self.__categories.get_indexer(theme_counts_df['Category'])])
+      self.__theme_counts_df = theme_counts_df.sort_values(['Theme', 'Category', 'Code'], kind='stable').reset_index(drop=True)
+    return self.__theme_counts_df
+
+
+  def __first_per_doi(self, col: str) -> np.ndarray:
+    """
+    First non missing value of col per coded DOI, aligned with the triples.
+    """
+    values = self.__coding_df[col].groupby(self.__row_doi_codes).first()
+    return values.reindex(range(len(self.__dois))).to_numpy()[self.__triple_doi_codes]
+
+
+  def __count_by(self, category_codes: np.ndarray, values: np.ndarray, col: str) -> pd.DataFrame:
+    counts_df = pd.DataFrame({'Category': category_codes, col: values, 'Code': self.__triple_code_codes})
+    counts_df = counts_df.groupby(['Category', col, 'Code']).size().reset_index(name='Nb')
+    counts_df['Category'] = self.__categories[counts_df['Category']]
+    counts_df['Code'] = self.__codes[counts_df['Code']]
+    return counts_df
+
+  # endregion
+
+
+  # region One category (same results as CategoryAnalyzer)
+
+  def count_category(self, category: str) -> pd.DataFrame:
+    self.__category_code(category)
+    category_counts_df = self.count()
+    category_counts_df = category_counts_df.loc[category_counts_df['Category'] == category, ['Code', 'Nb', 'Perc.']]
+    return category_counts_df.reset_index(drop=True).sort_values(['Nb', 'Code'], ascending=[0, 1])
+
+
+  def count_matrix(self, category: str) -> pd.DataFrame:
+    """
+    Binary matrix DOI x Code of a category with a total column 'All'.
+    """
+    position = self.__category_code(category)
+    start, end = np.searchsorted(self.__triple_category_codes, [position, position + 1])
+    doi_codes, code_codes = self.__triple_doi_codes[start:end], self.__triple_code_codes[start:end]
+
+    used_dois, doi_codes = np.unique(doi_codes, return_inverse=True)
+    used_codes, code_codes = np.unique(code_codes, return_inverse=True)
+    matrix = np.zeros((len(used_dois), len(used_codes) + 1), dtype=np.int64)
+    matrix[doi_codes, code_codes] = 1
+    matrix[:, -1] = matrix[:, :-1].sum(axis=1)
+
+    return pd.DataFrame(matrix,
+                        index=pd.Index(self.__dois[used_dois], name='DOI'),
+                        columns=pd.Index(self.__codes[used_codes].tolist() + ['All'], dtype=object, name='Code'))
+
+
+  def count_category_co_occurrences(self, category: str) -> pd.DataFrame:
+    self.__category_code(category)
+    co_occurrences_df = self.count_co_occurrences()
+    co_occurrences_df = co_occurrences_df.loc[co_occurrences_df['Category'] == category, ['Coding', 'Nb', 'Perc.']]
+    return co_occurrences_df.reset_index(drop=True).sort_values(['Nb', 'Coding'], ascending=[0, 1])
+
+
+  def count_category_per_year(self, category: str) -> pd.DataFrame:
+    """
+    Crosstab Year x Code of a category.
+    """
+    self.__category_code(category)
+    year_counts_df = self.count_per_year()
+    year_counts_df = year_counts_df[year_counts_df['Category'] == category]
+    return year_counts_df.pivot_table(values='Nb', index='Year', columns='Code', aggfunc='sum', fill_value=0)
+
+  # endregion
+
+
+  def report(self) -> Dict[str, pd.DataFrame]:
+    """
+    Full coding report, one long table per analysis.
+    """
+    report = {'counts': self.count(),
+              'co-occurrences': self.count_co_occurrences()}
+    if 'Year' in self.__coding_df.columns:
+      report['years'] = self.count_per_year()
+    if 'Theme' in self.__coding_df.columns:
+      report['themes'] = self.count_per_theme()
+    return report
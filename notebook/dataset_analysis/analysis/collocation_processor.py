@@ -1,33 +1,53 @@
 import pandas as pd
 from typing import Counter, List
+from functools import lru_cache
 import nltk
 #nltk.download("stopwords")
-from nltk.corpus import stopwords
 from nltk.collocations import BigramCollocationFinder, TrigramCollocationFinder, QuadgramCollocationFinder
-bigram_measures = nltk.collocations.BigramAssocMeasures()
-trigram_measures = nltk.collocations.TrigramAssocMeasures()
-fourgram_measures = nltk.collocations.QuadgramAssocMeasures()
 from nltk.util import ngrams
 import re
 
+from .ngram_sketch import SketchNgramCounter
+from .association_measures import AssociationMeasures
+from .nltk_resources import english_stopwords, bigram_measures, trigram_measures, quadgram_measures
+
 
 class CollocationProcessor:
     """
     Calculate collocations.
     Source:
     - https://www.nltk.org/_modules/nltk/collocations.html
+
+    Approximate mode (large corpora): n-grams are first counted in count-min sketches and only
+    the candidates that may reach min_freq_count are counted exactly, see SketchNgramCounter.
+    Memory is bounded by the sketches and the candidates, tables are the same as in exact mode.
+
+    Filtered finders are built once per n-gram order and shared by process() and measures_panel().
     """
 
     PUNCTUATION = "\"#$%&'()*+,./:;<=>?@[\]^_`{|}~"  # Inspired by string.punctuation: !"#$%&'()*+,-./:;<=>?@[\]^_`{|}~
 
-    IGNORED_WORDS = set(stopwords.words("english"))
-    for keep_word in ["and", "with", "or"]:
-        IGNORED_WORDS.remove(keep_word)
+    KEPT_STOPWORDS = ["and", "with", "or"]
 
 
-    def __init__(self, tokens: List[str], min_freq_count: int):
+    def __init__(self,
+                 tokens: List[str],
+                 min_freq_count: int,
+                 approximate: bool = False,
+                 sketch_width: int = 2**18,
+                 sketch_depth: int = 4):
+        """
+        approximate: Count the 2-4 grams with count-min sketches and an exact recount of the candidates.
+        sketch_width, sketch_depth: Size of each sketch (approximate mode), see CountMinSketch.
+        """
         self.__tokens: List[str] = tokens
         self.__min_freq_count: int = min_freq_count  # Recommended, at least mentioned by 1% on the entire dataset.
+        self.__sketch_counter: SketchNgramCounter = None
+        if approximate:
+            self.__sketch_counter = SketchNgramCounter(tokens,
+                                                       min_freq_count,
+                                                       sketch_width=sketch_width,
+                                                       sketch_depth=sketch_depth)
         self.__df: pd.DataFrame = pd.DataFrame(
             {
                 "ngrams": pd.Series(dtype="int"),
@@ -35,6 +55,16 @@ class CollocationProcessor:
                 "score": pd.Series(dtype="float"),
             }
         )
+        self.__finders: dict = {}
+
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def ignored_words() -> frozenset:
+        """
+        English stopwords except KEPT_STOPWORDS, loaded on first use.
+        """
+        return english_stopwords().difference(CollocationProcessor.KEPT_STOPWORDS)
 
 
     def process(self, limit: int = 0):
@@ -75,29 +105,14 @@ class CollocationProcessor:
 
         elif ngrams > 1 or ngrams < 5:
             method = "likelihood_ratio"
-            if ngrams == 2:
-                finder = BigramCollocationFinder.from_words(self.__tokens)
-            if ngrams == 3:
-                finder = TrigramCollocationFinder.from_words(self.__tokens)
-            if ngrams == 4:
-                finder = QuadgramCollocationFinder.from_words(self.__tokens)
-
-            # Filtering, does not affect LLR ratio
-            finder.apply_freq_filter(
-                self.__min_freq_count
-            )  # to limit further processing
-            finder.apply_word_filter(
-                lambda w: len(w) < 2
-            )  # Filter by default punctuation
-            # or re.match(TokenUtils.SENTENCE_SEPARATOR_PUNCT, w
-            # w.lower() in CollocationProcessor.IGNORED_WORDS
+            finder = self._finder(ngrams)
 
             if ngrams == 2:
-                scored = finder.score_ngrams(bigram_measures.likelihood_ratio)
+                scored = finder.score_ngrams(bigram_measures().likelihood_ratio)
             elif ngrams == 3:
-                scored = finder.score_ngrams(trigram_measures.likelihood_ratio)
+                scored = finder.score_ngrams(trigram_measures().likelihood_ratio)
             elif ngrams == 4:
-                scored = finder.score_ngrams(fourgram_measures.likelihood_ratio)
+                scored = finder.score_ngrams(quadgram_measures().likelihood_ratio)
 
             if limit > 0:
                 # The limit is changed to not trunc the set at one frequency count
@@ -148,6 +163,82 @@ class CollocationProcessor:
         self.__df["In higher ngrams (count)"] = mwe_count_col
 
 
+    def _finder(self, ngrams: int):
+        """
+        Filtered finder of 2-4 grams, built once.
+        """
+        if ngrams in self.__finders:
+            return self.__finders[ngrams]
+
+        if self.__sketch_counter is not None:
+            finder = self._sketch_finder(ngrams)
+        elif ngrams == 2:
+            finder = BigramCollocationFinder.from_words(self.__tokens)
+        elif ngrams == 3:
+            finder = TrigramCollocationFinder.from_words(self.__tokens)
+        elif ngrams == 4:
+            finder = QuadgramCollocationFinder.from_words(self.__tokens)
+
+        # Filtering, does not affect LLR ratio
+        finder.apply_freq_filter(
+            self.__min_freq_count
+        )  # to limit further processing
+        finder.apply_word_filter(
+            lambda w: len(w) < 2
+        )  # Filter by default punctuation
+        # or re.match(TokenUtils.SENTENCE_SEPARATOR_PUNCT, w
+        # w.lower() in CollocationProcessor.ignored_words()
+        self.__finders[ngrams] = finder
+        return finder
+
+
+    def measures_panel(self,
+                       ngrams: List[int] = [2, 3, 4],
+                       measures: List[str] = AssociationMeasures.MEASURES) -> pd.DataFrame:
+        """
+        All association measures of the candidate 2-4 grams (same filters as process()) in one wide table:
+        columns 'ngrams', 'potential mwe', 'count' then one score column per measure.
+        Rows are sorted per n-gram order by the first measure (desc).
+        """
+        for n in ngrams:
+            if n < 2 or n > 4:
+                raise ValueError("Ngrams must in range 2-4, actual value: " + str(n))
+        return pd.concat([AssociationMeasures.from_finder(self._finder(n)).to_df(measures) for n in ngrams],
+                         ignore_index=True)
+
+
+    def _sketch_finder(self, ngrams: int):
+        """
+        Finder built from the exact counts of the candidates (approximate mode).
+        """
+        counter = self.__sketch_counter
+        if ngrams == 2:
+            return BigramCollocationFinder(counter.get_word_fd(),
+                                           counter.get_candidate_fd((0, 1)))
+        if ngrams == 3:
+            return TrigramCollocationFinder(counter.get_word_fd(),
+                                            counter.get_candidate_fd((0, 1)),
+                                            counter.get_candidate_fd((0, 2)),
+                                            counter.get_candidate_fd((0, 1, 2)))
+        return QuadgramCollocationFinder(counter.get_word_fd(),
+                                         counter.get_candidate_fd((0, 1, 2, 3)),
+                                         ii=counter.get_candidate_fd((0, 1)),
+                                         iii=counter.get_candidate_fd((0, 1, 2)),
+                                         ixi=counter.get_candidate_fd((0, 2)),
+                                         ixxi=counter.get_candidate_fd((0, 3)),
+                                         iixi=counter.get_candidate_fd((0, 1, 3)),
+                                         ixii=counter.get_candidate_fd((0, 2, 3)))
+
+
+    def get_sketch_stats(self) -> pd.DataFrame:
+        """
+        Error bounds, memory and false positives of the sketches (approximate mode), None in exact mode.
+        """
+        if self.__sketch_counter is None:
+            return None
+        return self.__sketch_counter.get_stats()
+
+
     def count_ngrams_in(self, abstracts: pd.Series):
         """
         Count if mwe exists in abstracts
@@ -0,0 +1,217 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from .keyword_search_cache import KeywordSearchCache
+
+
+class DescriptiveStatsCube:
+  """
+  Counts of documents per combination of the descriptive dimensions (sponsor, document type, venue, year, coded),
+  aggregated once from the dataset. Slices, roll-ups and percentage tables are computed from the cube
+  (sums of a small integer array) instead of a groupby of the full dataset.
+
+  Each dimension is integer-coded: its levels are sorted (as groupby keys) and a last slot counts
+  the documents without value. counts[i, j, ..., k] is the number of documents with level i of the first dimension,
+  level j of the second dimension, ..., with a DOI (k = 0) or without DOI (k = 1).
+  Roll-ups exclude the documents without value in the grouped dimensions (as groupby and pivot_table)
+  and include them in the summed dimensions. The last axis separates the counts of rows (groupby().size())
+  from the counts of DOIs (pivot_table(values='DOI', aggfunc='count')).
+
+  Files (save(), cached()): one .npz file (counts) and one .json file (dimensions, levels and dataset fingerprint).
+  """
+
+  DIMENSIONS: List[str] = ['Sponsor (clean)', 'Document Type', 'Venue (sponsor)', 'Year', 'Coded']
+
+
+  def __init__(self, dimensions: List[str], levels: List[pd.Index], counts: np.ndarray, fingerprint: str = None):
+    """
+    levels: Sorted levels of each dimension (without the missing value slot).
+    counts: Array of shape (len(levels[0]) + 1, len(levels[1]) + 1, ..., 2).
+    """
+    self.__dimensions: List[str] = dimensions
+    self.__levels: List[pd.Index] = levels
+    self.__counts: np.ndarray = counts
+    self.__fingerprint: str = fingerprint
+    self.__rollups: Dict = {}
+
+
+  @staticmethod
+  def venue_sponsor(df: pd.DataFrame) -> pd.Series:
+    """
+    'Venue (sponsor)': sponsor and venue, e.g. 'ACM CHI'.
+    """
+    return (df['Sponsor (clean)'] + ' ' + df['Venue (clean)']).str.strip()
+
+
+  @staticmethod
+  def source_columns(df: pd.DataFrame, dimensions: List[str]) -> List[str]:
+    """
+    Dataset columns of the dimensions, 'Venue (clean)' replaces 'Venue (sponsor)' when it must be created.
+    The DOI is also aggregated when df has one.
+    """
+    return [col for dimension in dimensions
+            for col in (['Sponsor (clean)', 'Venue (clean)'] if dimension == 'Venue (sponsor)' and dimension not in df.columns
+                        else [dimension])] + (['DOI'] if 'DOI' in df.columns and 'DOI' not in dimensions else [])
+
+
+  @staticmethod
+  def from_df(df: pd.DataFrame, dimensions: List[str] = DIMENSIONS) -> 'DescriptiveStatsCube':
+    """
+    Aggregate the dataset, df is not modified.
+    Without a 'DOI' column, all documents are counted as having a DOI.
+    """
+    missing_cols = [col for col in DescriptiveStatsCube.source_columns(df, dimensions) if col not in df.columns]
+    if len(missing_cols) > 0:
+      raise ValueError(', '.join(missing_cols) + ' must be in [' + ', '.join(df.columns) + '].')
+
+    levels, codes = [], []
+    for dimension in dimensions:
+      values = df[dimension] if dimension in df.columns else DescriptiveStatsCube.venue_sponsor(df)
+      dimension_codes, dimension_levels = pd.factorize(values, sort=True)
+      dimension_codes[dimension_codes < 0] = len(dimension_levels) # Missing value slot
+      levels.append(dimension_levels)
+      codes.append(dimension_codes)
+    codes.append(df['DOI'].isna().to_numpy(dtype=np.int64) if 'DOI' in df.columns else np.zeros(len(df.index), dtype=np.int64))
+
+    shape = tuple(len(dimension_levels) + 1 for dimension_levels in levels) + (2,)
+    counts = np.bincount(np.ravel_multi_index(codes, shape), minlength=int(np.prod(shape))).reshape(shape)
+    fingerprint = KeywordSearchCache.dataset_fingerprint(df, DescriptiveStatsCube.source_columns(df, dimensions))
+    return DescriptiveStatsCube(list(dimensions), levels, counts, fingerprint)
+
+
+  @staticmethod
+  def cached(df: pd.DataFrame, cache_dir: str, dimensions: List[str] = DIMENSIONS) -> 'DescriptiveStatsCube':
+    """
+    Load the cube of df from cache_dir (e.g. the KeywordSearchCache folder), or aggregate and save it.
+    Cubes are keyed by a fingerprint of the dimension columns of df: a changed dataset gives a new cube.
+    """
+    fingerprint = KeywordSearchCache.dataset_fingerprint(df, DescriptiveStatsCube.source_columns(df, dimensions))
+    filepath = os.path.join(cache_dir, 'desc_stats_cube_' + fingerprint[:16])
+    if os.path.exists(filepath + '.json'):
+      cube = DescriptiveStatsCube.load(filepath)
+      if cube.get_fingerprint() == fingerprint and cube.get_dimensions() == list(dimensions):
+        return cube
+
+    cube = DescriptiveStatsCube.from_df(df, dimensions)
+    os.makedirs(cache_dir, exist_ok=True)
+    cube.save(filepath)
+    return cube
+
+
+  def save(self, filepath: str):
+    """
+    Write filepath.npz and filepath.json.
+    """
+    np.savez_compressed(filepath + '.npz', counts=self.__counts)
+    with open(filepath + '.json', 'w', encoding='utf-8') as f:
+      json.dump({'fingerprint': self.__fingerprint,
+                 'dimensions': self.__dimensions,
+                 'levels': [dimension_levels.tolist() for dimension_levels in self.__levels]}, f, indent=2)
+
+
+  @staticmethod
+  def load(filepath: str) -> 'DescriptiveStatsCube':
+    with open(filepath + '.json', 'r', encoding='utf-8') as f:
+      metadata = json.load(f)
+    with np.load(filepath + '.npz') as npz:
+      counts = npz['counts']
+    return DescriptiveStatsCube(metadata['dimensions'],
+                                [pd.Index(dimension_levels) for dimension_levels in metadata['levels']],
+                                counts,
+                                metadata['fingerprint'])
+
+
+  def get_dimensions(self) -> List[str]:
+    return self.__dimensions
+
+
+  def get_levels(self, dimension: str) -> pd.Index:
+    return self.__levels[self.__axis(dimension)]
+
+
+  def get_counts(self) -> np.ndarray:
+    return self.__counts
+
+
+  def get_fingerprint(self) -> str:
+    return self.__fingerprint
+
+
+  def get_nb_docs(self) -> int:
+    return int(self.__counts.sum())
+
+
+  def __axis(self, dimension: str) -> int:
+    if dimension not in self.__dimensions:
+      raise ValueError(dimension + ' must be in [' + ', '.join(self.__dimensions) + '].')
+    return self.__dimensions.index(dimension)
+
+
+  def select(self, filters: Dict[str, List]) -> 'DescriptiveStatsCube':
+    """
+    Slice: cube of the documents with one of the given levels of each filtered dimension,
+    e.g. select({'Coded': [1]}) for the coded subset.
+    """
+    counts = self.__counts
+    levels = list(self.__levels)
+    for dimension, selected_levels in filters.items():
+      axis = self.__axis(dimension)
+      positions = levels[axis].get_indexer(selected_levels)
+      if (positions < 0).any():
+        raise ValueError(', '.join(str(level) for level, position in zip(selected_levels, positions) if position < 0)
+                         + ' must be in [' + ', '.join(str(level) for level in levels[axis]) + '].')
+      positions = np.unique(positions) # Levels stay sorted
+      # Selected levels, the missing value slot is kept empty
+      counts = np.take(counts, np.append(positions, len(levels[axis])), axis=axis)
+      counts[(slice(None),) * axis + (-1,)] = 0
+      levels[axis] = levels[axis][positions]
+    return DescriptiveStatsCube(self.__dimensions, levels, counts, self.__fingerprint)
+
+
+  def rollup(self, dimensions: List[str], doi_only: bool = False) -> pd.Series:
+    """
+    Number of documents per observed combination of levels of dimensions ('Nb'), other dimensions are summed.
+    Same values and order as df.groupby(dimensions).size().
+    doi_only: Only count the documents with a DOI, as df.groupby(dimensions)['DOI'].count()
+      (combinations without any DOI are not observed).
+    """
+    key = (tuple(dimensions), doi_only)
+    if key not in self.__rollups:
+      axes = [self.__axis(dimension) for dimension in dimensions]
+      counts = self.__counts[..., 0] if doi_only else self.__counts.sum(axis=-1)
+      summed_axes = tuple(axis for axis in range(len(self.__dimensions)) if axis not in axes)
+      # Grouped dimensions in the requested order, without their missing value slot
+      counts = np.moveaxis(counts.sum(axis=summed_axes), np.argsort(np.argsort(axes)), range(len(axes)))
+      counts = counts[(slice(-1),) * len(axes)]
+
+      observed = np.nonzero(counts)
+      index_levels = [self.__levels[axis] for axis in axes]
+      if len(dimensions) == 1:
+        index = pd.Index(index_levels[0][observed[0]], name=dimensions[0])
+      else:
+        index = pd.MultiIndex(levels=index_levels, codes=list(observed), names=dimensions)
+      self.__rollups[key] = pd.Series(counts[observed], index=index, name='Nb')
+    return self.__rollups[key]
+
+
+  def count_with_percentage(self, dimension: str) -> pd.DataFrame:
+    """
+    Same table as analyzer_utils.count_with_percentage(df, dimension).
+    """
+    df_grouped = self.rollup([dimension]).reset_index(name='Nb').sort_values(by='Nb', ascending=False)
+    df_grouped["Perc."] = round(df_grouped["Nb"]/df_grouped["Nb"].sum()*100, 1)
+    return df_grouped
+
+
+  def percentage_table(self, index: List[str], count_name: str = 'DOI') -> pd.DataFrame:
+    """
+    Counts and percentages per combination of the index dimensions,
+    same table as df.pivot_table(values='DOI', index=index, aggfunc='count') with a "Perc." column:
+    documents without DOI are not counted.
+    """
+    percentage_df = self.rollup(index, doi_only=True).to_frame(count_name)
+    percentage_df["Perc."] = round(percentage_df[count_name]/percentage_df[count_name].sum()*100, 1)
+    return percentage_df
@@ -0,0 +1,180 @@
+import importlib.util
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from typing import Dict, List, Union
+
+from .keyword_occurrence_store import KeywordOccurrenceStore
+from .keyword_search_analyser import KeywordSearchAnalyzer
+from .authorship_analyzer import AuthorshipAnalyzer
+
+
+class DuckDBSession:
+  """
+  Embedded SQL session (DuckDB, in memory) over the analysis tables.
+  Tables are converted once to Arrow and registered as views of Arrow datasets: DuckDB scans the Arrow buffers
+  (or the Parquet files of an occurrence store) without copying them into the database, with projection and filter pushdown.
+  Joins and aggregations run vectorized and multi-threaded, only the result is converted to pandas.
+
+  Column names are kept, names with spaces or parentheses must be quoted: SELECT "Author(s) ID" FROM authorship
+  e.g. documents mentioning two keywords after 2018:
+    SELECT DOI FROM occurrences WHERE Year > 2018 AND keyword IN ('PVI', 'haptics')
+    GROUP BY DOI HAVING count(DISTINCT keyword) = 2
+
+  duckdb is an optional dependency (pip install duckdb), it is imported when a session is opened.
+  Registered tables are shared, they must not be modified while the session is open.
+  """
+
+  DATASET_VIEW: str = 'dataset'
+  OCCURRENCES_VIEW: str = 'occurrences'
+  AUTHORSHIP_VIEW: str = 'authorship'
+
+
+  def __init__(self, threads: int = None):
+    """
+    threads: Number of DuckDB threads, all cores by default.
+    """
+    if not DuckDBSession.is_available():
+      raise ImportError('duckdb must be installed to open a SQL session: pip install duckdb')
+    import duckdb
+
+    self.__connection = duckdb.connect(database=':memory:')
+    if threads is not None:
+      self.__connection.execute('SET threads TO ' + str(int(threads)))
+    self.__tables: Dict[str, ds.Dataset] = {}
+
+
+  @staticmethod
+  def is_available() -> bool:
+    return importlib.util.find_spec('duckdb') is not None
+
+
+  @staticmethod
+  def to_arrow(df: pd.DataFrame) -> pa.Table:
+    """
+    Arrow table of a frame (without index).
+    Object columns mixing types (e.g. numbers and strings of Excel columns) are converted to strings.
+    """
+    columns = {}
+    for col in df.columns:
+      try:
+        columns[str(col)] = pa.array(df[col], from_pandas=True)
+      except (pa.ArrowInvalid, pa.ArrowTypeError):
+        columns[str(col)] = pa.array(df[col].astype(str).where(df[col].notna(), None), from_pandas=True)
+    return pa.table(columns)
+
+
+  def register(self, name: str, table: Union[pd.DataFrame, pa.Table, ds.Dataset]) -> 'DuckDBSession':
+    """
+    Register (or replace) a view, e.g. a crosstab or the collocations.
+    """
+    if isinstance(table, pd.DataFrame):
+      table = DuckDBSession.to_arrow(table)
+    dataset = table if isinstance(table, ds.Dataset) else ds.dataset(table)
+    if name in self.__tables:
+      self.__connection.unregister(name)
+    self.__connection.register(name, dataset)
+    self.__tables[name] = dataset # Keep the buffers alive
+    return self
+
+
+  def register_dataset(self, df: pd.DataFrame, name: str = DATASET_VIEW) -> 'DuckDBSession':
+    """
+    Prepared dataset, one row per document.
+    """
+    return self.register(name, df)
+
+
+  def register_occurrence_store(self, store: Union[KeywordOccurrenceStore, str], name: str = OCCURRENCES_VIEW) -> 'DuckDBSession':
+    """
+    Keyword occurrences: 'DOI', 'Year', 'keyword', 'term'.
+    store: KeywordOccurrenceStore or folder of a saved store (its Parquet file is scanned by the queries, not loaded).
+    """
+    if isinstance(store, KeywordOccurrenceStore):
+      return self.register(name, store.get_occurrences_df())
+    filepath = os.path.join(store, 'occurrences.parquet')
+    if not os.path.exists(filepath):
+      raise ValueError('No keyword occurrence store in ' + store)
+    return self.register(name, ds.dataset(filepath, format='parquet'))
+
+
+  def register_authorship(self, auth_analyzer: AuthorshipAnalyzer, name: str = AUTHORSHIP_VIEW) -> 'DuckDBSession':
+    """
+    Prepared authorship table: 'DOI', 'Author(s) ID', 'Sponsor (clean)', one author per row.
+    """
+    if auth_analyzer.get_prep_df() is None:
+      auth_analyzer.prepare()
+    return self.register(name, auth_analyzer.get_prep_df())
+
+
+  def get_tables(self) -> List[str]:
+    return list(self.__tables.keys())
+
+
+  def query(self, sql: str, params: List = None) -> pd.DataFrame:
+    """
+    Run a query, parameters are bound to the '?' placeholders.
+    """
+    return self.__connection.execute(sql, params or []).df()
+
+
+  def query_arrow(self, sql: str, params: List = None) -> pa.Table:
+    """
+    Same as query(), result as an Arrow table (no pandas conversion).
+    """
+    return self.__connection.execute(sql, params or []).fetch_arrow_table()
+
+
+  def keyword_crosstab(self, name: str = OCCURRENCES_VIEW) -> pd.DataFrame:
+    """
+    Crosstab 'DOI x keyword' of a registered occurrences view, same frame as KeywordSearchAnalyzer.crosstab().
+    Occurrences are counted in SQL, only the counts per (DOI, keyword) are pivoted.
+    """
+    counts_df = self.query('SELECT DOI, keyword, count(*) AS n FROM ' + name +
+                           ' WHERE DOI IS NOT NULL AND keyword IS NOT NULL GROUP BY DOI, keyword')
+    crosstab_df = DuckDBSession.__pivot(counts_df, index='DOI', columns='keyword')
+    crosstab_df['Totals'] = crosstab_df.sum(axis=1)
+    return crosstab_df.reset_index()
+
+
+  def keyword_temporal_crosstab(self, years: pd.Series, name: str = OCCURRENCES_VIEW) -> pd.DataFrame:
+    """
+    Crosstab 'keyword x Year' of a registered occurrences view normalized by the number of papers per year,
+    same frame as KeywordSearchAnalyzer.temporal_crosstab().
+    years: Year of all documents, for the normalization.
+    """
+    counts_df = self.query('SELECT keyword, Year, count(DISTINCT DOI) AS n FROM ' + name +
+                           ' WHERE DOI IS NOT NULL AND keyword IS NOT NULL AND Year IS NOT NULL GROUP BY keyword, Year')
+    temporal_crosstab_df = DuckDBSession.__pivot(counts_df, index='keyword', columns='Year')
+    temporal_crosstab_df.columns = temporal_crosstab_df.columns.astype(object) # As the reset_index() of the reference
+    total_pubs_per_year = KeywordSearchAnalyzer.count_pub_per_year(years).values
+    return temporal_crosstab_df.div(total_pubs_per_year, axis=1)
+
+
+  @staticmethod
+  def __pivot(counts_df: pd.DataFrame, index: str, columns: str) -> pd.DataFrame:
+    """
+    Long counts (index, columns, 'n') to a wide frame with sorted index and columns, 0 for the missing pairs.
+    """
+    index_levels, index_codes = np.unique(counts_df[index].to_numpy(), return_inverse=True)
+    column_levels, column_codes = np.unique(counts_df[columns].to_numpy(), return_inverse=True)
+    values = np.zeros((len(index_levels), len(column_levels)), dtype=np.int64)
+    values[index_codes, column_codes] = counts_df['n'].to_numpy()
+    return pd.DataFrame(values,
+                        index=pd.Index(index_levels, name=index),
+                        columns=pd.Index(column_levels, name=columns))
+
+
+  def close(self):
+    self.__connection.close()
+    self.__tables.clear()
+
+
+  def __enter__(self) -> 'DuckDBSession':
+    return self
+
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.close()
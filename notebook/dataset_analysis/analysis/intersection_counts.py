@@ -0,0 +1,135 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+
+class IntersectionCounts:
+  """
+  Cardinalities of the intersections (subsets) of categories, for UpSet plots.
+  Memberships are bit-packed (one bit per category, np.packbits) and identical memberships are
+  aggregated with their counts, so that the size of the input of upsetplot only depends on
+  the number of subsets that are drawn.
+
+  Categories are sorted by name and subsets are kept in order of first appearance,
+  as upsetplot.from_memberships() and UpSet do: selected subsets and totals are the ones
+  UpSet would compute from all memberships.
+  Selections are cached, re-plotting with another style does not aggregate again.
+  """
+
+
+  def __init__(self, categories: List[str], packed_memberships: np.ndarray, counts: np.ndarray):
+    """
+    categories: Sorted category names.
+    packed_memberships: Unique bit-packed memberships, one row per subset (order of first appearance).
+    counts: Cardinality of each subset.
+    """
+    self.__categories: List[str] = categories
+    self.__packed_memberships: np.ndarray = packed_memberships
+    self.__counts: np.ndarray = counts
+    self.__selections: Dict[Tuple, Tuple[pd.Series, pd.Series]] = {}
+
+
+  @staticmethod
+  def from_memberships(memberships: List[List[str]], data: List[int]) -> 'IntersectionCounts':
+    """
+    memberships: Categories of each group, e.g. [['B', 'PVI'], ['B']].
+    data: Count of each group.
+    """
+    categories = sorted({category for membership in memberships for category in membership})
+    positions = {category: i for i, category in enumerate(categories)}
+    memberships_matrix = np.zeros((len(memberships), len(categories)), dtype=bool)
+    for row, membership in enumerate(memberships):
+      memberships_matrix[row, [positions[category] for category in membership]] = True
+    return IntersectionCounts.__aggregate(categories, memberships_matrix, np.asarray(data, dtype=np.int64))
+
+
+  @staticmethod
+  def __aggregate(categories: List[str], memberships_matrix: np.ndarray, counts: np.ndarray) -> 'IntersectionCounts':
+    packed = np.packbits(memberships_matrix, axis=1)
+    if len(packed) == 0:
+      return IntersectionCounts(categories, packed, counts)
+
+    unique_packed, first_index, inverse = np.unique(packed, axis=0, return_index=True, return_inverse=True)
+    unique_counts = np.bincount(inverse.ravel(), weights=counts, minlength=len(unique_packed)).astype(np.int64)
+    order = np.argsort(first_index, kind='stable')
+    return IntersectionCounts(categories, unique_packed[order], unique_counts[order])
+
+
+  def rename(self, rename_dict: Dict[str, str]) -> 'IntersectionCounts':
+    """
+    New counts with renamed categories, categories renamed alike are merged.
+    """
+    if rename_dict is None:
+      return self
+    names = [rename_dict.get(category, category) for category in self.__categories]
+    categories = sorted(set(names))
+    positions = np.array([categories.index(name) for name in names], dtype=np.int64)
+
+    memberships_matrix = np.zeros((len(self.__counts), len(categories)), dtype=bool)
+    for old_position, new_position in enumerate(positions):
+      memberships_matrix[:, new_position] |= self.__get_memberships_matrix()[:, old_position]
+    return IntersectionCounts.__aggregate(categories, memberships_matrix, self.__counts)
+
+
+  def __get_memberships_matrix(self) -> np.ndarray:
+    return np.unpackbits(self.__packed_memberships, axis=1, count=len(self.__categories)).astype(bool)
+
+
+  def __len__(self):
+    return len(self.__counts)
+
+
+  def get_categories(self) -> List[str]:
+    return self.__categories
+
+
+  def get_counts(self) -> np.ndarray:
+    return self.__counts
+
+
+  def get_memberships(self) -> List[List[str]]:
+    """
+    Categories of each subset.
+    """
+    return [[self.__categories[position] for position in np.flatnonzero(row)]
+            for row in self.__get_memberships_matrix()]
+
+
+  def get_degrees(self) -> np.ndarray:
+    """
+    Number of categories of each subset.
+    """
+    return self.__get_memberships_matrix().sum(axis=1)
+
+
+  def get_totals(self) -> pd.Series:
+    """
+    Number of elements per category (all subsets).
+    """
+    return pd.Series(self.__counts @ self.__get_memberships_matrix().astype(np.int64),
+                     index=self.__categories)
+
+
+  def select(self, min_subset_size: int = None, max_subsets: int = None) -> Tuple[pd.Series, pd.Series]:
+    """
+    Subsets of at least min_subset_size elements, the max_subsets largest ones, sorted by cardinality (desc).
+    Return the subsets (Series indexed by one boolean level per category, levels sorted by totals)
+    and the totals of all subsets (sorted desc).
+    """
+    key = (min_subset_size, max_subsets)
+    if key not in self.__selections:
+      # Same sorts as UpSet: sort_categories_by='cardinality', sort_by='cardinality'
+      totals = self.get_totals().sort_values(ascending=False)
+
+      subset_sizes = pd.Series(self.__counts)
+      if min_subset_size is not None:
+        subset_sizes = subset_sizes[subset_sizes >= min_subset_size]
+      subset_sizes = subset_sizes.sort_values(ascending=False)
+      if max_subsets is not None:
+        subset_sizes = subset_sizes.iloc[:max_subsets]
+
+      memberships_matrix = self.__get_memberships_matrix()[subset_sizes.index.to_numpy()]
+      columns = [self.__categories.index(category) for category in totals.index]
+      index = pd.MultiIndex.from_arrays([memberships_matrix[:, column] for column in columns], names=totals.index.tolist())
+      self.__selections[key] = (pd.Series(subset_sizes.to_numpy(), index=index), totals)
+    return self.__selections[key]
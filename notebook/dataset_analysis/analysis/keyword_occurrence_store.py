@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import List, Tuple
+
+
+class KeywordOccurrenceStore:
+  """
+  Persistent store of keyword occurrences per DOI, for incremental keyword searches.
+  The store is bound to a keyword search specification by a fingerprint:
+  a store created with another specification (or search columns) is discarded.
+
+  Each document is identified by its DOI and a hash of its searched text and year.
+  Only new or changed documents have to be searched again, see KeywordSearchAnalyzer.process().
+  Documents with a missing or repeated DOI cannot be identified: they are searched on every update and not stored.
+  The raw occurrences are stored, the crosstab is rebuilt from all occurrences after each update.
+
+  Files (store_path folder):
+    - spec.json: fingerprint and specification.
+    - documents.parquet: DOI, hash.
+    - occurrences.parquet: DOI, Year, keyword, term (search order within a document).
+  """
+
+  FORMAT_VERSION: int = 1
+  OCCURRENCE_COLUMNS: List[str] = ['DOI', 'Year', 'keyword', 'term']
+
+
+  def __init__(self,
+               store_path: str,
+               keywords_search_spec: List[Tuple[str, str]],
+               search_in_cols: str = 'TAK'):
+    self.__store_path: str = store_path
+    self.__keywords_search_spec: List[Tuple[str, str]] = keywords_search_spec
+    self.__search_in_cols: str = search_in_cols
+    self.__fingerprint: str = KeywordOccurrenceStore.spec_fingerprint(keywords_search_spec, search_in_cols)
+
+    self.__documents_df: pd.DataFrame = pd.DataFrame({'DOI': pd.Series(dtype='object'),
+                                                      'hash': pd.Series(dtype='uint64')})
+    self.__occurrences_df: pd.DataFrame = pd.DataFrame(columns=KeywordOccurrenceStore.OCCURRENCE_COLUMNS)
+    self.__nb_searched_docs: int = None
+    self.__load()
+
+
+  @staticmethod
+  def spec_fingerprint(keywords_search_spec: List[Tuple[str, str]], search_in_cols: str) -> str:
+    spec = {'version': KeywordOccurrenceStore.FORMAT_VERSION,
+            'search_in_cols': search_in_cols,
+            'keywords_search_spec': [list(pair) for pair in keywords_search_spec]}
+    return hashlib.sha256(json.dumps(spec).encode('utf-8')).hexdigest()
+
+
+  @staticmethod
+  def documents_hash(df: pd.DataFrame, search_col: str) -> pd.Series:
+    """
+    Hash of the searched text and year of each document (vectorized).
+    """
+    return pd.util.hash_pandas_object(df[[search_col, 'Year']], index=False)
+
+
+  def __filepath(self, filename: str) -> str:
+    return os.path.join(self.__store_path, filename)
+
+
+  def __load(self):
+    spec_filepath = self.__filepath('spec.json')
+    if not os.path.exists(spec_filepath):
+      return
+
+    with open(spec_filepath, 'r', encoding='utf-8') as f:
+      fingerprint = json.load(f).get('fingerprint')
+    if fingerprint != self.__fingerprint:
+      return # Another specification, start from scratch
+
+    self.__documents_df = pd.read_parquet(self.__filepath('documents.parquet'))
+    self.__occurrences_df = pd.read_parquet(self.__filepath('occurrences.parquet'))
+
+
+  def save(self):
+    os.makedirs(self.__store_path, exist_ok=True)
+    self.__documents_df.to_parquet(self.__filepath('documents.parquet'), index=False)
+    self.__occurrences_df.to_parquet(self.__filepath('occurrences.parquet'), index=False)
+    with open(self.__filepath('spec.json'), 'w', encoding='utf-8') as f:
+      json.dump({'fingerprint': self.__fingerprint,
+                 'search_in_cols': self.__search_in_cols,
+                 'keywords_search_spec': [list(pair) for pair in self.__keywords_search_spec]}, f, indent=2)
+
+
+  @staticmethod
+  def identified(dois: pd.Series) -> pd.Series:
+    """
+    Documents identified by their DOI: DOI not missing and not repeated.
+    """
+    return dois.notna() & ~dois.duplicated(keep=False)
+
+
+  def get_docs_to_search(self, df: pd.DataFrame) -> pd.Series:
+    """
+    Boolean mask of the documents (rows of df) that are new or changed since the last update,
+    or that are not identified by their DOI.
+    df: Prepared dataset, with the search column.
+    """
+    hashes = KeywordOccurrenceStore.documents_hash(df, self.__search_in_cols)
+    # Nullable type, hashes of new documents are NA (a float NaN would round the other hashes)
+    stored_hashes = self.__documents_df.set_index('DOI')['hash'].astype('UInt64')
+    previous_hashes = df['DOI'].map(stored_hashes)
+    unchanged = (previous_hashes == hashes.values).fillna(False).astype(bool)
+    return ~(unchanged & KeywordOccurrenceStore.identified(df['DOI']))
+
+
+  def update(self, df: pd.DataFrame, searched_mask: pd.Series, new_occurrences_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace the occurrences of the searched documents, remove the documents that are not in df anymore.
+    Return all occurrences in the order of df (same order as a full search).
+    df: Prepared dataset.
+    searched_mask: Mask returned by get_docs_to_search().
+    new_occurrences_df: Occurrences of the searched documents,
+      located by the row position of their document in df instead of their DOI: 'position', 'Year', 'keyword', 'term'.
+    """
+    identified = KeywordOccurrenceStore.identified(df['DOI']).to_numpy()
+    searched = np.asarray(searched_mask, dtype=bool)
+    doc_positions = pd.Series(np.flatnonzero(identified), index=df['DOI'].values[identified])
+    kept_dois = df['DOI'].values[identified & ~searched]
+    kept_df = self.__occurrences_df[self.__occurrences_df['DOI'].isin(kept_dois)]
+
+    position_columns = ['position'] + KeywordOccurrenceStore.OCCURRENCE_COLUMNS[1:]
+    occurrences_dfs = [occ_df.reindex(columns=position_columns)
+                       for occ_df in [kept_df.assign(position=kept_df['DOI'].map(doc_positions).values),
+                                      new_occurrences_df] if len(occ_df) > 0]
+    if len(occurrences_dfs) > 0:
+      occurrences_df = pd.concat(occurrences_dfs, ignore_index=True)
+      occurrences_df['Year'] = occurrences_df['Year'].astype(df['Year'].dtype)
+    else:
+      occurrences_df = pd.DataFrame(columns=position_columns)
+    # Documents order of df, search order within documents (stable sort)
+    occurrences_df = occurrences_df.sort_values('position', kind='stable').reset_index(drop=True)
+    positions = occurrences_df.pop('position').to_numpy(dtype=np.int64)
+    occurrences_df.insert(0, 'DOI', df['DOI'].values[positions])
+
+    # Only the documents identified by their DOI are stored
+    stored = identified[positions]
+    self.__occurrences_df = occurrences_df[stored].reset_index(drop=True)
+    self.__documents_df = pd.DataFrame({'DOI': df['DOI'].values[identified],
+                                        'hash': KeywordOccurrenceStore.documents_hash(df, self.__search_in_cols).values[identified]})
+    self.__nb_searched_docs = int(searched.sum())
+    return occurrences_df
+
+
+  def get_occurrences_df(self) -> pd.DataFrame:
+    """
+    Stored occurrences, without the documents not identified by their DOI.
+    """
+    return self.__occurrences_df
+
+
+  def get_nb_searched_docs(self) -> int:
+    """
+    Number of documents searched during the last update.
+    """
+    return self.__nb_searched_docs
+
+
+  def get_fingerprint(self) -> str:
+    return self.__fingerprint
@@ -1,7 +1,15 @@
+import numpy as np
 import pandas as pd
 import re
 from typing import Dict, List, Tuple
 
+from .keyword_search_report import KeywordSearchReport
+from .keyword_occurrence_store import KeywordOccurrenceStore
+from .keyword_search_cache import KeywordSearchCache
+from .token_index import TokenIndex
+from .sharded_search import find_occurrences_sharded
+from .keyword_search_result import KeywordSearchResult
+
 
 class KeywordSearchAnalyzer:
   """
@@ -18,6 +26,10 @@ class KeywordSearchAnalyzer:
 
     - https://stackoverflow.com/questions/4697882/how-can-i-find-all-matches-to-a-regular-expression-in-python
     - https://stackoverflow.com/questions/16476924/how-to-iterate-over-rows-in-a-dataframe-in-pandas
+
+  The input dataset is never modified: the search column is built in a separate frame (search_df).
+  Static methods are pure functions of their inputs, search() runs all stages and returns
+  a KeywordSearchResult, so that one loaded dataset can serve concurrent searches (e.g. thread pool).
   """
 
   # To search in TAK, only TA, only T, A or K
@@ -41,10 +53,13 @@ class KeywordSearchAnalyzer:
       self.__df: pd.DataFrame = df
 
     self.__keywords_search_spec:list[tuple[str, str]] = keywords_search_spec
+    self.__search_df: pd.DataFrame = None
     self.__keyword_occurrence_df: pd.DataFrame = None
     self.__keyword_crosstab_df: pd.DataFrame = None
 
     self.__pattern:str = None
+    self.__report: KeywordSearchReport = None
+    self.__token_index: TokenIndex = None
 
     # Temporal
     self.__keyword_temporal_crosstab_df: pd.DataFrame = None
@@ -54,38 +69,205 @@ class KeywordSearchAnalyzer:
     self.__search_in_cols: str = search_in_cols
   
 
-  def prepare(self):
+  def _get_source_cols(self) -> List[str]:
+    return KeywordSearchAnalyzer.source_cols(self.__search_in_cols)
+
+
+  @staticmethod
+  def source_cols(search_in_cols: str) -> List[str]:
     """
-    Pattern preparation: https://docs.python.org/3/library/re.html#writing-a-tokenizer
+    Dataset columns concatenated in the search column.
     """
-    
     cols = [] # ['Title', 'Abstract', 'Author Keywords']
 
-    if 'T' in self.__search_in_cols:
+    if 'T' in search_in_cols:
       cols.append('Title')
-    if 'A' in self.__search_in_cols:
+    if 'A' in search_in_cols:
       cols.append('Abstract')
-    if 'K' in self.__search_in_cols:
+    if 'K' in search_in_cols:
       cols.append('Author Keywords')
     
     if len(cols) < 1:
-      raise ValueError('At least one column must be defined for search: ' + self.__search_in_cols)
+      raise ValueError('At least one column must be defined for search: ' + search_in_cols)
+    return cols
+
+
+  @staticmethod
+  def build_search_df(df: pd.DataFrame, search_in_cols: str) -> pd.DataFrame:
+    """
+    New frame with the DOI, Year and Authors of the documents and the lower case search column.
+    df is not modified.
+    """
+    cols = KeywordSearchAnalyzer.source_cols(search_in_cols)
 
     separator = '. '
-    self.__df[self.__search_in_cols] = self.__df[cols].apply(lambda row: separator.join(row.values.astype(str)), axis=1)
+    search_df = df[[col for col in ['DOI', 'Year', 'Authors'] if col in df.columns]].copy()
+    search_df[search_in_cols] = df[cols].apply(lambda row: separator.join(row.values.astype(str)), axis=1)
     # TODO clean with POS if necessary ---------------------
-    self.__df[self.__search_in_cols] = self.__df[self.__search_in_cols].apply(str.lower)
-    # Pattern with named groups
-    self.__pattern: str = '|'.join('(?P<%s>%s)' % pair for pair in self.__keywords_search_spec)
+    search_df[search_in_cols] = search_df[search_in_cols].apply(str.lower)
+    return search_df
+
+
+  @staticmethod
+  def build_pattern(keywords_search_spec: List[Tuple[str, str]]) -> str:
+    """
+    Pattern with named groups: https://docs.python.org/3/library/re.html#writing-a-tokenizer
+    """
+    return '|'.join('(?P<%s>%s)' % pair for pair in keywords_search_spec)
+
+
+  @staticmethod
+  def search(df: pd.DataFrame,
+             keywords_search_spec: List[Tuple[str, str]],
+             search_in_cols: str = 'TAK',
+             nb_workers: int = None) -> KeywordSearchResult:
+    """
+    Pure version of prepare() and process(): df is not modified and no state is kept.
+    """
+    if search_in_cols not in KeywordSearchAnalyzer.SEARCH_COLS:
+      raise ValueError(search_in_cols + ' must be in [' + ', '.join(KeywordSearchAnalyzer.SEARCH_COLS) + '].')
+
+    search_df = KeywordSearchAnalyzer.build_search_df(df, search_in_cols)
+    pattern = KeywordSearchAnalyzer.build_pattern(keywords_search_spec)
+    keyword_occurrence_df = pd.DataFrame(KeywordSearchAnalyzer.find_occurrences(pattern=pattern,
+                                                                                 dois=search_df['DOI'],
+                                                                                 years=search_df['Year'],
+                                                                                 texts=search_df[search_in_cols],
+                                                                                 nb_workers=nb_workers))
+    return KeywordSearchResult(search_df=search_df,
+                               search_in_cols=search_in_cols,
+                               pattern=pattern,
+                               keyword_occurrence_df=keyword_occurrence_df,
+                               keyword_crosstab_df=KeywordSearchAnalyzer.crosstab(keyword_occurrence_df))
+
+
+  def prepare(self):
+    """
+    Search column and pattern preparation.
+    """
+    self.__search_df = KeywordSearchAnalyzer.build_search_df(self.__df, self.__search_in_cols)
+    self.__pattern: str = KeywordSearchAnalyzer.build_pattern(self.__keywords_search_spec)
   
 
-  def process(self):
-    
+  def process(self,
+              occurrence_store: KeywordOccurrenceStore = None,
+              use_token_index: bool = False,
+              nb_workers: int = None):
+    """
+    Search the keywords in each document.
+    occurrence_store: Incremental search, only new or changed documents since the last update of the store
+      are searched. The store is updated and saved, results are the same as a full search.
+    use_token_index: Only search the documents containing the literals required by at least one keyword
+      expression, see TokenIndex. Results are the same as a full search.
+    nb_workers: Search in a pool of processes (sharded by rows) if greater than 1.
+      Results are the same as a serial search.
+    """
+    docs_to_search = pd.Series(True, index=self.__search_df.index)
+    if occurrence_store is not None:
+      docs_to_search &= occurrence_store.get_docs_to_search(self.__search_df)
+    # The token index only skips the regexes: a changed document that is no longer a candidate
+    # is still searched for the store, its previous occurrences are replaced by none
+    docs_to_scan = docs_to_search.copy()
+    if use_token_index:
+      docs_to_scan &= self.__get_token_index_candidates()
+
+    if occurrence_store is None:
+      self.__keyword_occurrence_df = pd.DataFrame(self._find_occurrences(self.__search_df[docs_to_scan], nb_workers))
+    else:
+      # Occurrences located by row position: DOIs can be missing or repeated
+      scan_df = self.__search_df[docs_to_scan].assign(DOI=np.flatnonzero(docs_to_scan.to_numpy()))
+      new_occurrences_df = pd.DataFrame(self._find_occurrences(scan_df, nb_workers),
+                                        columns=KeywordOccurrenceStore.OCCURRENCE_COLUMNS)
+      self.__keyword_occurrence_df = occurrence_store.update(self.__search_df, docs_to_search,
+                                                             new_occurrences_df.rename(columns={'DOI': 'position'}))
+      occurrence_store.save()
+    self.__report = None
+
+    # Create a crosstab
+    self._process_crosstab()
+  
+
+  def prepare_and_process(self,
+                          search_cache: KeywordSearchCache = None,
+                          occurrence_store: KeywordOccurrenceStore = None,
+                          use_token_index: bool = False,
+                          nb_workers: int = None):
+    """
+    prepare() and process() memoized by a search cache.
+    On a cache hit, the search column, pattern, occurrences and crosstab are restored without searching.
+    """
+    if search_cache is None:
+      self.prepare()
+      self.process(occurrence_store=occurrence_store, use_token_index=use_token_index, nb_workers=nb_workers)
+      return
+
+    key = KeywordSearchCache.key(df=self.__df,
+                                 source_cols=self._get_source_cols(),
+                                 keywords_search_spec=self.__keywords_search_spec,
+                                 search_in_cols=self.__search_in_cols)
+    entry = search_cache.get(key)
+    if entry is None:
+      self.prepare()
+      self.process(occurrence_store=occurrence_store, use_token_index=use_token_index, nb_workers=nb_workers)
+      search_cache.put(key, {'search_col': self.__search_df[self.__search_in_cols].to_numpy(),
+                             'pattern': self.__pattern,
+                             'keyword_occurrence_df': self.__keyword_occurrence_df,
+                             'keyword_crosstab_df': self.__keyword_crosstab_df})
+      return
+
+    self.__search_df = self.__df[[col for col in ['DOI', 'Year', 'Authors'] if col in self.__df.columns]].copy()
+    self.__search_df[self.__search_in_cols] = entry['search_col']
+    self.__pattern = entry['pattern']
+    self.__keyword_occurrence_df = entry['keyword_occurrence_df']
+    self.__keyword_crosstab_df = entry['keyword_crosstab_df']
+    self.__report = None
+
+
+  def __get_token_index_candidates(self) -> pd.Series:
+    """
+    Documents that may match at least one keyword expression.
+    A document that matches no expression has no occurrence with the combined pattern,
+    all candidates are searched with the combined pattern to keep the matching order.
+    """
+    if self.__token_index is None or self.__token_index.get_nb_docs() != len(self.__search_df):
+      self.__token_index = TokenIndex(self.__search_df[self.__search_in_cols])
+
+    candidates = self.__token_index.candidates_any([regexp for _, regexp in self.__keywords_search_spec])
+    if candidates is None: # No literal in one expression, full scan
+      return pd.Series(True, index=self.__search_df.index)
+    return pd.Series(candidates, index=self.__search_df.index)
+
+
+  def get_token_index(self) -> TokenIndex:
+    return self.__token_index
+
+
+  def _find_occurrences(self, df: pd.DataFrame, nb_workers: int = None) -> List[Dict]:
+    return KeywordSearchAnalyzer.find_occurrences(pattern=self.__pattern,
+                                                  dois=df['DOI'],
+                                                  years=df['Year'],
+                                                  texts=df[self.__search_in_cols],
+                                                  nb_workers=nb_workers)
+
+
+  @staticmethod
+  def find_occurrences(pattern: str,
+                       dois: pd.Series,
+                       years: pd.Series,
+                       texts: pd.Series,
+                       nb_workers: int = None) -> List[Dict]:
+    if nb_workers is not None and nb_workers > 1:
+      return find_occurrences_sharded(pattern=pattern,
+                                      dois=dois.tolist(),
+                                      years=years.tolist(),
+                                      texts=texts.tolist(),
+                                      nb_workers=nb_workers)
+
     keyword_occurrences_arr = []
 
-    for doi, year, tak in zip(self.__df['DOI'], self.__df['Year'], self.__df[self.__search_in_cols]):
+    for doi, year, tak in zip(dois, years, texts):
       # Find match and group
-      for match_obj in re.finditer(self.__pattern, tak):
+      for match_obj in re.finditer(pattern, tak):
         keyword_searched = match_obj.lastgroup
         value = match_obj.group()
         #print(keyword_searched, value)
@@ -93,26 +275,33 @@ class KeywordSearchAnalyzer:
                                         "Year": year,
                                         "keyword": keyword_searched,
                                         "term": value })
-    
-    self.__keyword_occurrence_df = pd.DataFrame(keyword_occurrences_arr)
+    return keyword_occurrences_arr
 
-    # Create a crosstab
-    self._process_crosstab()
-  
 
   def _process_crosstab(self) -> pd.DataFrame:
+    self.__keyword_crosstab_df = KeywordSearchAnalyzer.crosstab(self.__keyword_occurrence_df)
+    self.__report = None
+
+
+  @staticmethod
+  def crosstab(keyword_occurrence_df: pd.DataFrame) -> pd.DataFrame:
     """
     Process a matrix DOI x keyword in TAK.
     """
-    self.__keyword_crosstab_df = pd.crosstab(index=[self.__keyword_occurrence_df['DOI']],
-                                             columns=[self.__keyword_occurrence_df['keyword']],
-                                             dropna=False,
-                                             margins=True, # Adding margins (Subtotals on the ends),
-                                             margins_name="Totals").reset_index().fillna(0)
-    self.__keyword_crosstab_df = self.__keyword_crosstab_df.iloc[:-1] # Remove column total (last row)
+    keyword_crosstab_df = pd.crosstab(index=[keyword_occurrence_df['DOI']],
+                                      columns=[keyword_occurrence_df['keyword']],
+                                      dropna=False,
+                                      margins=True, # Adding margins (Subtotals on the ends),
+                                      margins_name="Totals").reset_index().fillna(0)
+    return keyword_crosstab_df.iloc[:-1] # Remove column total (last row)
   
 
   def process_categories_groups(self) -> pd.DataFrame:
+    return KeywordSearchAnalyzer.categories_groups(self.__keyword_crosstab_df)
+
+
+  @staticmethod
+  def categories_groups(keyword_crosstab_df: pd.DataFrame) -> pd.DataFrame:
     """
     Binary counting (do not count occurrences) of the presence of query terms in groups.
     The number of distinct sorted set is the number of population combinations
@@ -127,7 +316,7 @@ class KeywordSearchAnalyzer:
     categories_groups_arr = [] # One or more categories
 
     # Get columns excluding totals
-    df = self.__keyword_crosstab_df.iloc[:, 1:-1]
+    df = keyword_crosstab_df.iloc[:, 1:-1]
     columns = df.columns
 
     for index, row in df.iterrows(): # Loop as a k, v / not as a index basis
@@ -160,12 +349,13 @@ class KeywordSearchAnalyzer:
 
   # Temporal Crosstab Region
 
-  def __count_pub_per_year(self) -> pd.DataFrame:
+  @staticmethod
+  def count_pub_per_year(years: pd.Series) -> pd.Series:
     """
     Count the number of papers per year.
-    Count must be performed on 'self.__df' to have all rows and not only those with an identified term.
+    Count must be performed on all documents and not only those with an identified term.
     """
-    return self.__df['Year'].groupby(self.__df['Year']).agg('count')
+    return years.groupby(years).agg('count')
 
 
   def process_temporal(self):
@@ -173,36 +363,49 @@ class KeywordSearchAnalyzer:
   
 
   def _process_temporal_crosstab(self) -> pd.DataFrame:
+    self.__keyword_temporal_crosstab_df = KeywordSearchAnalyzer.temporal_crosstab(self.__keyword_occurrence_df,
+                                                                                  self.__df['Year'])
+
+
+  @staticmethod
+  def temporal_crosstab(keyword_occurrence_df: pd.DataFrame, years: pd.Series) -> pd.DataFrame:
     """
     Process a matrix Year x keyword in TAK.
+    years: Year of all documents, for the normalization.
     """
     # Get uniques to not count keywords twice
-    #print(len(self.__keyword_occurrence_df))
-    self.__keyword_occurrence_df = self.__keyword_occurrence_df.groupby(['DOI', 'Year', 'keyword']).size().reset_index()
-    #print(len(self.__keyword_occurrence_df))
+    unique_occurrence_df = keyword_occurrence_df.groupby(['DOI', 'Year', 'keyword']).size().reset_index()
 
     # Crosstab
-    self.__keyword_temporal_crosstab_df = pd.crosstab(index=[self.__keyword_occurrence_df['keyword']],
-                                             columns=[self.__keyword_occurrence_df['Year']],
-                                             dropna=False,
-                                             margins=False) \
-                                             .reset_index().fillna(0)
-    self.__keyword_temporal_crosstab_df = self.__keyword_temporal_crosstab_df.set_index('keyword')
+    keyword_temporal_crosstab_df = pd.crosstab(index=[unique_occurrence_df['keyword']],
+                                               columns=[unique_occurrence_df['Year']],
+                                               dropna=False,
+                                               margins=False) \
+                                               .reset_index().fillna(0)
+    keyword_temporal_crosstab_df = keyword_temporal_crosstab_df.set_index('keyword')
 
     # Normalize
-    total_pubs_per_year = self.__count_pub_per_year().values
-    #print(total_pubs_per_year)
-    self.__keyword_temporal_crosstab_df = self.__keyword_temporal_crosstab_df.div(total_pubs_per_year, axis=1)
+    total_pubs_per_year = KeywordSearchAnalyzer.count_pub_per_year(years).values
+    return keyword_temporal_crosstab_df.div(total_pubs_per_year, axis=1)
   
   
   def get_docs_without_keyword_mention(self) -> pd.DataFrame:
-    if self.__keyword_crosstab_df is None or \
-      self.__df is None:
+    return KeywordSearchAnalyzer.docs_without_keyword_mention(self.__search_df,
+                                                              self.__keyword_crosstab_df,
+                                                              self.__search_in_cols)
+
+
+  @staticmethod
+  def docs_without_keyword_mention(search_df: pd.DataFrame,
+                                   keyword_crosstab_df: pd.DataFrame,
+                                   search_in_cols: str) -> pd.DataFrame:
+    if keyword_crosstab_df is None or \
+      search_df is None:
       return pd.DataFrame() # Empty
 
-    valid_DOIs = self.__keyword_crosstab_df['DOI'].values.tolist()
-    no_mention_keyword_df = self.__df[~self.__df['DOI'].isin(valid_DOIs)]
-    return no_mention_keyword_df[['Authors', self.__search_in_cols, 'DOI']]
+    valid_DOIs = keyword_crosstab_df['DOI'].values
+    no_mention_keyword_df = search_df[~search_df['DOI'].isin(valid_DOIs)]
+    return no_mention_keyword_df[['Authors', search_in_cols, 'DOI']]
   
 
   '''def output(self, filepath):
@@ -227,24 +430,29 @@ class KeywordSearchAnalyzer:
 
   def set_keyword_crosstab_df(self, keyword_crosstab_df):
     self.__keyword_crosstab_df = keyword_crosstab_df
+    self.__report = None
 
 
   def get_keyword_temporal_crosstab_df(self) -> pd.DataFrame:
     return self.__keyword_temporal_crosstab_df
 
 
-  def summary(self):
-    if self.get_pattern():
-      print('Patterns: ' + self.get_pattern())
-    
-    #print(analyzer.get_keyword_occurrence_df())
-    
-    if self.get_keyword_crosstab_df() is not None and \
-      len(self.get_keyword_crosstab_df()) > 0:
-      print(self.get_keyword_crosstab_df())
-    
-    if self.get_docs_without_keyword_mention() is not None and \
-      len(self.get_docs_without_keyword_mention()) > 0:
-      docs_without_keyword_mention = self.get_docs_without_keyword_mention()
-      print(len(docs_without_keyword_mention.index))
-      print(self.get_docs_without_keyword_mention())
+  def get_report(self) -> KeywordSearchReport:
+    """
+    Report of the search, metrics are computed once on demand.
+    A new report is created when the results change.
+    """
+    if self.__report is None:
+      self.__report = KeywordSearchReport(pattern=self.get_pattern(),
+                                          keyword_crosstab_df=self.get_keyword_crosstab_df(),
+                                          docs_without_keyword_mention_df_getter=self.get_docs_without_keyword_mention)
+    return self.__report
+
+
+  def summary(self, verbose: bool = False) -> KeywordSearchReport:
+    """
+    Print a compact summary. Full crosstab and documents without mention are printed in verbose mode.
+    """
+    report = self.get_report()
+    print(report.render(verbose=verbose))
+    return report
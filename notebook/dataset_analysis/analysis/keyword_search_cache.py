@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+
+class KeywordSearchCache:
+  """
+  Memoization of keyword search results (KeywordSearchAnalyzer.prepare() and process()).
+  Results are keyed by a fingerprint of the dataset columns used by the search,
+  the keywords search specification and the search columns.
+  Re-running an analysis with identical inputs (e.g. to tweak plots) skips the search.
+
+  Two tiers:
+    - In memory, least recently used entries are evicted beyond max_entries.
+    - On disk (optional), one pickle file per entry in cache_dir.
+  Cached results are shared, they must not be modified in place.
+  """
+
+  # Dataset columns a search depends on, in addition to the searched columns
+  KEY_COLUMNS: List[str] = ['DOI', 'Year', 'Authors']
+
+
+  def __init__(self, max_entries: int = 8, cache_dir: str = None):
+    self.__max_entries: int = max_entries
+    self.__cache_dir: str = cache_dir
+    self.__entries: OrderedDict = OrderedDict()
+    self.__hits: int = 0
+    self.__misses: int = 0
+    if cache_dir is not None:
+      os.makedirs(cache_dir, exist_ok=True)
+
+
+  @staticmethod
+  def dataset_fingerprint(df: pd.DataFrame, source_cols: List[str]) -> str:
+    """
+    Vectorized hash of the columns used by a search (row order matters).
+    """
+    cols = [col for col in source_cols + KeywordSearchCache.KEY_COLUMNS if col in df.columns]
+    row_hashes = pd.util.hash_pandas_object(df[cols].astype(str), index=False).to_numpy()
+    digest = hashlib.sha256(row_hashes.tobytes())
+    digest.update(json.dumps(cols).encode('utf-8'))
+    return digest.hexdigest()
+
+
+  @staticmethod
+  def key(df: pd.DataFrame,
+          source_cols: List[str],
+          keywords_search_spec: List[Tuple[str, str]],
+          search_in_cols: str) -> str:
+    spec = json.dumps({'search_in_cols': search_in_cols,
+                       'keywords_search_spec': [list(pair) for pair in keywords_search_spec]})
+    return hashlib.sha256((KeywordSearchCache.dataset_fingerprint(df, source_cols) + spec).encode('utf-8')).hexdigest()
+
+
+  def get(self, key: str) -> Dict:
+    """
+    Return the cached results or None.
+    """
+    if key in self.__entries:
+      self.__entries.move_to_end(key)
+      self.__hits += 1
+      return self.__entries[key]
+
+    entry = self.__load(key)
+    if entry is not None:
+      self.__put_memory(key, entry)
+      self.__hits += 1
+      return entry
+
+    self.__misses += 1
+    return None
+
+
+  def put(self, key: str, entry: Dict):
+    self.__put_memory(key, entry)
+    if self.__cache_dir is not None:
+      with open(self.__filepath(key), 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+  def clear(self):
+    """
+    Clear the memory tier, disk files are kept.
+    """
+    self.__entries.clear()
+
+
+  def stats(self) -> Dict:
+    return {'entries': len(self.__entries), 'hits': self.__hits, 'misses': self.__misses}
+
+
+  def __put_memory(self, key: str, entry: Dict):
+    self.__entries[key] = entry
+    self.__entries.move_to_end(key)
+    while len(self.__entries) > self.__max_entries:
+      self.__entries.popitem(last=False)
+
+
+  def __filepath(self, key: str) -> str:
+    return os.path.join(self.__cache_dir, key + '.pkl')
+
+
+  def __load(self, key: str) -> Dict:
+    if self.__cache_dir is None or not os.path.exists(self.__filepath(key)):
+      return None
+    with open(self.__filepath(key), 'rb') as f:
+      return pickle.load(f)
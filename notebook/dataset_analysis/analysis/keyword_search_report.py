@@ -0,0 +1,116 @@
+import pandas as pd
+from io import StringIO
+from typing import Dict, List
+
+
+class KeywordSearchReport:
+  """
+  Summary of a keyword search.
+  Each metric is computed once, on demand, from the analyzer results.
+  Rendering is compact by default, full frames are only rendered in verbose mode.
+  """
+
+  NB_KEYWORDS_DISPLAYED: int = 15
+
+
+  def __init__(self,
+               pattern: str,
+               keyword_crosstab_df: pd.DataFrame,
+               docs_without_keyword_mention_df_getter):
+    """
+    pattern: Regular expression of the search, can be None.
+    keyword_crosstab_df: Crosstab 'DOI x keywords' with a last total column, can be None.
+    docs_without_keyword_mention_df_getter: Callable returning the documents without mention.
+    """
+    self.__pattern: str = pattern
+    self.__keyword_crosstab_df: pd.DataFrame = keyword_crosstab_df
+    self.__docs_without_keyword_mention_df_getter = docs_without_keyword_mention_df_getter
+
+    # Lazy metrics
+    self.__docs_without_keyword_mention_df: pd.DataFrame = None
+    self.__docs_per_keyword: pd.Series = None
+
+
+  def get_pattern(self) -> str:
+    return self.__pattern
+
+
+  def get_keywords(self) -> List[str]:
+    if self.__keyword_crosstab_df is None:
+      return []
+    return self.__keyword_crosstab_df.columns[1:-1].tolist()
+
+
+  def get_nb_docs_with_mention(self) -> int:
+    if self.__keyword_crosstab_df is None:
+      return 0
+    return len(self.__keyword_crosstab_df)
+
+
+  def get_docs_without_keyword_mention(self) -> pd.DataFrame:
+    if self.__docs_without_keyword_mention_df is None:
+      self.__docs_without_keyword_mention_df = self.__docs_without_keyword_mention_df_getter()
+    return self.__docs_without_keyword_mention_df
+
+
+  def get_nb_docs_without_mention(self) -> int:
+    return len(self.get_docs_without_keyword_mention().index)
+
+
+  def get_docs_per_keyword(self) -> pd.Series:
+    """
+    Number of documents mentioning each keyword (binary count), sorted desc.
+    """
+    if self.__docs_per_keyword is None:
+      if self.__keyword_crosstab_df is None:
+        self.__docs_per_keyword = pd.Series(dtype='int')
+      else:
+        keywords_df = self.__keyword_crosstab_df.iloc[:, 1:-1]
+        self.__docs_per_keyword = (keywords_df > 0).sum().sort_values(ascending=False)
+    return self.__docs_per_keyword
+
+
+  def to_dict(self) -> Dict:
+    return {
+      'Keywords': len(self.get_keywords()),
+      'Docs with mention': self.get_nb_docs_with_mention(),
+      'Docs without mention': self.get_nb_docs_without_mention(),
+      'Docs per keyword': self.get_docs_per_keyword().to_dict()
+    }
+
+
+  def render(self, verbose: bool = False) -> str:
+    buffer = StringIO()
+    nb_with = self.get_nb_docs_with_mention()
+    nb_without = self.get_nb_docs_without_mention()
+    nb_docs = nb_with + nb_without
+
+    if self.__pattern:
+      if verbose:
+        buffer.write('Patterns: ' + self.__pattern + '\n')
+      else:
+        buffer.write('Patterns: ' + str(self.__pattern.count('(?P<')) + ' keywords\n')
+
+    if nb_docs > 0:
+      buffer.write('Docs with mention: ' + str(nb_with) + ' (' + str(round(nb_with/nb_docs*100, 1)) + '%)' +
+                   ', without mention: ' + str(nb_without) + '\n')
+
+    docs_per_keyword = self.get_docs_per_keyword()
+    if len(docs_per_keyword) > 0:
+      displayed = docs_per_keyword.head(KeywordSearchReport.NB_KEYWORDS_DISPLAYED)
+      buffer.write('Docs per keyword: ' + ', '.join(k + ' ' + str(v) for k, v in displayed.items()))
+      if len(docs_per_keyword) > len(displayed):
+        buffer.write(', ... (' + str(len(docs_per_keyword)) + ' keywords)')
+      buffer.write('\n')
+
+    if verbose:
+      if nb_with > 0:
+        buffer.write(str(self.__keyword_crosstab_df) + '\n')
+      if nb_without > 0:
+        buffer.write(str(self.get_docs_without_keyword_mention()) + '\n')
+
+    return buffer.getvalue().rstrip('\n')
+
+
+  def __str__(self):
+    return self.render(verbose=False)
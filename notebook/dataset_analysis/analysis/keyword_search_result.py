@@ -0,0 +1,89 @@
+import threading
+import pandas as pd
+from typing import List
+
+from .keyword_search_report import KeywordSearchReport
+
+
+class KeywordSearchResult:
+  """
+  Results of a keyword search, see KeywordSearchAnalyzer.search().
+  A result is never modified after its creation, it can be shared between threads.
+  Derived tables (temporal crosstab, report) are computed once on demand.
+  Frames are shared, they must not be modified in place.
+  """
+
+
+  def __init__(self,
+               search_df: pd.DataFrame,
+               search_in_cols: str,
+               pattern: str,
+               keyword_occurrence_df: pd.DataFrame,
+               keyword_crosstab_df: pd.DataFrame):
+    """
+    search_df: DOI, Year, Authors and search column of all documents, see KeywordSearchAnalyzer.build_search_df().
+    """
+    self.__search_df: pd.DataFrame = search_df
+    self.__search_in_cols: str = search_in_cols
+    self.__pattern: str = pattern
+    self.__keyword_occurrence_df: pd.DataFrame = keyword_occurrence_df
+    self.__keyword_crosstab_df: pd.DataFrame = keyword_crosstab_df
+
+    # Lazy tables
+    self.__lock = threading.Lock()
+    self.__keyword_temporal_crosstab_df: pd.DataFrame = None
+    self.__report: KeywordSearchReport = None
+
+
+  def get_search_df(self) -> pd.DataFrame:
+    return self.__search_df
+
+
+  def get_search_in_cols(self) -> str:
+    return self.__search_in_cols
+
+
+  def get_pattern(self) -> str:
+    return self.__pattern
+
+
+  def get_keyword_occurrence_df(self) -> pd.DataFrame:
+    return self.__keyword_occurrence_df
+
+
+  def get_keyword_crosstab_df(self) -> pd.DataFrame:
+    return self.__keyword_crosstab_df
+
+
+  def get_keyword_temporal_crosstab_df(self) -> pd.DataFrame:
+    from .keyword_search_analyser import KeywordSearchAnalyzer # Circular import
+    with self.__lock:
+      if self.__keyword_temporal_crosstab_df is None:
+        self.__keyword_temporal_crosstab_df = KeywordSearchAnalyzer.temporal_crosstab(self.__keyword_occurrence_df,
+                                                                                      self.__search_df['Year'])
+      return self.__keyword_temporal_crosstab_df
+
+
+  def get_docs_without_keyword_mention(self) -> pd.DataFrame:
+    from .keyword_search_analyser import KeywordSearchAnalyzer # Circular import
+    return KeywordSearchAnalyzer.docs_without_keyword_mention(self.__search_df,
+                                                              self.__keyword_crosstab_df,
+                                                              self.__search_in_cols)
+
+
+  def process_categories_groups(self):
+    from .keyword_search_analyser import KeywordSearchAnalyzer # Circular import
+    return KeywordSearchAnalyzer.categories_groups(self.__keyword_crosstab_df)
+
+
+  def get_keywords(self) -> List[str]:
+    return self.get_report().get_keywords()
+
+
+  def get_report(self) -> KeywordSearchReport:
+    with self.__lock:
+      if self.__report is None:
+        self.__report = KeywordSearchReport(pattern=self.__pattern,
+                                            keyword_crosstab_df=self.__keyword_crosstab_df,
+                                            docs_without_keyword_mention_df_getter=self.get_docs_without_keyword_mention)
+      return self.__report
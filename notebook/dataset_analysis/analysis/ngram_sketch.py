@@ -0,0 +1,208 @@
+import math
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+from nltk.probability import FreqDist
+
+
+class CountMinSketch:
+  """
+  Count-min sketch of 64-bit keys: depth rows of width counters, one hash function per row.
+  An estimate is never lower than the true count and, with probability 1 - delta,
+  exceeds it by at most epsilon * N (N: number of added keys), epsilon = e / width, delta = exp(-depth).
+  Memory is bounded: width * depth counters whatever the number of distinct keys.
+  Source: Cormode, Muthukrishnan. An improved data stream summary: the count-min sketch and its applications (2005).
+  """
+
+
+  def __init__(self, width: int = 2**18, depth: int = 4, seed: int = 0):
+    if width < 2 or width & (width - 1) != 0:
+      raise ValueError('width must be a power of 2: ' + str(width))
+    self.__width: int = width
+    self.__shift: np.uint64 = np.uint64(64 - int(math.log2(width)))
+    self.__counters: np.ndarray = np.zeros((depth, width), dtype=np.int32)
+    # Multiply-shift hash functions (odd multipliers)
+    rng = np.random.default_rng(seed)
+    self.__multipliers: np.ndarray = rng.integers(0, 2**63, size=depth, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    self.__nb_added: int = 0
+
+
+  def __indices(self, keys: np.ndarray) -> np.ndarray:
+    return ((keys[np.newaxis, :] * self.__multipliers[:, np.newaxis]) >> self.__shift).astype(np.int64)
+
+
+  def add(self, keys: np.ndarray):
+    """
+    keys: uint64 array, a key can be repeated.
+    """
+    for row, indices in enumerate(self.__indices(keys)):
+      self.__counters[row] += np.bincount(indices, minlength=self.__width)
+    self.__nb_added += len(keys)
+
+
+  def estimate(self, keys: np.ndarray) -> np.ndarray:
+    indices = self.__indices(keys)
+    return self.__counters[np.arange(len(indices))[:, np.newaxis], indices].min(axis=0)
+
+
+  def get_nb_added(self) -> int:
+    return self.__nb_added
+
+
+  def get_epsilon(self) -> float:
+    return math.e / self.__width
+
+
+  def get_delta(self) -> float:
+    return math.exp(-len(self.__counters))
+
+
+  def get_error_bound(self) -> float:
+    """
+    Maximum overestimation of a count, with probability 1 - delta.
+    """
+    return self.get_epsilon() * self.__nb_added
+
+
+  def get_nbytes(self) -> int:
+    return self.__counters.nbytes
+
+
+class SketchNgramCounter:
+  """
+  Two-pass n-gram counting with bounded memory, for the NLTK collocation finders.
+  N-grams are counted per pattern, i.e. the offsets of the words from the first word:
+  (0, 1) bigrams, (0, 2) two words with one word between them, (0, 1, 2) trigrams, etc.
+    1. Each pattern is counted in a count-min sketch.
+    2. Only n-grams whose estimate reaches min_freq_count (candidates) are counted exactly.
+  A count-min sketch never underestimates: no n-gram of at least min_freq_count occurrences is missed,
+  candidates that do not reach min_freq_count (false positives) are removed by apply_freq_filter().
+  All sub-n-grams of an n-gram occur at least as often as the n-gram, so that the exact counts
+  of the candidates are enough to score the n-grams that pass the frequency filter.
+
+  Counting follows the finders from_words(): an n-gram is counted at each position where it fits.
+  """
+
+  # Patterns of the finders per n-gram order, see BigramCollocationFinder, TrigramCollocationFinder and
+  # QuadgramCollocationFinder from_words()
+  ORDER_PATTERNS: Dict[int, List[Tuple[int, ...]]] = {
+    2: [(0, 1)],
+    3: [(0, 1), (0, 2), (0, 1, 2)],
+    4: [(0, 1), (0, 2), (0, 3), (0, 1, 2), (0, 1, 3), (0, 2, 3), (0, 1, 2, 3)]
+  }
+
+  # 64-bit mixing constants (splitmix64)
+  MIX_MULTIPLIER_1 = np.uint64(0xbf58476d1ce4e5b9)
+  MIX_MULTIPLIER_2 = np.uint64(0x94d049bb133111eb)
+  GOLDEN_GAMMA = np.uint64(0x9e3779b97f4a7c15)
+
+
+  def __init__(self,
+               tokens: List[str],
+               min_freq_count: int,
+               orders: List[int] = [2, 3, 4],
+               sketch_width: int = 2**18,
+               sketch_depth: int = 4,
+               chunk_size: int = 2**20):
+    """
+    sketch_width, sketch_depth: Size of the count-min sketch of each pattern.
+    chunk_size: Number of positions hashed at once.
+    """
+    self.__min_freq_count: int = min_freq_count
+    self.__chunk_size: int = chunk_size
+    self.__patterns: List[Tuple[int, ...]] = sorted({pattern for order in orders
+                                                     for pattern in SketchNgramCounter.ORDER_PATTERNS[order]})
+
+    token_ids, self.__vocabulary = pd.factorize(pd.Series(tokens, dtype=object))
+    self.__token_ids: np.ndarray = token_ids.astype(np.uint64)
+
+    self.__sketches: Dict[Tuple[int, ...], CountMinSketch] = {
+      pattern: CountMinSketch(width=sketch_width, depth=sketch_depth, seed=seed)
+      for seed, pattern in enumerate(self.__patterns)}
+    self.__candidate_fds: Dict[Tuple[int, ...], FreqDist] = None
+    self.__word_fd: FreqDist = None
+
+
+  def __pattern_keys(self, pattern: Tuple[int, ...], start: int, end: int) -> np.ndarray:
+    """
+    64-bit keys of the n-grams of a pattern at positions [start, end).
+    """
+    keys = np.full(end - start, np.uint64(len(pattern)), dtype=np.uint64)
+    for offset in pattern:
+      keys = (keys ^ self.__token_ids[start + offset:end + offset]) * SketchNgramCounter.GOLDEN_GAMMA
+      keys ^= keys >> np.uint64(31)
+    keys = (keys ^ (keys >> np.uint64(30))) * SketchNgramCounter.MIX_MULTIPLIER_1
+    keys = (keys ^ (keys >> np.uint64(27))) * SketchNgramCounter.MIX_MULTIPLIER_2
+    return keys ^ (keys >> np.uint64(31))
+
+
+  def __chunks(self, pattern: Tuple[int, ...]):
+    nb_positions = max(len(self.__token_ids) - pattern[-1], 0)
+    for start in range(0, nb_positions, self.__chunk_size):
+      yield start, min(start + self.__chunk_size, nb_positions)
+
+
+  def count(self):
+    """
+    First pass (sketches) then second pass (exact counts of the candidates).
+    """
+    if self.__candidate_fds is not None:
+      return
+
+    for pattern in self.__patterns:
+      for start, end in self.__chunks(pattern):
+        self.__sketches[pattern].add(self.__pattern_keys(pattern, start, end))
+
+    self.__candidate_fds = {}
+    for pattern in self.__patterns:
+      candidate_counts: Dict[Tuple[int, ...], int] = {}
+      for start, end in self.__chunks(pattern):
+        positions = start + np.flatnonzero(self.__sketches[pattern].estimate(self.__pattern_keys(pattern, start, end))
+                                           >= self.__min_freq_count)
+        if len(positions) == 0:
+          continue
+        ngram_ids, counts = np.unique(np.stack([self.__token_ids[positions + offset] for offset in pattern], axis=1),
+                                      axis=0, return_counts=True)
+        for ids, count in zip(map(tuple, ngram_ids.tolist()), counts.tolist()):
+          candidate_counts[ids] = candidate_counts.get(ids, 0) + count
+
+      self.__candidate_fds[pattern] = FreqDist({tuple(self.__vocabulary[list(ids)]): count
+                                                for ids, count in candidate_counts.items()})
+
+    self.__word_fd = FreqDist(dict(zip(self.__vocabulary,
+                                       np.bincount(self.__token_ids.astype(np.int64),
+                                                   minlength=len(self.__vocabulary)).tolist())))
+
+
+  def get_word_fd(self) -> FreqDist:
+    self.count()
+    return self.__word_fd
+
+
+  def get_candidate_fd(self, pattern: Tuple[int, ...]) -> FreqDist:
+    """
+    Exact counts of the candidates of a pattern.
+    """
+    self.count()
+    return self.__candidate_fds[pattern]
+
+
+  def get_stats(self) -> pd.DataFrame:
+    """
+    Error bounds and memory of the sketches, number of candidates and false positives per pattern.
+    """
+    self.count()
+    stats_arr = []
+    for pattern in self.__patterns:
+      sketch = self.__sketches[pattern]
+      candidate_fd = self.__candidate_fds[pattern]
+      stats_arr.append({'pattern': pattern,
+                        'positions': sketch.get_nb_added(),
+                        'epsilon': sketch.get_epsilon(),
+                        'delta': sketch.get_delta(),
+                        'error bound': sketch.get_error_bound(),
+                        'sketch (MB)': sketch.get_nbytes() / 2**20,
+                        'candidates': len(candidate_fd),
+                        'false positives': sum(1 for count in candidate_fd.values() if count < self.__min_freq_count)})
+    return pd.DataFrame(stats_arr)
@@ -0,0 +1,41 @@
+from functools import lru_cache
+from typing import FrozenSet
+
+"""
+NLTK resources shared by the analysis modules.
+They are loaded on first use, once per process: importing a module does not read any NLTK corpus.
+Following NLTK dependencies must be installed: nltk.download('stopwords').
+"""
+
+
+@lru_cache(maxsize=None)
+def english_stopwords() -> FrozenSet[str]:
+  from nltk.corpus import stopwords
+  return frozenset(stopwords.words('english'))
+
+
+@lru_cache(maxsize=None)
+def bigram_measures():
+  from nltk.collocations import BigramAssocMeasures
+  return BigramAssocMeasures()
+
+
+@lru_cache(maxsize=None)
+def trigram_measures():
+  from nltk.collocations import TrigramAssocMeasures
+  return TrigramAssocMeasures()
+
+
+@lru_cache(maxsize=None)
+def quadgram_measures():
+  from nltk.collocations import QuadgramAssocMeasures
+  return QuadgramAssocMeasures()
+
+
+@lru_cache(maxsize=None)
+def wordnet_lemmatizer():
+  """
+  Following NLTK dependencies must be installed: nltk.download('wordnet').
+  """
+  from nltk.stem import WordNetLemmatizer # recommended lemmatizer for plural forms
+  return WordNetLemmatizer()
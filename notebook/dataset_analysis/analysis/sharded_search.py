@@ -0,0 +1,109 @@
+import atexit
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+"""
+Sharded keyword search in a process pool.
+Documents are partitioned by row range, each worker compiles a pattern once (cached per pattern)
+and shards are merged in document order: results are identical to a serial search.
+The pool is started by the first sharded search and reused by the next ones (any pattern).
+"""
+
+# Below this number of documents, the search is serial: starting the workers costs more than the search
+MIN_SHARDED_DOCS: int = 5000
+
+# Shared pool and its number of workers, see __get_pool()
+_pool: ProcessPoolExecutor = None
+_pool_nb_workers: int = None
+_pool_lock = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _compile(pattern: str) -> re.Pattern:
+  return re.compile(pattern)
+
+
+def _search_shard(pattern: str, dois: list, years: list, texts: list) -> List[Dict]:
+  keyword_occurrences_arr = []
+  for doi, year, text in zip(dois, years, texts):
+    for match_obj in _compile(pattern).finditer(text):
+      keyword_occurrences_arr.append({"DOI": doi,
+                                      "Year": year,
+                                      "keyword": match_obj.lastgroup,
+                                      "term": match_obj.group()})
+  return keyword_occurrences_arr
+
+
+def __get_pool(nb_workers: int) -> ProcessPoolExecutor:
+  """
+  Shared pool, restarted if the number of workers changed.
+  """
+  global _pool, _pool_nb_workers
+  if _pool is None or _pool_nb_workers != nb_workers:
+    shutdown_pool()
+    # Spawn, forking a process with running threads (e.g. figure export) is unsafe
+    _pool = ProcessPoolExecutor(max_workers=nb_workers, mp_context=multiprocessing.get_context('spawn'))
+    _pool_nb_workers = nb_workers
+  return _pool
+
+
+def shutdown_pool():
+  """
+  Stop the workers of the shared pool (also done at exit).
+  """
+  global _pool, _pool_nb_workers
+  if _pool is not None:
+    _pool.shutdown()
+  _pool = None
+  _pool_nb_workers = None
+
+
+atexit.register(shutdown_pool)
+
+
+def find_occurrences_sharded(pattern: str,
+                             dois: list,
+                             years: list,
+                             texts: list,
+                             nb_workers: int = None,
+                             shards_per_worker: int = 4,
+                             min_sharded_docs: int = MIN_SHARDED_DOCS) -> List[Dict]:
+  """
+  Same result as a serial search: one occurrence per match, in document order then match order.
+  Workers are spawned: a script calling this function must guard its entry point with
+  if __name__ == '__main__': (otherwise each worker runs the script again and the pool breaks, BrokenProcessPool).
+  nb_workers: Number of processes, number of CPUs by default.
+  shards_per_worker: More shards than workers to balance documents of different lengths.
+  min_sharded_docs: Serial search below this number of documents.
+  """
+  if len(texts) == 0:
+    return []
+  if len(texts) < min_sharded_docs:
+    return _search_shard(pattern, dois, years, texts)
+
+  nb_workers = nb_workers if nb_workers is not None else os.cpu_count()
+  nb_shards = max(min(nb_workers * shards_per_worker, len(texts)), 1)
+  bounds = np.linspace(0, len(texts), nb_shards + 1).astype(int)
+  shards = [(dois[start:end], years[start:end], texts[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+  # One sharded search at a time: the workers already use the CPUs, and the pool is not restarted under a running search
+  with _pool_lock:
+    try:
+      # map() returns the shards results in submission order
+      shards_occurrences = __get_pool(nb_workers).map(_search_shard, [pattern] * len(shards), *zip(*shards))
+
+      keyword_occurrences_arr = []
+      for shard_occurrences in shards_occurrences:
+        keyword_occurrences_arr.extend(shard_occurrences)
+    except BrokenProcessPool:
+      shutdown_pool() # Started again by the next search
+      raise
+  return keyword_occurrences_arr
@@ -0,0 +1,66 @@
+from typing import List
+
+from .token_utils import TokenUtils
+
+
+class TAKTokenization:
+  """
+  Cleaned and tokenized TAK of a dataset, see TAKTokenizer.tokenize_df().
+  A tokenization is never modified after its creation, it can be shared between threads.
+  One item per document in each list: sentences of tokens for titles and abstracts, tokens for author keywords.
+  """
+
+
+  def __init__(self,
+               titles_cleaned: List[List[List[str]]],
+               abstracts_cleaned: List[List[List[str]]],
+               auth_keywords_cleaned: List[List[str]],
+               tak_tokens: List[str],
+               abstract_cleaning_stats: dict):
+    self.__titles_cleaned = titles_cleaned
+    self.__abstracts_cleaned = abstracts_cleaned
+    self.__auth_keywords_cleaned = auth_keywords_cleaned
+    self.__tak_tokens: List[str] = tak_tokens
+    self.__abstract_cleaning_stats: dict = abstract_cleaning_stats
+
+
+  def __len__(self):
+    return len(self.__tak_tokens)
+
+
+  def get_titles_cleaned(self) -> List[List[List[str]]]:
+    return self.__titles_cleaned
+
+
+  def get_abstracts_cleaned(self) -> List[List[List[str]]]:
+    return self.__abstracts_cleaned
+
+
+  def get_auth_keywords_cleaned(self) -> List[List[str]]:
+    return self.__auth_keywords_cleaned
+
+
+  def get_tak_tokens(self) -> List[str]:
+    """
+    Joined tokens of each document, 'TAK (tokens)' column.
+    """
+    return self.__tak_tokens
+
+
+  def get_abstract_cleaning_stats(self) -> dict:
+    return self.__abstract_cleaning_stats
+
+
+  def all_tak_tokens(self) -> List[str]:
+    all_tokens = []
+    for doc_tokens in self.doc_tokens():
+      all_tokens.extend(doc_tokens)
+    return all_tokens
+
+
+  def doc_tokens(self) -> List[List[str]]:
+    """
+    Tokens of each document: title, abstract then author keywords.
+    """
+    return [TokenUtils.flatten(title) + TokenUtils.flatten(abstract) + keywords
+            for title, abstract, keywords in zip(self.__titles_cleaned, self.__abstracts_cleaned, self.__auth_keywords_cleaned)]
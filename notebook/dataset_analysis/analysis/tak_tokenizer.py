@@ -10,27 +10,36 @@ import nltk
 #nltk.download('stopwords')
 #nltk.download('averaged_perceptron_tagger')
 #nltk.download('universal_tagset')
+#nltk.download('wordnet') # Only to lemmatize
 from collections import Counter
 from collections import defaultdict
-from nltk.corpus import stopwords
 from nltk.tokenize import RegexpTokenizer
-from nltk.stem import WordNetLemmatizer # recommended lemmatizer for plural forms
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.tag import pos_tag
 
 from .token_utils import TokenUtils
+from .tak_tokenization import TAKTokenization
 
 
 class TAKTokenizer:
+  """
+  Clean and tokenize the title, abstract and author keywords (TAK) of a dataset.
+  Static methods are pure functions of their inputs, tokenize_df() runs all stages
+  on a loaded dataset and returns a TAKTokenization without modifying the dataset.
+  """
 
   CLEAN_SUFFIX = '(clean)'
 
-  ENGLISH_STOPWORDS = set(stopwords.words('english'))
   BETWEEN_PAR_PATTERN = '[\(\[].*?[\)\]]'
 
   SENTENCE_SEPARATOR = '. '
   SENTENCE_SEPARATOR_NO_SPACE = '.'
 
+  # Sponsor / copyright trailer, see sponsor_sentence_remover()
+  COPYRIGHT_PATTERN = re.compile(' ?(?i:copyright[ \t]*)?(?:\(c\)|&#(?:169|xa9;)|©)?([ \t]+)?(?:19|20)[0-9]{2}')
+  # Same pattern extended to the end of the abstract, to cut it column-wide
+  COPYRIGHT_TRAILER_PATTERN = re.compile(COPYRIGHT_PATTERN.pattern + '.*', re.DOTALL)
+
 
   def __init__(self, scopus_dataset: str, columns:List[str]):
     """
@@ -41,9 +50,7 @@ class TAKTokenizer:
     self.__scopus_dataset: str = scopus_dataset
     self.__df: pd.DataFrame = None
     self.__colums: List[str] = columns
-    self.__titles_cleaned = []
-    self.__abstracts_cleaned = []
-    self.__auth_keywords_cleaned = []
+    self.__tokenization: TAKTokenization = None
 
 
   def prepare(self):
@@ -52,63 +59,83 @@ class TAKTokenizer:
     self.__df = self.__df.astype('str') # Force str type
 
 
-  def process(self):
+  def process(self, lemmatize: bool = False):
     """
     Clean and tokenize.
+    lemmatize: Replace words by their WordNet lemma (e.g. impairments -> impairment), see TokenUtils.lemmatize().
+    """
+    self.__tokenization = TAKTokenizer.tokenize_df(self.__df, lemmatize=lemmatize)
+    self.__df['TAK (tokens)'] = self.__tokenization.get_tak_tokens()
+
+
+  @staticmethod
+  def tokenize_df(df: pd.DataFrame, lemmatize: bool = False) -> TAKTokenization:
+    """
+    Pure version of process(): df (str columns 'Title', 'Abstract', 'Author Keywords') is not modified.
     """
-    self._clean_title()
-    self._clean_abstract()
-    self._clean_author_keywords()
-    self._create_tak_col()
+    titles_cleaned = TAKTokenizer.clean_titles(df['Title'], lemmatize=lemmatize)
+    abstracts_cleaned, abstract_cleaning_stats = TAKTokenizer.clean_abstracts(df['Abstract'], lemmatize=lemmatize)
+    auth_keywords_cleaned = TAKTokenizer.clean_author_keywords(df['Author Keywords'], lemmatize=lemmatize)
+    return TAKTokenization(titles_cleaned=titles_cleaned,
+                           abstracts_cleaned=abstracts_cleaned,
+                           auth_keywords_cleaned=auth_keywords_cleaned,
+                           tak_tokens=TAKTokenizer.tak_col(titles_cleaned, abstracts_cleaned, auth_keywords_cleaned),
+                           abstract_cleaning_stats=abstract_cleaning_stats)
 
 
   def filter(self, col_name:str, values):
     self.__df = self.__df[self.__df[col_name].isin(values)]
 
 
-  def _clean_title(self):
-    for title in self.__df['Title']:
-      sentences = TokenUtils.tokenize(title)
-      self.__titles_cleaned.append(sentences)
+  @staticmethod
+  def clean_titles(titles: pd.Series, lemmatize: bool = False) -> List[List[List[str]]]:
+    return [TokenUtils.tokenize(title, lemmatize=lemmatize) for title in titles]
 
 
-  def _clean_abstract(self):
-    for abstract in self.__df['Abstract']:
-      sentences = TokenUtils.tokenize(TAKTokenizer.sponsor_sentence_remover(abstract))
-      self.__abstracts_cleaned.append(sentences)
+  @staticmethod
+  def clean_abstracts(abstracts: pd.Series, lemmatize: bool = False):
+    """
+    Return the tokenized abstracts without sponsor sentences and the statistics of the removal.
+    """
+    cleaned_abstracts = TAKTokenizer.sponsor_sentences_remover(abstracts)
+    abstract_cleaning_stats = TAKTokenizer.sponsor_sentences_stats(abstracts, cleaned_abstracts)
+    return [TokenUtils.tokenize(abstract, lemmatize=lemmatize) for abstract in cleaned_abstracts], abstract_cleaning_stats
 
 
-  def _clean_author_keywords(self):
+  @staticmethod
+  def clean_author_keywords(auth_keywords_col: pd.Series, lemmatize: bool = False) -> List[List[str]]:
     """
     Author keywords are separated by '; '
     Perform a technical cleaning.
     A dot is used in join for tokenizer.
     """
-
-    for auth_keywords in self.__df['Author Keywords']:
+    auth_keywords_cleaned = []
+    for auth_keywords in auth_keywords_col:
       if not auth_keywords:
-        self.__auth_keywords_cleaned.append([])
+        auth_keywords_cleaned.append([])
         continue
 
-      self.__auth_keywords_cleaned.append(TokenUtils.keywords_tokenize(auth_keywords))
+      auth_keywords_cleaned.append(TokenUtils.keywords_tokenize(auth_keywords, lemmatize=lemmatize))
+    return auth_keywords_cleaned
 
 
-  def _create_tak_col(self):
+  @staticmethod
+  def tak_col(titles_cleaned: list, abstracts_cleaned: list, auth_keywords_cleaned: list) -> List[str]:
     """
     Create TAK column.
     """
 
     # Check size of TAK cleaned cols
-    if len(self.__titles_cleaned) != len(self.__abstracts_cleaned) != len(self.__auth_keywords_cleaned):
+    if len(titles_cleaned) != len(abstracts_cleaned) != len(auth_keywords_cleaned):
       raise ValueError('TAK prepared columns have not the same length.')
 
-    nb_rows = len(self.__titles_cleaned)
+    nb_rows = len(titles_cleaned)
 
     tak_col = []
     for i in range(0, nb_rows):
-      title = self.__titles_cleaned[i]
-      abstract = self.__abstracts_cleaned[i]
-      keywords = self.__auth_keywords_cleaned[i]
+      title = titles_cleaned[i]
+      abstract = abstracts_cleaned[i]
+      keywords = auth_keywords_cleaned[i]
 
       tak_buffer = StringIO()
       if len(title) > 0:
@@ -122,31 +149,28 @@ class TAKTokenizer:
 
       tak_col.append(tak_buffer.getvalue())
 
-    self.__df['TAK (tokens)'] = tak_col
+    return tak_col
 
 
   def all_tak_tokens(self) -> List[str]:
-    # Check size of TAK cleaned cols
-    if len(self.__titles_cleaned) != len(self.__abstracts_cleaned) != len(self.__auth_keywords_cleaned):
-      raise ValueError('TAK prepared columns have not the same length.')
+    return self.__tokenization.all_tak_tokens()
 
-    nb_rows = len(self.__titles_cleaned)
 
-    all_tokens = []
-    for i in range(0, nb_rows):
-      title = self.__titles_cleaned[i]
-      abstract = self.__abstracts_cleaned[i]
-      keywords = self.__auth_keywords_cleaned[i]
+  def get_df(self):
+      return self.__df
 
-      all_tokens.extend(TokenUtils.flatten(title))
-      all_tokens.extend(TokenUtils.flatten(abstract))
-      all_tokens.extend(keywords)
 
-    return all_tokens
+  def get_tokenization(self) -> TAKTokenization:
+    return self.__tokenization
 
 
-  def get_df(self):
-      return self.__df
+  def get_abstract_cleaning_stats(self) -> dict:
+    """
+    Statistics of the sponsor sentences removal, available after process().
+    """
+    if self.__tokenization is None:
+      return None
+    return self.__tokenization.get_abstract_cleaning_stats()
 
 
   @staticmethod
@@ -169,11 +193,40 @@ class TAKTokenizer:
       ©2010 ieee
     """
 
-    pattern = re.compile(' ?(?i:copyright[ \t]*)?(?:\(c\)|&#(?:169|xa9;)|©)?([ \t]+)?(?:19|20)[0-9]{2}')
-    m = pattern.search(abstract)
+    m = TAKTokenizer.COPYRIGHT_PATTERN.search(abstract)
     if m is None:
       return abstract
 
     match_range = m.span()
     abstract = abstract[0:match_range[0]] # Cut str at first span index
     return abstract
+
+
+  @staticmethod
+  def sponsor_sentences_remover(abstracts: pd.Series) -> pd.Series:
+    """
+    Vectorized version of sponsor_sentence_remover().
+    Cut all abstracts of a column at their first copyright mention in one call.
+    """
+    return abstracts.astype(str).str.replace(TAKTokenizer.COPYRIGHT_TRAILER_PATTERN, '', regex=True)
+
+
+  @staticmethod
+  def sponsor_sentences_stats(abstracts: pd.Series, cleaned_abstracts: pd.Series) -> dict:
+    """
+    Check that the sponsor sentences removal does not drop real content.
+    Bytes are counted in UTF-8.
+    """
+    nb_bytes = abstracts.astype(str).str.encode('utf-8').str.len()
+    nb_cleaned_bytes = cleaned_abstracts.str.encode('utf-8').str.len()
+    removed_bytes = nb_bytes - nb_cleaned_bytes
+    truncated = removed_bytes > 0
+
+    nb_truncated = int(truncated.sum())
+    return {
+      'Abstracts': len(abstracts),
+      'Truncated': nb_truncated,
+      'Perc. truncated': round(nb_truncated/len(abstracts)*100, 1) if len(abstracts) > 0 else 0.0,
+      'Mean bytes removed': float(removed_bytes[truncated].mean()) if nb_truncated > 0 else 0.0,
+      'Max bytes removed': int(removed_bytes.max()) if nb_truncated > 0 else 0
+    }
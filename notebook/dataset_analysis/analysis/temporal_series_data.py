@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List
+
+from .temporal_plot_data import TemporalPlotData
+
+
+class TemporalSeriesData:
+  """
+  Columnar version of TemporalPlotData for a whole crosstab 'keyword x Year'.
+  Values are held in one 2-D array (one row per series), series are views of this array.
+  """
+
+
+  def __init__(self,
+               titles: List[str],
+               x: np.ndarray,
+               values: np.ndarray):
+    if values.ndim != 2 or values.shape != (len(titles), len(x)):
+      raise ValueError('values must be of shape (nb titles, nb x): ' + str(values.shape))
+    self.__titles: List[str] = titles
+    self.__x: np.ndarray = x
+    self.__values: np.ndarray = values
+
+
+  @staticmethod
+  def from_crosstab(temporal_crosstab_df: pd.DataFrame, rename_dict: Dict = None) -> 'TemporalSeriesData':
+    """
+    temporal_crosstab_df: Crosstab with one row per keyword and one column per year.
+    rename_dict: Titles of the keywords, otherwise '_' are replaced by spaces.
+    """
+    index = temporal_crosstab_df.index
+    if rename_dict is not None:
+      titles = [rename_dict.get(keyword) for keyword in index]
+    else:
+      titles = [keyword.replace('_', ' ') for keyword in index]
+
+    return TemporalSeriesData(titles=titles,
+                              x=temporal_crosstab_df.columns.to_numpy(),
+                              values=temporal_crosstab_df.to_numpy(dtype='float64'))
+
+
+  def __len__(self):
+    return len(self.__titles)
+
+
+  def get_titles(self) -> List[str]:
+    return self.__titles
+
+
+  def get_x(self) -> np.ndarray:
+    return self.__x
+
+
+  def get_values(self) -> np.ndarray:
+    return self.__values
+
+
+  def get_title(self, i: int) -> str:
+    return self.__titles[i]
+
+
+  def get_y(self, i: int) -> np.ndarray:
+    """
+    View (no copy) of the i-th series.
+    """
+    return self.__values[i]
+
+
+  def to_temporal_plot_data(self) -> List[TemporalPlotData]:
+    return [TemporalPlotData(title=self.__titles[i], x=self.__x.tolist(), y=self.__values[i].tolist())
+            for i in range(len(self.__titles))]
@@ -0,0 +1,236 @@
+import numpy as np
+import pandas as pd
+from typing import List, Set
+
+from .temporal_series_data import TemporalSeriesData
+
+
+class TermEmergence:
+  """
+  Find emerging terms without predefined keywords: per-year counts of all the n-grams of a tokenized corpus
+  and windowed growth and burst scores of every candidate term.
+
+  N-grams are counted per document (document frequency by default) and never cross a document
+  or a separator token ('.', ';', ...). Terms are integer-coded once, yearly counts are one matrix
+  'term x year'. Windows slide year by year, their sums are updated incrementally (the entering year
+  is added, the leaving year subtracted) instead of being recounted.
+
+  For a window of w years ending at year t:
+  - count: occurrences in [t-w+1, t], previous count: occurrences in [t-2w+1, t-w].
+  - growth: log2 of the ratio of the add-one smoothed rates (per document) of the window and of the previous window.
+  - burst: standardized residual of year t against the rate of the w previous years,
+    (x_t - e_t) / sqrt(e_t + 1) with e_t = docs_t * rate of [t-w, t-1].
+  """
+
+  SEPARATORS: Set[str] = {'.', ',', ';', ':', '!', '?'}
+  SCORES: List[str] = ['growth', 'burst']
+
+
+  def __init__(self,
+               documents: List[List[str]],
+               years: List[int],
+               orders: List[int] = [1, 2, 3],
+               min_count: int = 5,
+               document_frequency: bool = True,
+               ignored_words: Set[str] = None):
+    """
+    documents: Tokens of each document, e.g. TAKTokenization.doc_tokens().
+    years: Publication year of each document.
+    orders: Lengths of the n-grams.
+    min_count: Minimum total count of a candidate term (all years).
+    document_frequency: Count the documents mentioning a term (otherwise all its occurrences).
+    ignored_words: N-grams starting or ending with one of these words are ignored (e.g. stopwords).
+    """
+    if len(documents) != len(years):
+      raise ValueError('documents and years must have the same length: ' + str(len(documents)) + ' != ' + str(len(years)))
+
+    self.__years: np.ndarray = np.arange(min(years), max(years) + 1) if len(years) > 0 else np.array([], dtype=np.int64)
+    self.__docs_per_year: np.ndarray = np.bincount(np.asarray(years, dtype=np.int64) - self.__years[0],
+                                                   minlength=len(self.__years)) if len(years) > 0 else self.__years.copy()
+    self.__terms, self.__orders, self.__counts = TermEmergence.__count(documents, years, self.__years, orders, min_count,
+                                                                       document_frequency, ignored_words)
+
+
+  @staticmethod
+  def __count(documents: List[List[str]], years: List[int], all_years: np.ndarray, orders: List[int], min_count: int,
+              document_frequency: bool, ignored_words: Set[str]):
+    """
+    Candidate terms, their number of words and their counts per year (one row per term, one column per year).
+    """
+    tokens = [token for document in documents for token in document]
+    token_ids, vocabulary = pd.factorize(pd.Series(tokens, dtype=object))
+    token_ids = token_ids.astype(np.int64)
+    doc_ids = np.repeat(np.arange(len(documents)), [len(document) for document in documents])
+    doc_year_ids = np.asarray(years, dtype=np.int64) - (all_years[0] if len(all_years) > 0 else 0)
+    separators = vocabulary.isin(list(TermEmergence.SEPARATORS))
+    ignored = vocabulary.isin(list(ignored_words)) if ignored_words is not None else np.zeros(len(vocabulary), dtype=bool)
+
+    terms, term_orders, counts = [], [], []
+    for order in orders:
+      nb_positions = max(len(token_ids) - order + 1, 0)
+      starts = np.arange(nb_positions)
+      # Same document, no separator inside, no ignored word at the ends
+      valid = doc_ids[starts] == doc_ids[starts + order - 1]
+      for offset in range(order):
+        valid &= ~separators[token_ids[starts + offset]]
+      valid &= ~ignored[token_ids[starts]] & ~ignored[token_ids[starts + order - 1]]
+      starts = starts[valid]
+      if len(starts) == 0:
+        continue
+
+      ngram_keys, ngram_codes = TermEmergence.__ngram_keys(token_ids, starts, order, len(vocabulary))
+      if document_frequency:
+        # One count per (n-gram, document)
+        pair_ids = np.unique(ngram_codes.astype(np.int64) * len(documents) + doc_ids[starts])
+        ngram_codes, pair_doc_ids = np.divmod(pair_ids, len(documents))
+        pair_year_ids = doc_year_ids[pair_doc_ids]
+      else:
+        pair_year_ids = doc_year_ids[doc_ids[starts]]
+
+      order_counts = np.bincount(ngram_codes * len(all_years) + pair_year_ids,
+                                 minlength=len(ngram_keys) * len(all_years)).reshape(len(ngram_keys), len(all_years))
+      candidates = order_counts.sum(axis=1) >= min_count
+      words = vocabulary.to_numpy()[TermEmergence.__ngram_ids(ngram_keys[candidates], order, len(vocabulary))]
+      terms.extend(' '.join(ngram_words) for ngram_words in words.tolist())
+      term_orders.append(np.full(int(candidates.sum()), order))
+      counts.append(order_counts[candidates])
+
+    if len(terms) == 0:
+      return np.array([], dtype=object), np.array([], dtype=np.int64), np.zeros((0, len(all_years)), dtype=np.int64)
+    return np.array(terms, dtype=object), np.concatenate(term_orders), np.concatenate(counts)
+
+
+  @staticmethod
+  def __ngram_keys(token_ids: np.ndarray, starts: np.ndarray, order: int, vocabulary_size: int):
+    """
+    Sorted unique keys of the n-grams starting at starts (token ids in base vocabulary_size) and the code of each n-gram.
+    """
+    if vocabulary_size ** order >= 2**63:
+      raise ValueError('Vocabulary too large for ' + str(order) + '-grams: ' + str(vocabulary_size))
+    keys = np.zeros(len(starts), dtype=np.int64)
+    for offset in range(order):
+      keys = keys * vocabulary_size + token_ids[starts + offset]
+    return np.unique(keys, return_inverse=True)
+
+
+  @staticmethod
+  def __ngram_ids(ngram_keys: np.ndarray, order: int, vocabulary_size: int) -> np.ndarray:
+    """
+    Token ids (nb n-grams, order) of n-gram keys.
+    """
+    ids = np.zeros((len(ngram_keys), order), dtype=np.int64)
+    for offset in reversed(range(order)):
+      ngram_keys, ids[:, offset] = np.divmod(ngram_keys, vocabulary_size)
+    return ids
+
+
+  def __len__(self):
+    return len(self.__terms)
+
+
+  def get_terms(self) -> List[str]:
+    return self.__terms.tolist()
+
+
+  def get_years(self) -> np.ndarray:
+    return self.__years
+
+
+  def get_docs_per_year(self) -> np.ndarray:
+    return self.__docs_per_year
+
+
+  def get_counts_df(self) -> pd.DataFrame:
+    """
+    Crosstab 'term x Year' of the candidate terms.
+    """
+    return pd.DataFrame(self.__counts,
+                        index=pd.Index(self.__terms, name='Term'),
+                        columns=pd.Index(self.__years, name='Year'))
+
+
+  def to_temporal_series(self, terms: List[str]) -> TemporalSeriesData:
+    """
+    Yearly counts of some terms, e.g. the top of rank(), to plot them (viz_utils.multiple_line_plot_batch()).
+    """
+    return TemporalSeriesData.from_crosstab(self.get_counts_df().loc[terms], rename_dict={term: term for term in terms})
+
+
+  def slide(self, window: int = 3):
+    """
+    Yield (year, count, previous count, growth, burst) per window end year, one value per term.
+    Only windows with a complete previous window are yielded.
+    """
+    if window < 1:
+      raise ValueError('window must be at least 1: ' + str(window))
+
+    yearly_counts = self.__counts.T.astype(np.float64) # One contiguous row per year
+    docs = self.__docs_per_year.astype(np.float64)
+    nb_years, nb_terms = yearly_counts.shape
+    zeros = np.zeros(nb_terms)
+
+    def column(t: int):
+      return yearly_counts[t] if 0 <= t < nb_years else zeros
+
+    def nb_docs(t: int) -> float:
+      return docs[t] if 0 <= t < nb_years else 0.0
+
+    # Running sums of the current window, the previous window and the baseline of the burst
+    current, previous, baseline = zeros.copy(), zeros.copy(), zeros.copy()
+    current_docs, previous_docs, baseline_docs = 0.0, 0.0, 0.0
+    for t in range(nb_years):
+      current += column(t) - column(t - window)
+      previous += column(t - window) - column(t - 2 * window)
+      baseline += column(t - 1) - column(t - window - 1)
+      current_docs += nb_docs(t) - nb_docs(t - window)
+      previous_docs += nb_docs(t - window) - nb_docs(t - 2 * window)
+      baseline_docs += nb_docs(t - 1) - nb_docs(t - window - 1)
+      if t < 2 * window - 1:
+        continue
+
+      growth = np.log2((current + 1) / (current_docs + 1)) - np.log2((previous + 1) / (previous_docs + 1))
+      expected = docs[t] * baseline / max(baseline_docs, 1.0)
+      burst = (yearly_counts[t] - expected) / np.sqrt(expected + 1)
+      yield self.__years[t], current.copy(), previous.copy(), growth, burst
+
+
+  def __window_df(self, year: int, current: np.ndarray, previous: np.ndarray, growth: np.ndarray, burst: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({'Term': self.__terms,
+                         'ngrams': self.__orders,
+                         'Year': year,
+                         'count': current.astype(np.int64),
+                         'previous count': previous.astype(np.int64),
+                         'growth': growth,
+                         'burst': burst})
+
+
+  def emergence(self, window: int = 3) -> pd.DataFrame:
+    """
+    Scores of all the candidate terms for every window, long table:
+    'Term', 'ngrams', 'Year' (end of the window), 'count', 'previous count', 'growth', 'burst'.
+    """
+    emergence_dfs = [self.__window_df(*scores) for scores in self.slide(window)]
+    if len(emergence_dfs) == 0:
+      return pd.DataFrame(columns=['Term', 'ngrams', 'Year', 'count', 'previous count'] + TermEmergence.SCORES)
+    return pd.concat(emergence_dfs, ignore_index=True)
+
+
+  def rank(self, window: int = 3, year: int = None, by: str = 'growth', limit: int = 0) -> pd.DataFrame:
+    """
+    Terms ranked by emergence (desc) in the window ending at year (last year by default).
+    """
+    if by not in TermEmergence.SCORES:
+      raise ValueError(by + ' must be in [' + ', '.join(TermEmergence.SCORES) + '].')
+
+    window_scores = None
+    for scores in self.slide(window):
+      if year is None or scores[0] == year:
+        window_scores = scores
+      if scores[0] == year:
+        break
+    if window_scores is None:
+      raise ValueError('No complete window of ' + str(window) + ' years ends at ' + str(year) + '.')
+
+    ranking_df = self.__window_df(*window_scores).sort_values([by, 'count', 'Term'], ascending=[False, False, True], kind='stable') \
+                           .reset_index(drop=True)
+    return ranking_df.head(limit) if limit > 0 else ranking_df
@@ -0,0 +1,145 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+try:
+  from re import _parser as sre_parse # Python >= 3.11
+except ImportError:
+  import sre_parse
+
+
+class TokenIndex:
+  """
+  Inverted index (token -> documents) over a lower case text column, e.g. TAK.
+  Used to select the candidate documents of a regular expression before running it:
+    1. Literals that any match must contain are extracted from the expression (e.g. 'blind', 'vision').
+    2. Candidate documents contain all the words of these literals (as substrings of their tokens).
+  When no literal can be extracted from an expression, all documents are candidates (full scan).
+
+  Tokens are the word characters runs (\\w+) of the texts: a word of a literal always lies inside one token.
+  """
+
+  TOKEN_PATTERN = re.compile(r'\w+')
+
+  REPEAT_OPS = tuple(getattr(sre_parse, op) for op in ['MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT']
+                     if hasattr(sre_parse, op))
+
+
+  def __init__(self, texts: pd.Series):
+    self.__nb_docs: int = len(texts)
+    postings: Dict[str, List[int]] = {}
+    for doc_position, text in enumerate(texts):
+      for token in set(TokenIndex.TOKEN_PATTERN.findall(str(text))):
+        postings.setdefault(token, []).append(doc_position)
+    self.__postings: Dict[str, np.ndarray] = {token: np.array(docs, dtype=np.int32) for token, docs in postings.items()}
+    self.__word_masks: Dict[str, np.ndarray] = {} # Memo: word -> documents with a token containing the word
+
+
+  def get_nb_docs(self) -> int:
+    return self.__nb_docs
+
+
+  def get_vocabulary_size(self) -> int:
+    return len(self.__postings)
+
+
+  def candidates(self, pattern: str) -> np.ndarray:
+    """
+    Boolean mask of the documents that may match the pattern, None if no literal can be extracted.
+    """
+    requirement = TokenIndex.required_literals(pattern)
+    if requirement is None:
+      return None
+    return self.__evaluate(requirement)
+
+
+  def candidates_any(self, patterns: List[str]) -> np.ndarray:
+    """
+    Boolean mask of the documents that may match at least one pattern, None if one pattern requires a full scan.
+    """
+    mask = np.zeros(self.__nb_docs, dtype=bool)
+    for pattern in patterns:
+      pattern_mask = self.candidates(pattern)
+      if pattern_mask is None:
+        return None
+      mask |= pattern_mask
+    return mask
+
+
+  def __evaluate(self, requirement: Tuple) -> np.ndarray:
+    op, args = requirement
+    if op == 'lit':
+      mask = np.ones(self.__nb_docs, dtype=bool)
+      for word in TokenIndex.TOKEN_PATTERN.findall(args):
+        mask &= self.__word_mask(word)
+      return mask
+
+    masks = [self.__evaluate(arg) for arg in args]
+    if op == 'and':
+      return np.logical_and.reduce(masks)
+    return np.logical_or.reduce(masks)
+
+
+  def __word_mask(self, word: str) -> np.ndarray:
+    if word not in self.__word_masks:
+      mask = np.zeros(self.__nb_docs, dtype=bool)
+      for token, docs in self.__postings.items():
+        if word in token:
+          mask[docs] = True
+      self.__word_masks[word] = mask
+    return self.__word_masks[word]
+
+
+  # region Literals extraction
+
+  @staticmethod
+  def required_literals(pattern: str) -> Tuple:
+    """
+    Requirement tree of a pattern, None if nothing is required:
+      ('lit', 'blind people'): The literal must be in the match.
+      ('and', [requirements]): All requirements.
+      ('or', [requirements]): At least one requirement (alternatives).
+    Literals are lower cased, texts are searched in lower case.
+    """
+    return TokenIndex.__requirement(sre_parse.parse(pattern))
+
+
+  @staticmethod
+  def __requirement(subpattern) -> Tuple:
+    requirements = []
+    literal_run = []
+
+    def flush_literal_run():
+      literal = ''.join(literal_run).lower()
+      literal_run.clear()
+      if TokenIndex.TOKEN_PATTERN.search(literal): # At least one word
+        requirements.append(('lit', literal))
+
+    for op, av in subpattern:
+      if op is sre_parse.LITERAL:
+        literal_run.append(chr(av))
+        continue
+      flush_literal_run()
+
+      requirement = None
+      if op is sre_parse.SUBPATTERN:
+        requirement = TokenIndex.__requirement(av[-1])
+      elif op is sre_parse.BRANCH:
+        branches = [TokenIndex.__requirement(branch) for branch in av[1]]
+        if all(branch is not None for branch in branches):
+          requirement = ('or', branches)
+      elif op in TokenIndex.REPEAT_OPS and av[0] >= 1: # At least one repetition
+        requirement = TokenIndex.__requirement(av[2])
+
+      if requirement is not None:
+        requirements.append(requirement)
+    flush_literal_run()
+
+    if len(requirements) == 0:
+      return None
+    if len(requirements) == 1:
+      return requirements[0]
+    return ('and', requirements)
+
+  # endregion
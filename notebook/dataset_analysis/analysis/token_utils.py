@@ -1,5 +1,6 @@
-from typing import List
+from typing import Dict, List, Tuple
 import re
+from functools import lru_cache
 from io import StringIO
 import nltk
 # Following dependencies must be installed.
@@ -7,17 +8,18 @@ import nltk
 #nltk.download('punkt')
 #nltk.download('stopwords')
 #nltk.download('universal_tagset')
-from nltk.corpus import stopwords
+#nltk.download('wordnet') # Only to lemmatize
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.tag import pos_tag
 
+from .nltk_resources import english_stopwords, wordnet_lemmatizer
+
 
 class TokenUtils:
   """
   Utility class to perform text analysis at token level.
   """
 
-  ENGLISH_STOPWORDS = set(stopwords.words('english'))
   BETWEEN_PAR_PATTERN:str = '[\(\[].*?[\)\]]' # To exclude acronyms e.g. (PVI)
   INCLUDED_POS: List[str] = ['ADP', 'CONJ', 'DET', 'NUM', 'PRT', 'PRON']
   EXCLUDED_POS: List[str] = ['ADP', 'CONJ', 'DET', 'NUM', 'PRT', 'PRON', 'VERB', '.']
@@ -25,28 +27,83 @@ class TokenUtils:
   # string.punctuation: !"#$%&'()*+,-./:;<=>?@[\]^_`{|}~
   SENTENCE_SEPARATOR_PUNCT:set = set((punct) for punct in ['!', ',', '.', ':', ';', '?'])
 
+  # Universal POS -> WordNet POS, other POS are not lemmatized
+  WORDNET_POS: Dict[str, str] = {'NOUN': 'n', 'VERB': 'v', 'ADJ': 'a', 'ADV': 'r'}
+  # Maximum number of (word, POS) types in the lemma cache
+  LEMMA_CACHE_SIZE: int = 2**17
+
 
   @staticmethod
-  def tokenize(text:str) -> List[List[str]]:
+  def tokenize(text:str, lemmatize: bool = False) -> List[List[str]]:
     """
     Tokenize text by sentence, then by words, then filter according to POS.
     Example value: "It Feels Like Taking a Gamble": Exploring Perceptions, Practices, and Challenges of Using Makeup and Cosmetics for People with Visual Impairments
+    lemmatize: Replace the kept words by their lemma, e.g. impairments -> impairment, see lemmatize_tokens().
     """
     sentences_arr = []
+    sentences_pos = []
     for sentence in sent_tokenize(text):
       sentence_arr = []
+      sentence_pos = []
       words = word_tokenize(sentence)
       for word, pos in pos_tag(words, tagset='universal'):
         if not TokenUtils.filter(word, pos): # TODO can be parametrized
           sentence_arr.append(word.lower())
+          sentence_pos.append(pos)
       sentences_arr.append(sentence_arr)
+      sentences_pos.append(sentence_pos)
+
+    if lemmatize:
+      # Lemmatize the words of all sentences at once, then split the lemmas by sentence
+      lemmas = iter(TokenUtils.lemmatize_tokens([word for sentence_arr in sentences_arr for word in sentence_arr],
+                                                [pos for sentence_pos in sentences_pos for pos in sentence_pos]))
+      sentences_arr = [[next(lemmas) for _ in sentence_arr] for sentence_arr in sentences_arr]
     return sentences_arr
 
 
   @staticmethod
-  def keywords_tokenize(keywords_row:str) -> List[str]:
+  @lru_cache(maxsize=LEMMA_CACHE_SIZE)
+  def lemmatize(word: str, pos: str) -> str:
+    """
+    WordNet lemma of a lower case word with its universal POS tag.
+    Memoized per (word, POS) type: WordNet is only queried once per type (bounded cache, LRU eviction),
+    see lemma_cache_info().
+    """
+    wordnet_pos = TokenUtils.WORDNET_POS.get(pos)
+    if wordnet_pos is None:
+      return word
+    return wordnet_lemmatizer().lemmatize(word, wordnet_pos)
+
+
+  @staticmethod
+  def lemmatize_tokens(words: List[str], pos_tags: List[str]) -> List[str]:
+    """
+    Lemmatize a token stream: each unique (word, POS) type is lemmatized once, then lemmas are mapped
+    back over the stream. The cost depends on the vocabulary size, not on the number of tokens.
+    """
+    type_lemmas: Dict[Tuple[str, str], str] = {}
+    lemmas = []
+    for word_type in zip(words, pos_tags):
+      lemma = type_lemmas.get(word_type)
+      if lemma is None:
+        lemma = type_lemmas[word_type] = TokenUtils.lemmatize(*word_type)
+      lemmas.append(lemma)
+    return lemmas
+
+
+  @staticmethod
+  def lemma_cache_info():
+    """
+    Hits, misses (lemmatized types) and size of the lemma cache.
+    """
+    return TokenUtils.lemmatize.cache_info()
+
+
+  @staticmethod
+  def keywords_tokenize(keywords_row:str, lemmatize: bool = False) -> List[str]:
     """
     keywords_row: 'Color to gray; probabilistic graphical model; visual cue.'
+    lemmatize: Lemmatize the words of the keywords as nouns (keywords are not POS tagged).
     """
     auth_keywords_list = keywords_row.lower().split('; ')
 
@@ -57,6 +114,9 @@ class TokenUtils:
       # Remove between (), terms are acronyms
       keyword = re.sub("[\(\[].*?[\)\]]", "", keyword)
       keyword = keyword.strip()
+      if lemmatize:
+        words = keyword.split(' ')
+        keyword = ' '.join(TokenUtils.lemmatize_tokens(words, ['NOUN'] * len(words)))
       cleaned_keywords.append(keyword)
       # Add the keywords separator
       if i+1 < len(auth_keywords_list):
@@ -102,7 +162,7 @@ class TokenUtils:
       return True
 
     # Is a stopword
-    if token in TokenUtils.ENGLISH_STOPWORDS:
+    if token in english_stopwords():
       return True
 
     # Is an acronym
@@ -161,7 +221,7 @@ class TokenUtils:
     # Only check length for non punctuation
     if (pos != '.' and len(token) < 2) \
     or pos is not None and pos in TokenUtils.EXCLUDED_POS \
-    or token in TokenUtils.ENGLISH_STOPWORDS \
+    or token in english_stopwords() \
     or re.search(TokenUtils.BETWEEN_PAR_PATTERN, token):
       return True
     else:
@@ -1,33 +1,72 @@
 import os
 import pandas as pd
-from matplotlib import pyplot as plt
-from upsetplot import plot, from_memberships
-from typing import Dict, List
+from concurrent.futures import Future
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Tuple
 from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
-from dataset_analysis.analysis.temporal_plot_data import TemporalPlotData
-from .viz_utils import multiple_line_plot
-from dataset_analysis.analysis.tak_tokenizer import TAKTokenizer
-from dataset_analysis.analysis.collocation_processor import CollocationProcessor
+from dataset_analysis.analysis.keyword_occurrence_store import KeywordOccurrenceStore
+from dataset_analysis.analysis.keyword_search_cache import KeywordSearchCache
+from dataset_analysis.analysis.temporal_series_data import TemporalSeriesData
+from dataset_analysis.analysis.intersection_counts import IntersectionCounts
+from dataset_analysis.analysis.descriptive_stats_cube import DescriptiveStatsCube
 from .file_utils import rename_with_clust
+from .profiling_utils import profiled, stage
+from .figure_export import FigureExportQueue
+from .export_utils import export_dfs, rename_with_format
+if TYPE_CHECKING:
+  from dataset_analysis.analysis.authorship_analyzer import AuthorshipAnalyzer
+  from dataset_analysis.analysis.duckdb_session import DuckDBSession
 
 """
 Service methods to run analyzer.
 Act as a facade to analysis classes.
+Plotting libraries (matplotlib, upsetplot, plotly), NLTK and DuckDB are imported by the functions using them,
+importing this module stays cheap.
 """
 
 # region TAK analysis
 
-def __count_nb_group_multiple_terms(all_groups_arr, data_arr):
+# Default style of the UpSet plots
+UPSET_STYLE: Dict = {'show_counts': True,
+                     'element_size': 25,
+                     'intersection_plot_elements': 10,
+                     'totals_plot_elements': 10}
+
+
+def __count_nb_group_multiple_terms(intersection_counts: IntersectionCounts, verbose: bool = False) -> pd.DataFrame:
+  """
+  Count the documents mentioning terms of multiple groups.
+  The groups are only printed in verbose mode.
+  """
   multiple_group_arr = []
-  for i in range(len(all_groups_arr)):
-    if len(all_groups_arr[i]) > 1:
-      multiple_group_arr.append({"Group": 'x'.join(all_groups_arr[i]),
-                                 "count": data_arr[i]})
+  for membership, count in zip(intersection_counts.get_memberships(), intersection_counts.get_counts()):
+    if len(membership) > 1:
+      multiple_group_arr.append({"Group": 'x'.join(membership),
+                                 "count": count})
+
+  multiple_group_arr_df = pd.DataFrame(multiple_group_arr, columns=["Group", "count"])
+  if verbose:
+    print(multiple_group_arr_df)
+  print("Multiple groups: " + str(len(multiple_group_arr_df)) +
+        ", sum: " + str(multiple_group_arr_df['count'].sum()))
+  return multiple_group_arr_df
+
 
-  multiple_group_arr_df = pd.DataFrame(multiple_group_arr)
-  print(multiple_group_arr_df)
-  print("Sum:")
-  print(multiple_group_arr_df['count'].sum())
+@lru_cache(maxsize=32)
+def __cached_intersection_counts(all_groups: Tuple[Tuple[str, ...], ...],
+                                 data: Tuple[int, ...],
+                                 renames: Tuple[Tuple[str, str], ...]) -> IntersectionCounts:
+  return IntersectionCounts.from_memberships(all_groups, data).rename(dict(renames) if renames is not None else None)
+
+
+def _intersection_counts(all_groups_arr, data_arr, rename_dict: Dict = None) -> IntersectionCounts:
+  """
+  Aggregated intersections of the groups, with renamed categories.
+  Cached: plotting the same groups again (e.g. with another style) does not aggregate again.
+  """
+  return __cached_intersection_counts(tuple(tuple(group) for group in all_groups_arr),
+                                      tuple(int(count) for count in data_arr),
+                                      tuple(sorted(rename_dict.items())) if rename_dict is not None else None)
 
 
 def _upset_plot(categories_groups_df, 
@@ -35,32 +74,77 @@ def _upset_plot(categories_groups_df,
                 data_arr,
                 rename_dict,
                 figname_no_ext:str,
-                fig_folder_path:str):
+                fig_folder_path:str,
+                verbose: bool = False,
+                export_queue: FigureExportQueue = None,
+                min_subset_size: int = 5,
+                max_subsets: int = None,
+                upset_style: Dict = None) -> Future:
   """
   Plot sets and save figure in PNG.
+  Groups and their counts are only printed in verbose mode.
+  If an export queue is set, the PNG is saved asynchronously and the export future is returned.
+
+  Subsets smaller than min_subset_size are removed, and only the max_subsets largest ones are kept,
+  before building the input of upsetplot. Totals per group are still computed over all subsets.
+  upset_style overrides UPSET_STYLE (arguments of upsetplot.UpSet).
   """
-  if rename_dict is not None:
-      renamed_all_groups_arr = []
-      for elem in all_groups_arr:
-        renamed_all_groups_arr.append([rename_dict.get(n, n) for n in elem])
-      all_groups_arr = renamed_all_groups_arr
-
-  print(data_arr)
-  print(all_groups_arr)
-  print(categories_groups_df)
-  __count_nb_group_multiple_terms(all_groups_arr, data_arr)
-
-  upset_data = from_memberships(all_groups_arr, data=data_arr)
-  plot(
-    upset_data, show_counts=True, min_subset_size=5, sort_by='cardinality',
-    element_size=25, intersection_plot_elements=10, totals_plot_elements=10
-  )
-  figpath = os.path.join(fig_folder_path, figname_no_ext)
-  plt.savefig(f'{figpath}.png', format='png', dpi=400, bbox_inches = 'tight')
-  # plt.savefig(f'{figname}.eps', format='eps', bbox_inches = 'tight')
+  if verbose:
+    print(data_arr)
+    print(all_groups_arr)
+    print(categories_groups_df)
+
+  with stage('upset aggregate', rows=len(all_groups_arr)) as event:
+    intersection_counts = _intersection_counts(all_groups_arr, data_arr, rename_dict)
+    upset_data, totals = intersection_counts.select(min_subset_size=min_subset_size, max_subsets=max_subsets)
+    event['rows'] = len(upset_data)
+  __count_nb_group_multiple_terms(intersection_counts, verbose=verbose)
+
+  # Plotting libraries are only imported when a figure is drawn
+  from matplotlib import pyplot as plt
+  from upsetplot import UpSet
+  with stage('upset plot', rows=len(upset_data)):
+    # Subsets and categories are already sorted by cardinality
+    upset = UpSet(upset_data, sort_by=None, sort_categories_by=None, **{**UPSET_STYLE, **(upset_style or {})})
+    upset.totals = totals
+    upset.plot()
+  future = None
+  with stage('upset savefig'):
+    figpath = os.path.join(fig_folder_path, figname_no_ext)
+    if export_queue is not None:
+      future = export_queue.submit_matplotlib(plt.gcf(), f'{figpath}.png', format='png', dpi=400, bbox_inches = 'tight')
+    else:
+      plt.savefig(f'{figpath}.png', format='png', dpi=400, bbox_inches = 'tight')
+    # plt.savefig(f'{figname}.eps', format='eps', bbox_inches = 'tight')
   plt.show()
+  return future
 
 
+def __occurrence_store(occurrence_store_path: str,
+                       keywords_search_spec: List,
+                       search_in: str) -> KeywordOccurrenceStore:
+  if occurrence_store_path is None:
+    return None
+  return KeywordOccurrenceStore(store_path=occurrence_store_path,
+                                keywords_search_spec=keywords_search_spec,
+                                search_in_cols=search_in)
+
+
+def __export_keyword_search(analyzer: KeywordSearchAnalyzer,
+                            out_filepath: str,
+                            excluded_out_filepath: str,
+                            complete_format: str):
+  """
+  Export the complete occurrences, the crosstab and the documents without mention concurrently.
+  The complete occurrences (largest table) are written next to out_filepath with the suffix '_complete'.
+  """
+  complete_out_filepath = rename_with_format(out_filepath, '_complete', complete_format)
+  export_dfs([(analyzer.get_keyword_occurrence_df(), complete_out_filepath),
+              (analyzer.get_keyword_crosstab_df(), out_filepath),
+              (analyzer.get_report().get_docs_without_keyword_mention(), excluded_out_filepath)])
+
+
+@profiled()
 def regexp_counter_analysis(df:pd.DataFrame,
                             keywords_search_spec:Dict[str, str],
                             search_in:str,
@@ -68,7 +152,16 @@ def regexp_counter_analysis(df:pd.DataFrame,
                             excluded_out_filepath:str,
                             figname:str,
                             fig_folder_path:str,
-                            rename_dict: dict = None):
+                            rename_dict: dict = None,
+                            verbose: bool = False,
+                            export_queue: FigureExportQueue = None,
+                            complete_format: str = 'xlsx',
+                            occurrence_store_path: str = None,
+                            search_cache: KeywordSearchCache = None,
+                            use_token_index: bool = False,
+                            nb_workers: int = None,
+                            max_subsets: int = None,
+                            upset_style: Dict = None) -> Future:
     """
     Analyze a dataset with terms.
     Start with regexp.
@@ -78,47 +171,77 @@ def regexp_counter_analysis(df:pd.DataFrame,
       Important to respect a matching order with a OR condition.
       Because order matters, englobing expressions must be placed first.
     :param search_in: TAK.
-    :param out_filepath: Output filepath of the crosstab 'document X terms'.
+    :param out_filepath: Output filepath of the crosstab 'document X terms' (.xlsx, .csv or .parquet).
     :param excluded_out_filepath: Output filepath of the document that will contains documents where no terms have been found.
     :param figname: Name of the figure.
     :param rename_dict: Dictionnary to rename terms of regexp expressions that are strict.
-    :return: None
+    :param verbose: Print complete crosstabs and groups instead of a compact summary.
+    :param export_queue: Export the figure asynchronously.
+    :param complete_format: Format of the complete occurrences table: 'xlsx' (default, read back by the notebooks),
+      'parquet' or 'csv'. export_utils.LARGE_TABLE_FORMAT is faster for large datasets.
+    :param occurrence_store_path: Folder of an incremental occurrence store,
+      only new or changed documents since the previous run are searched.
+    :param search_cache: Memoize the search, re-runs with the same dataset and specification skip the search.
+    :param use_token_index: Only run the expressions on documents containing their literals (selective terms).
+    :param nb_workers: Search in a pool of processes if greater than 1.
+    :param max_subsets: Only plot the largest intersections.
+    :param upset_style: Arguments of upsetplot.UpSet overriding UPSET_STYLE.
+    :return: Future of the figure export if export_queue is set, otherwise None.
     """
     # Preparation and processing
     analyzer = KeywordSearchAnalyzer(scopus_dataset=None,
                                      df=df,
                                      keywords_search_spec=keywords_search_spec,
                                      search_in_cols=search_in)
-    analyzer.prepare()
-    analyzer.process()
+    with stage('prepare and process', rows=len(df)) as event:
+      analyzer.prepare_and_process(search_cache=search_cache,
+                                   occurrence_store=__occurrence_store(occurrence_store_path, keywords_search_spec, search_in),
+                                   use_token_index=use_token_index,
+                                   nb_workers=nb_workers)
+      event['rows'] = len(analyzer.get_keyword_occurrence_df())
 
-    analyzer.get_keyword_occurrence_df().to_excel(out_filepath.replace(".xlsx", "_complete.xlsx"), index=False)
-    analyzer.get_keyword_crosstab_df().to_excel(out_filepath, index=False)
-    analyzer.get_docs_without_keyword_mention().to_excel(excluded_out_filepath, index=False)
+    with stage('export'):
+      __export_keyword_search(analyzer, out_filepath, excluded_out_filepath, complete_format)
 
     # To cluster data, see also https://stackoverflow.com/questions/57457651/upsetr-manually-order-set-intersections-to-align-multiple-upset-plots
-    categories_groups_df, all_groups_arr, data_arr = analyzer.process_categories_groups()
-    analyzer.summary()
-
-    _upset_plot(categories_groups_df, 
-                all_groups_arr,
-                data_arr,
-                rename_dict,
-                figname,
-                fig_folder_path)
-
-
+    with stage('categories groups') as event:
+      categories_groups_df, all_groups_arr, data_arr = analyzer.process_categories_groups()
+      event['rows'] = len(categories_groups_df)
+    with stage('summary'):
+      analyzer.summary(verbose=verbose)
+
+    return _upset_plot(categories_groups_df, 
+                       all_groups_arr,
+                       data_arr,
+                       rename_dict,
+                       figname,
+                       fig_folder_path,
+                       verbose=verbose,
+                       export_queue=export_queue,
+                       max_subsets=max_subsets,
+                       upset_style=upset_style)
+
+
+@profiled()
 def crosstab_analysis(keyword_crosstab_df:pd.DataFrame,
                       figname:str,
                       fig_folder_path:str,
-                      rename_dict: dict = None):
+                      rename_dict: dict = None,
+                      verbose: bool = False,
+                      export_queue: FigureExportQueue = None,
+                      max_subsets: int = None,
+                      upset_style: Dict = None) -> Future:
     """
     Analyze a dataset with terms.
 
     :param keyword_crosstab_df: Crosstab 'document X terms'.
     :param figname: Name of the figure.
     :param rename_dict: Dictionnary to rename terms of regexp expressions that are strict.
-    :return: None
+    :param verbose: Print complete crosstabs and groups instead of a compact summary.
+    :param export_queue: Export the figure asynchronously.
+    :param max_subsets: Only plot the largest intersections.
+    :param upset_style: Arguments of upsetplot.UpSet overriding UPSET_STYLE.
+    :return: Future of the figure export if export_queue is set, otherwise None.
     """
     DUMMY_TAK = 'TAK'
     # Preparation and processing
@@ -129,15 +252,21 @@ def crosstab_analysis(keyword_crosstab_df:pd.DataFrame,
     analyzer.set_keyword_crosstab_df(keyword_crosstab_df)
 
     # To cluster data, see also https://stackoverflow.com/questions/57457651/upsetr-manually-order-set-intersections-to-align-multiple-upset-plots
-    categories_groups_df, all_groups_arr, data_arr = analyzer.process_categories_groups()
-    analyzer.summary()
-
-    _upset_plot(categories_groups_df, 
-                all_groups_arr,
-                data_arr,
-                rename_dict,
-                figname,
-                fig_folder_path)
+    with stage('categories groups', rows=len(keyword_crosstab_df)):
+      categories_groups_df, all_groups_arr, data_arr = analyzer.process_categories_groups()
+    with stage('summary'):
+      analyzer.summary(verbose=verbose)
+
+    return _upset_plot(categories_groups_df, 
+                       all_groups_arr,
+                       data_arr,
+                       rename_dict,
+                       figname,
+                       fig_folder_path,
+                       verbose=verbose,
+                       export_queue=export_queue,
+                       max_subsets=max_subsets,
+                       upset_style=upset_style)
 
 
 def __temporal_plot(temporal_crosstab_df: pd.DataFrame,
@@ -145,30 +274,26 @@ def __temporal_plot(temporal_crosstab_df: pd.DataFrame,
                     fig_folder_path: str,
                     figname_no_ext:str,
                     plot_width:int=400,
-                    plot_height:int=700):
-    # Multiplot
-    all_temporal_plot_data = []
-    for index, row in temporal_crosstab_df.iterrows():
-      #print(row.index.values.tolist())
-      #print(row.values.tolist())
-      title = index.replace('_', ' ')
-      if rename_dict is not None:
-        title = rename_dict.get(index)
-
-      x = row.index.values.tolist()
-      y = row.values.tolist()
-      temporal_plot_data = TemporalPlotData(title=title, x=x, y=y)
-      all_temporal_plot_data.append(temporal_plot_data)
+                    plot_height:int=700,
+                    export_queue: FigureExportQueue = None,
+                    webgl: bool = None) -> Future:
+    from .viz_utils import multiple_line_plot_batch # Imports plotly
+    # Multiplot, one series per keyword
+    temporal_series = TemporalSeriesData.from_crosstab(temporal_crosstab_df, rename_dict=rename_dict)
 
     figpath = os.path.join(fig_folder_path, figname_no_ext)
 
-    multiple_line_plot(multiplot_title="",
-                       temp_plots=all_temporal_plot_data,
-                       figname=figpath,
-                       width=plot_width,
-                       height=plot_height)
+    with stage('plotly render', rows=len(temporal_series)):
+      return multiple_line_plot_batch(multiplot_title="",
+                                      temporal_series=temporal_series,
+                                      figname=figpath,
+                                      width=plot_width,
+                                      height=plot_height,
+                                      webgl=webgl,
+                                      export_queue=export_queue)
    
 
+@profiled()
 def temporal_analyzer(df:pd.DataFrame,
                       keywords_search_spec:Dict[str, str],
                       search_in:str,
@@ -178,68 +303,99 @@ def temporal_analyzer(df:pd.DataFrame,
                       figname_no_ext:str,
                       rename_dict: dict = None,
                       plot_width:int=400,
-                      plot_height:int=700):
+                      plot_height:int=700,
+                      verbose: bool = False,
+                      export_queue: FigureExportQueue = None,
+                      complete_format: str = 'xlsx',
+                      occurrence_store_path: str = None,
+                      search_cache: KeywordSearchCache = None,
+                      use_token_index: bool = False,
+                      nb_workers: int = None,
+                      webgl: bool = None) -> Future:
     # Preparation and processing
     analyzer = KeywordSearchAnalyzer(scopus_dataset=None,
                                      df=df,
                                      keywords_search_spec=keywords_search_spec,
                                      search_in_cols=search_in)
-    analyzer.prepare()
-    analyzer.process()
-
-    analyzer.get_keyword_occurrence_df().to_excel(out_filepath.replace(".xlsx", "_complete.xlsx"), index=False) 
-    analyzer.get_keyword_crosstab_df().to_excel(out_filepath, index=False)
-    analyzer.get_docs_without_keyword_mention().to_excel(excluded_out_filepath, index=False)
-    analyzer.summary()
-
-    analyzer.process_temporal()
+    with stage('prepare and process', rows=len(df)) as event:
+      analyzer.prepare_and_process(search_cache=search_cache,
+                                   occurrence_store=__occurrence_store(occurrence_store_path, keywords_search_spec, search_in),
+                                   use_token_index=use_token_index,
+                                   nb_workers=nb_workers)
+      event['rows'] = len(analyzer.get_keyword_occurrence_df())
+
+    with stage('export'):
+      __export_keyword_search(analyzer, out_filepath, excluded_out_filepath, complete_format)
+    with stage('summary'):
+      analyzer.summary(verbose=verbose)
+
+    with stage('process temporal') as event:
+      analyzer.process_temporal()
+      event['rows'] = len(analyzer.get_keyword_temporal_crosstab_df())
     print(analyzer.get_keyword_temporal_crosstab_df())
 
-    __temporal_plot(temporal_crosstab_df=analyzer.get_keyword_temporal_crosstab_df(),
-                    rename_dict=rename_dict,
-                    fig_folder_path=fig_folder_path,
-                    figname_no_ext=figname_no_ext,
-                    plot_width=plot_width,
-                    plot_height=plot_height)
+    return __temporal_plot(temporal_crosstab_df=analyzer.get_keyword_temporal_crosstab_df(),
+                           rename_dict=rename_dict,
+                           fig_folder_path=fig_folder_path,
+                           figname_no_ext=figname_no_ext,
+                           plot_width=plot_width,
+                           plot_height=plot_height,
+                           export_queue=export_queue,
+                           webgl=webgl)
 
 
+@profiled()
 def temporal_analyzer_from_crosstab(doi_year_df:pd.DataFrame,
                                     keyword_occurrence_df:pd.DataFrame,
                                     fig_folder_path:str,
                                     figname_no_ext:str,
                                     rename_dict: dict = None,
                                     plot_width:int=400,
-                                    plot_height:int=700):
+                                    plot_height:int=700,
+                                    verbose: bool = False,
+                                    export_queue: FigureExportQueue = None,
+                                    webgl: bool = None) -> Future:
     # Preparation and processing
     analyzer = KeywordSearchAnalyzer(scopus_dataset=None,
                                      df=doi_year_df,
                                      keywords_search_spec=None,
                                      search_in_cols='TAK')
     analyzer.set_keyword_occurrence_df(keyword_occurrence_df)
-    analyzer.summary()
+    with stage('summary'):
+      analyzer.summary(verbose=verbose)
 
-    analyzer.process_temporal()
+    with stage('process temporal', rows=len(keyword_occurrence_df)):
+      analyzer.process_temporal()
     print(analyzer.get_keyword_temporal_crosstab_df())
 
-    __temporal_plot(temporal_crosstab_df=analyzer.get_keyword_temporal_crosstab_df(),
-                    rename_dict=rename_dict,
-                    fig_folder_path=fig_folder_path,
-                    figname_no_ext=figname_no_ext,
-                    plot_width=plot_width,
-                    plot_height=plot_height)
+    return __temporal_plot(temporal_crosstab_df=analyzer.get_keyword_temporal_crosstab_df(),
+                           rename_dict=rename_dict,
+                           fig_folder_path=fig_folder_path,
+                           figname_no_ext=figname_no_ext,
+                           plot_width=plot_width,
+                           plot_height=plot_height,
+                           export_queue=export_queue,
+                           webgl=webgl)
     
 
+@profiled()
 def count_terms(dataset_filepath:str,
                 tak_columns:List[str] = ['Title', 'Abstract', 'Author Keywords'],
                 cluster_col:str = None,
                 cluster_values:List[str] = ['1'],
-                out_folder_path:str = None):
+                out_folder_path:str = None,
+                lemmatize: bool = False):
   """
   Count the terms in the TAK columns.
   If cluster_col is set, create multiple analysis. One analysis per cluster.
   tak_columns: ['Title', 'Abstract', 'Author Keywords']
   cluster_col:  'VOS cluster' or 'Cluster'
+  lemmatize: Count lemmas, e.g. impairment and impairments are counted together.
   """
+  # Import NLTK only when counting terms
+  from dataset_analysis.analysis.tak_tokenizer import TAKTokenizer
+  from dataset_analysis.analysis.collocation_processor import CollocationProcessor
+
   # Prepare columns
   if cluster_col is not None:
     tak_columns.append(cluster_col)
@@ -248,11 +404,13 @@ def count_terms(dataset_filepath:str,
   for cluster in cluster_values:   
     # Prepare
     tokenizer = TAKTokenizer(scopus_dataset=dataset_filepath, columns=tak_columns)
-    tokenizer.prepare()
-    tokenizer.filter(col_name=cluster_col, values=[cluster])
+    with stage('load'):
+      tokenizer.prepare()
+      tokenizer.filter(col_name=cluster_col, values=[cluster])
     print(cluster, len(tokenizer.get_df()))
-    tokenizer.process()
-    tak_tokens = tokenizer.all_tak_tokens()
+    with stage('tokenize', rows=len(tokenizer.get_df())):
+      tokenizer.process(lemmatize=lemmatize)
+      tak_tokens = tokenizer.all_tak_tokens()
     #dataset_cluster_filepath = rename_with_clust(filepath=dataset_filepath, cluster=str(cluster))
     #Only if necessary: tokenizer.get_df().to_excel(dataset_cluster_filepath, index=False)
 
@@ -260,12 +418,16 @@ def count_terms(dataset_filepath:str,
     # Keep >= top 2% of terms occurrence
     min_freq_count = len(tokenizer.get_df()) * 0.02
     coloc_processor = CollocationProcessor(tokens=tak_tokens, min_freq_count=min_freq_count)
-    coloc_processor.process(limit=100)
+    with stage('collocations', rows=len(tak_tokens)) as event:
+      coloc_processor.process(limit=100)
+      event['rows'] = len(coloc_processor.get_df())
 
     tak_tokens = tokenizer.get_df()['TAK (tokens)']
-    coloc_processor.count_ngrams_in(tak_tokens)
+    with stage('count ngrams', rows=len(tak_tokens)):
+      coloc_processor.count_ngrams_in(tak_tokens)
     collocations_cluster_filepath = os.path.join(out_folder_path, "collocations_cluster" + cluster[0] + ".xlsx")
-    coloc_processor.get_df().to_excel(collocations_cluster_filepath, index=False)
+    with stage('export excel', rows=len(coloc_processor.get_df())):
+      coloc_processor.get_df().to_excel(collocations_cluster_filepath, index=False)
 
 
 # endregion
@@ -279,4 +441,63 @@ def count_with_percentage(df:pd.DataFrame, col_name:str):
   return df_grouped
 
 
-# endregion
\ No newline at end of file
+def desc_stats_cube(df:pd.DataFrame,
+                    cache_dir:str = None,
+                    dimensions:List[str] = DescriptiveStatsCube.DIMENSIONS) -> DescriptiveStatsCube:
+  """
+  Aggregate the descriptive dimensions once, count_with_percentage() and pivot tables are then read from the cube:
+  cube.count_with_percentage('Sponsor (clean)'), cube.select({'Coded': [1]}).percentage_table(['Sponsor (clean)', 'Document Type'])
+  :param cache_dir: Folder of the persisted cubes (e.g. the search cache folder), the cube is loaded if the dataset did not change.
+  """
+  if cache_dir is None:
+    return DescriptiveStatsCube.from_df(df, dimensions)
+  return DescriptiveStatsCube.cached(df, cache_dir, dimensions)
+
+
+# endregion
+
+
+# region SQL queries
+
+def sql_session(dataset_df:pd.DataFrame = None,
+                occurrence_stores:Dict[str, str] = None,
+                auth_analyzer:'AuthorshipAnalyzer' = None,
+                tables:Dict[str, pd.DataFrame] = None,
+                threads:int = None) -> 'DuckDBSession':
+  """
+  Open an embedded DuckDB session (optional dependency: pip install duckdb) over the analysis tables.
+    :param dataset_df: Prepared dataset, view 'dataset'.
+    :param occurrence_stores: View name -> folder of a keyword occurrence store (see regexp_counter_analysis(occurrence_store_path=...)),
+      e.g. {'blv_occurrences': BLV_STORE_PATH, 'tech_occurrences': TECH_STORE_PATH}.
+    :param auth_analyzer: Authorship analyzer, view 'authorship' (prepared if needed).
+    :param tables: Other views, e.g. {'collocations': coloc_processor.get_df()}.
+    :param threads: Number of DuckDB threads, all cores by default.
+    :return: Session, to be closed (or used as a context manager).
+  """
+  from dataset_analysis.analysis.duckdb_session import DuckDBSession
+
+  session = DuckDBSession(threads=threads)
+  if dataset_df is not None:
+    session.register_dataset(dataset_df)
+  for name, store_path in (occurrence_stores or {}).items():
+    session.register_occurrence_store(store_path, name=name)
+  if auth_analyzer is not None:
+    session.register_authorship(auth_analyzer)
+  for name, table_df in (tables or {}).items():
+    session.register(name, table_df)
+  return session
+
+
+@profiled()
+def sql_query(session:'DuckDBSession', sql:str, params:List = None) -> pd.DataFrame:
+  """
+  Run a SQL query in a session (see sql_session()), parameters are bound to the '?' placeholders.
+  e.g. sql_query(session, 'SELECT DOI FROM occurrences WHERE Year > ? GROUP BY DOI', [2018])
+  """
+  with stage('query') as event:
+    result_df = session.query(sql, params)
+    event['rows'] = len(result_df)
+  return result_df
+
+
+# endregion
@@ -0,0 +1,444 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_analysis.benchmark.synthetic_corpus import SyntheticCorpus
+
+"""
+Benchmark suite of the dataset_analysis package on synthetic Scopus-like datasets.
+Each analyzer stage is timed separately, results are exported in JSON to track regressions across versions.
+
+Usage (from the notebook folder):
+  python -m dataset_analysis.benchmark.benchmark_suite --sizes 1000 10000 --repeat 3 --out bench.json
+Import times only (cold start of scripts and worker processes):
+  python -m dataset_analysis.benchmark.benchmark_suite --stages --imports
+"""
+
+# Screening terms of 1_Screening.ipynb
+REGEXP_SEARCH_TERMS = [
+  ('VI', r'(visually[ |-]impaired ?\w*)'),
+  ('PVI', r'(\w* with vis[a-z-]* impair[a-z-]*)'),
+  ("PVD", r'(\w* with vis[a-z-]* disabilit[a-z-]*)'),
+  ("ED", r'(eye disorders?)'),
+  ("VD", r'(vis[a-z-]* disorders?)'),
+  ("PS", r'(partially sighted)'),
+  ("PB", r'(\w* with blindness)'),
+  ("DB", r'(deaf[ |-]?blind[a-z-]*)'),
+  ("PV", r'(partial vision)'),
+  ("BP", r'(blind people|blind persons?|blind users?)'),
+  ("B", r'(blind)'),
+  ("LVP", r'(low[ |-]vision people|low[ |-]vision persons?|low[ |-]vision users?)'),
+  ("PLV", r'(\w* with low[ |-]vision)')
+]
+
+TAK_COLUMNS = ['Title', 'Abstract', 'Author Keywords']
+
+# Entry points of scripts and worker processes, see BenchmarkSuite.run_imports()
+IMPORT_MODULES = ['dataset_analysis',
+                  'dataset_analysis.filtering.dataset_filter_processor',
+                  'dataset_analysis.analysis.category_analyzer',
+                  'dataset_analysis.analysis.keyword_search_analyser',
+                  'dataset_analysis.analyzer_utils',
+                  'dataset_analysis.analysis.tak_tokenizer',
+                  'dataset_analysis.analysis.collocation_processor']
+
+# Run in a fresh interpreter: the import time of a module includes its dependencies
+IMPORT_TIME_SCRIPT = 'import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)'
+
+# Last line of a traceback naming the exception: 'ModuleNotFoundError: ...', 'nltk.LookupError:'
+EXCEPTION_LINE_PATTERN = re.compile(r'^[A-Za-z_][\w.]*(?::|$)')
+
+# Output folder of the results: not the package folder
+DEFAULT_OUT_DIR: str = tempfile.gettempdir()
+
+
+# region Stages
+# A stage is a pair (setup, run). Only run is timed, setup is called before each repetition.
+# run can return a dict of counters added to the stage result (last repetition).
+
+def _setup_filtering(ctx: dict):
+  from dataset_analysis.filtering.dataset_filter_processor import DatasetFilterProcessor
+  from dataset_analysis.filtering.pred_filter import PredefinedFilter
+  predefined_filters = [PredefinedFilter(operation='Remove review papers', column_name='Filtered', flag='4a'),
+                        PredefinedFilter(operation='Remove out of scope', column_name='Filtered', flag='4b')]
+  return DatasetFilterProcessor(scopus_dataset=ctx['dataset_filepath'], predefined_filters=predefined_filters)
+
+
+def _run_filtering(filter_processor):
+  filter_processor.process()
+  filter_processor.summary()
+
+
+def _setup_near_duplicates(ctx: dict):
+  from dataset_analysis.filtering.near_duplicate_detector import NearDuplicateDetector
+  return NearDuplicateDetector(), ctx['duplicated_df']
+
+
+def _run_near_duplicates(detector_df) -> dict:
+  """
+  Recall: ratio of the injected near-duplicates (SyntheticCorpus.add_near_duplicates()) that are detected.
+  """
+  detector, df = detector_df
+  near_duplicates_df = detector.detect(df)
+  injected_dois = df.loc[df['DOI'].str.endswith('.dup'), 'DOI']
+  return {'nb near-duplicates': len(near_duplicates_df.index),
+          'recall': float(injected_dois.isin(near_duplicates_df['DOI']).mean()) if len(injected_dois) > 0 else None}
+
+
+def _setup_tokenization(ctx: dict):
+  from dataset_analysis.analysis.tak_tokenizer import TAKTokenizer
+  return TAKTokenizer(scopus_dataset=ctx['dataset_filepath'], columns=list(TAK_COLUMNS))
+
+
+def _run_tokenization(tokenizer):
+  tokenizer.prepare()
+  tokenizer.process()
+  tokenizer.all_tak_tokens()
+
+
+def _setup_lemmatization(ctx: dict):
+  from dataset_analysis.analysis.token_utils import TokenUtils
+  TokenUtils.lemmatize.cache_clear() # Cold cache
+  return ctx['tokens'], ['NOUN'] * len(ctx['tokens'])
+
+
+def _run_lemmatization(tokens_pos_tags) -> dict:
+  """
+  The number of lemmatized types (cache misses) follows the vocabulary, not the number of tokens.
+  """
+  from dataset_analysis.analysis.token_utils import TokenUtils
+  tokens, pos_tags = tokens_pos_tags
+  TokenUtils.lemmatize_tokens(tokens, pos_tags)
+  return {'tokens': len(tokens), 'lemmatized types': TokenUtils.lemma_cache_info().misses}
+
+
+def _setup_collocations(ctx: dict):
+  from dataset_analysis.analysis.collocation_processor import CollocationProcessor
+  min_freq_count = len(ctx['df']) * 0.02
+  return CollocationProcessor(tokens=ctx['tokens'], min_freq_count=min_freq_count)
+
+
+def _run_collocations(coloc_processor):
+  coloc_processor.process(limit=100)
+
+
+def _setup_term_emergence(ctx: dict):
+  return ctx['doc_tokens'], ctx['df']['Year'].tolist()
+
+
+def _run_term_emergence(doc_tokens_years) -> dict:
+  from dataset_analysis.analysis.term_emergence import TermEmergence
+  term_emergence = TermEmergence(*doc_tokens_years)
+  term_emergence.emergence(window=3)
+  return {'terms': len(term_emergence)}
+
+
+def _setup_keyword_search(ctx: dict):
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  return KeywordSearchAnalyzer(df=ctx['df'].copy(),
+                               keywords_search_spec=REGEXP_SEARCH_TERMS,
+                               search_in_cols='TAK')
+
+
+def _run_keyword_search(analyzer):
+  analyzer.prepare()
+  analyzer.process()
+
+
+def _setup_processed_keyword_search(ctx: dict):
+  analyzer = _setup_keyword_search(ctx)
+  _run_keyword_search(analyzer)
+  return analyzer
+
+
+def _run_categories_groups(analyzer):
+  analyzer.process_categories_groups()
+
+
+def _run_temporal_crosstab(analyzer):
+  analyzer.process_temporal()
+
+
+def _setup_desc_stats(ctx: dict):
+  return ctx['df']
+
+
+def _run_desc_stats(df) -> dict:
+  from dataset_analysis.analysis.descriptive_stats_cube import DescriptiveStatsCube
+  # Synthetic datasets have no venue
+  cube = DescriptiveStatsCube.from_df(df, dimensions=['Sponsor (clean)', 'Document Type', 'Year', 'Coded'])
+  for dimension in cube.get_dimensions():
+    cube.count_with_percentage(dimension)
+  cube.percentage_table(['Sponsor (clean)', 'Document Type'])
+  cube.select({'Coded': [1]}).percentage_table(['Sponsor (clean)', 'Document Type'])
+  return {'nb cells': cube.get_counts().size}
+
+
+def _setup_authorship(ctx: dict):
+  from dataset_analysis.analysis.authorship_analyzer import AuthorshipAnalyzer
+  return AuthorshipAnalyzer(df=ctx['df'])
+
+
+def _run_authorship(auth_analyzer):
+  auth_analyzer.prepare()
+  auth_analyzer.summary()
+  auth_analyzer.authors_per_paper_summary()
+  auth_analyzer.papers_per_author_summary()
+  auth_analyzer.authors_contrib_multiple_sponsors()
+
+
+def _run_author_careers(auth_analyzer) -> dict:
+  career_df = auth_analyzer.career_metrics()
+  auth_analyzer.yearly_output()
+  return {'nb authors': len(career_df.index), 'nb edges': len(auth_analyzer.get_author_table())}
+
+
+def _setup_categories(ctx: dict):
+  return ctx['coding_df']
+
+
+def _run_categories(coding_df):
+  from dataset_analysis.analysis.category_analyzer import CategoryAnalyzer
+  for category in coding_df['Category'].unique():
+    analyzer = CategoryAnalyzer(filtered_df=coding_df.loc[coding_df['Category'] == category])
+    analyzer.count()
+    analyzer.count_matrix()
+    analyzer.count_co_occurrences()
+
+
+def _run_coding(coding_df):
+  from dataset_analysis.analysis.coding_analyzer import CodingAnalyzer
+  analyzer = CodingAnalyzer(coding_df)
+  analyzer.report()
+  for category in analyzer.get_categories():
+    analyzer.count_matrix(category)
+
+
+STAGES: Dict[str, Tuple[Callable, Callable]] = {
+  'filtering': (_setup_filtering, _run_filtering),
+  'near_duplicates': (_setup_near_duplicates, _run_near_duplicates),
+  'tokenization': (_setup_tokenization, _run_tokenization),
+  'lemmatization': (_setup_lemmatization, _run_lemmatization),
+  'collocations': (_setup_collocations, _run_collocations),
+  'term_emergence': (_setup_term_emergence, _run_term_emergence),
+  'keyword_search': (_setup_keyword_search, _run_keyword_search),
+  'categories_groups': (_setup_processed_keyword_search, _run_categories_groups),
+  'temporal_crosstab': (_setup_processed_keyword_search, _run_temporal_crosstab),
+  'desc_stats': (_setup_desc_stats, _run_desc_stats),
+  'authorship': (_setup_authorship, _run_authorship),
+  'author_careers': (_setup_authorship, _run_author_careers),
+  'categories': (_setup_categories, _run_categories),
+  'coding': (_setup_categories, _run_coding)
+}
+
+# endregion
+
+
+class BenchmarkSuite:
+  """
+  Time every analyzer stage on synthetic datasets of configurable sizes.
+  Stages that fail (e.g., missing NLTK resources) are reported with their error and do not stop the suite.
+  """
+
+
+  def __init__(self,
+               sizes: List[int] = [1000],
+               repeat: int = 3,
+               seed: int = 0,
+               stages: List[str] = None,
+               work_dir: str = None):
+    """
+    sizes: Numbers of documents of the synthetic datasets.
+    repeat: Number of timed repetitions per stage.
+    stages: Subset of STAGES, all stages by default.
+    work_dir: Folder of the temporary Excel datasets (stages loading a filepath).
+    """
+    stages = stages if stages is not None else list(STAGES.keys())
+    unknown_stages = [stage for stage in stages if stage not in STAGES]
+    if len(unknown_stages) > 0:
+      raise ValueError(', '.join(unknown_stages) + ' must be in [' + ', '.join(STAGES.keys()) + '].')
+
+    self.__sizes: List[int] = sizes
+    self.__repeat: int = repeat
+    self.__seed: int = seed
+    self.__stages: List[str] = stages
+    self.__work_dir: str = work_dir
+    self.__results: List[dict] = []
+
+
+  def run(self) -> List[dict]:
+    self.__results = []
+    with tempfile.TemporaryDirectory(dir=self.__work_dir) as tmp_dir:
+      for size in self.__sizes:
+        ctx = BenchmarkSuite.build_context(size=size, seed=self.__seed, work_dir=tmp_dir)
+        for stage in self.__stages:
+          self.__results.append(self.__run_stage(stage, ctx))
+    return self.__results
+
+
+  def __run_stage(self, stage: str, ctx: dict) -> dict:
+    setup, run = STAGES[stage]
+    result = {'stage': stage, 'nb docs': len(ctx['df'])}
+    timings = []
+    try:
+      for _ in range(self.__repeat):
+        # Analyzers print their intermediate results
+        with contextlib.redirect_stdout(io.StringIO()):
+          obj = setup(ctx)
+          start = time.perf_counter()
+          counters = run(obj)
+          timings.append(time.perf_counter() - start)
+        if isinstance(counters, dict):
+          result.update(counters)
+    except Exception as e:
+      result['error'] = BenchmarkSuite.error_message(e)
+
+    result['timings (s)'] = timings
+    result['min (s)'] = min(timings) if len(timings) > 0 else None
+    result['median (s)'] = float(np.median(timings)) if len(timings) > 0 else None
+    return result
+
+
+  @staticmethod
+  def build_context(size: int, seed: int, work_dir: str) -> dict:
+    """
+    Create the synthetic dataset, coding table and tokens of one size.
+    """
+    corpus = SyntheticCorpus(nb_docs=size, seed=seed)
+    df = corpus.generate()
+    coding_df = corpus.generate_coding()
+    duplicated_df = corpus.add_near_duplicates(df)
+    dataset_filepath = os.path.join(work_dir, 'synthetic_N' + str(size) + '.xlsx')
+    df.to_excel(dataset_filepath, index=False)
+    doc_tokens = corpus.doc_tokens(df)
+    return {'df': df,
+            'coding_df': coding_df,
+            'duplicated_df': duplicated_df,
+            'tokens': [token for tokens in doc_tokens for token in tokens],
+            'doc_tokens': doc_tokens,
+            'dataset_filepath': dataset_filepath}
+
+
+  def run_imports(self, modules: List[str] = IMPORT_MODULES) -> List[dict]:
+    """
+    Time the import of each module in a fresh interpreter (cold start of a script or a worker process).
+    Results are appended to the stage results, stage 'import <module>'.
+    """
+    package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    results = []
+    for module in modules:
+      result = {'stage': 'import ' + module, 'nb docs': None}
+      timings = []
+      for _ in range(self.__repeat):
+        process = subprocess.run([sys.executable, '-c', IMPORT_TIME_SCRIPT.format(module=module)],
+                                 capture_output=True, text=True, cwd=package_dir)
+        if process.returncode != 0:
+          result['error'] = BenchmarkSuite.traceback_error_message(process.stderr)
+          break
+        timings.append(float(process.stdout.strip().splitlines()[-1]))
+      result['timings (s)'] = timings
+      result['min (s)'] = min(timings) if len(timings) > 0 else None
+      result['median (s)'] = float(np.median(timings)) if len(timings) > 0 else None
+      results.append(result)
+    self.__results.extend(results)
+    return results
+
+
+  @staticmethod
+  def error_message(e: Exception) -> str:
+    """
+    Exception name and first informative line of its message,
+    e.g., NLTK LookupError messages start with a '*****' banner.
+    """
+    return BenchmarkSuite.__summarize_error(type(e).__name__, str(e).splitlines())
+
+
+  @staticmethod
+  def traceback_error_message(stderr: str) -> str:
+    """
+    error_message() of the last exception of a traceback printed by a subprocess.
+    """
+    lines = stderr.strip().splitlines()
+    start = next((i for i in reversed(range(len(lines))) if EXCEPTION_LINE_PATTERN.match(lines[i])), None)
+    if start is None:
+      return BenchmarkSuite.__summarize_error('Error', lines)
+    name, _, message = lines[start].partition(':')
+    return BenchmarkSuite.__summarize_error(name, [message] + lines[start + 1:])
+
+
+  @staticmethod
+  def __summarize_error(name: str, message_lines: List[str]) -> str:
+    line = next((line.strip() for line in message_lines if any(c.isalnum() for c in line)), '')
+    return name + (': ' + line if line else '')
+
+
+  def get_stages(self) -> List[str]:
+    return self.__stages
+
+
+  def get_results_df(self) -> pd.DataFrame:
+    return pd.DataFrame(self.__results)
+
+
+  def metadata(self) -> dict:
+    return {'date': datetime.now(timezone.utc).isoformat(),
+            'git commit': BenchmarkSuite.git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'sizes': self.__sizes,
+            'repeat': self.__repeat,
+            'seed': self.__seed}
+
+
+  def to_json(self, filepath: str):
+    with open(filepath, 'w', encoding='utf-8') as f:
+      json.dump({'metadata': self.metadata(), 'results': self.__results}, f, indent=2)
+
+
+  @staticmethod
+  def git_commit() -> str:
+    try:
+      return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+      return None
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Benchmark dataset_analysis stages on synthetic datasets.')
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000], help='Numbers of documents.')
+  parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per stage.')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--stages', nargs='*', default=None, choices=list(STAGES.keys()),
+                      help='Stages to run (all by default, none if empty).')
+  parser.add_argument('--out', default=os.path.join(DEFAULT_OUT_DIR, 'benchmark.json'), help='JSON output filepath.')
+  parser.add_argument('--imports', action='store_true', help='Also time the imports of IMPORT_MODULES.')
+  args = parser.parse_args()
+
+  suite = BenchmarkSuite(sizes=args.sizes, repeat=args.repeat, seed=args.seed, stages=args.stages)
+  if len(suite.get_stages()) > 0:
+    suite.run()
+  if args.imports:
+    suite.run_imports()
+  suite.to_json(args.out)
+  print('Results: ' + args.out)
+  print(suite.get_results_df()[['stage', 'nb docs', 'min (s)', 'median (s)']])
+
+
+if __name__ == '__main__':
+  main()
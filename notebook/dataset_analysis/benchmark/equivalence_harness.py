@@ -0,0 +1,661 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from dataset_analysis.benchmark.benchmark_suite import DEFAULT_OUT_DIR, REGEXP_SEARCH_TERMS, BenchmarkSuite
+from dataset_analysis.benchmark.synthetic_corpus import SyntheticCorpus
+from dataset_analysis.analysis.duckdb_session import DuckDBSession
+from dataset_analysis.analysis.keyword_occurrence_store import KeywordOccurrenceStore
+
+"""
+Differential harness: the reference implementation of a stage (the pandas code that produced the published results)
+and its alternative fast paths run side by side on the same inputs.
+Each fast path must return the same frame as the reference (pd.testing.assert_frame_equal, dtypes and order included),
+its speedup is the ratio of the minimum times.
+The reference must itself reproduce the published artifacts (data/results):
+  - mentionBLV_crosstab.xlsx: crosstab of its occurrences (rebuilt from the counts),
+  - mentionTECH_crosstab_complete.xlsx and doi_year.xlsx: inputs of the crosstab, temporal crosstab and UpSet stages,
+  - desc_stats/*.csv: same text as the tables of datasets rebuilt from the published counts.
+Synthetic datasets check the stages on larger inputs and on the stages without published inputs
+(keyword search, incremental search after edits, near-duplicates).
+
+Tables sorted by counts (venue.csv) are sorted with the default quicksort of sort_values(), which is not stable:
+the order of equal counts depends on the numpy build and CPU (AVX-512 sort). Such tables are reported
+'ties reordered' when only the labels of equal rows moved, the published order is reproduced with
+NPY_DISABLE_CPU_FEATURES="AVX512F AVX512CD AVX512_SKX AVX512_CLX AVX512_CNL AVX512_ICL".
+
+Usage (from the notebook folder), exit code 1 if a fast path or the reference differs:
+  python -m dataset_analysis.benchmark.equivalence_harness --sizes 1000 10000 --repeat 3 --out equivalence.json
+"""
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PUBLISHED_DIR = os.path.join(PACKAGE_DIR, 'data', 'results')
+
+BLV_CROSSTAB_PATH = os.path.join('analysis', 'community_of_focus', 'mentionBLV_crosstab.xlsx')
+TECH_OCCURRENCES_PATH = os.path.join('analysis', 'technological_trends', 'mentionTECH_crosstab_complete.xlsx')
+DOI_YEAR_PATH = os.path.join('analysis', 'technological_trends', 'doi_year.xlsx')
+VENUE_PATH = os.path.join('desc_stats', 'venue.csv')
+SPONSOR_DOCTYPE_PATH = os.path.join('desc_stats', 'sponsor_doctype.csv')
+AUTHORS_CONTRIB_PATH = os.path.join('desc_stats', 'authors_contrib_sponsors.csv')
+
+# Statuses of a result: fast paths are compared with the reference, the reference with the published artifact
+EQUAL = 'equal'
+TIES_REORDERED = 'ties reordered'
+DIFFERENT = 'different'
+ERROR = 'error'
+REFERENCE = 'reference' # Reference without published artifact
+FAILED_STATUSES = [DIFFERENT, ERROR]
+
+
+# region Published inputs
+# Datasets are rebuilt from the published counts: one document per counted unit.
+
+def _published_occurrences(crosstab_df: pd.DataFrame) -> pd.DataFrame:
+  """
+  Occurrences 'DOI', 'keyword' of a crosstab 'DOI x keyword' (one row per counted occurrence).
+  """
+  counts_df = crosstab_df.melt(id_vars='DOI', value_vars=list(crosstab_df.columns[1:-1]), var_name='keyword', value_name='n')
+  counts_df = counts_df[counts_df['n'] > 0]
+  return counts_df.loc[counts_df.index.repeat(counts_df['n']), ['DOI', 'keyword']].reset_index(drop=True)
+
+
+def _published_venue_df(venue_df: pd.DataFrame) -> pd.DataFrame:
+  """
+  One document per venue paper, 'Venue (sponsor)' (e.g. 'ACM CHI') split in sponsor and venue.
+  """
+  venues = np.repeat(venue_df['Venue (sponsor)'].to_numpy(), venue_df['Nb'].to_numpy())
+  sponsor_venues = [venue.split(' ', 1) + [''] for venue in venues]
+  return pd.DataFrame({'DOI': [str(i) for i in range(len(venues))],
+                       'Sponsor (clean)': [sponsor_venue[0] for sponsor_venue in sponsor_venues],
+                       'Venue (clean)': [sponsor_venue[1] for sponsor_venue in sponsor_venues]})
+
+
+def _published_sponsor_doctype_df(sponsor_doctype_df: pd.DataFrame) -> pd.DataFrame:
+  """
+  One document per paper of each sponsor and document type, the coded ones first (columns: full set then coded subset).
+  """
+  rows = []
+  for sponsor, doc_type, nb_docs, _, nb_coded_docs, _ in sponsor_doctype_df.itertuples(index=False):
+    nb_coded_docs = 0 if pd.isna(nb_coded_docs) else int(nb_coded_docs)
+    rows.extend((sponsor, doc_type, int(i < nb_coded_docs)) for i in range(nb_docs))
+  df = pd.DataFrame(rows, columns=['Sponsor (clean)', 'Document Type', 'Coded'])
+  df.insert(0, 'DOI', [str(i) for i in range(len(df.index))])
+  return df
+
+
+def _published_authors_df(authors_contrib_df: pd.DataFrame) -> pd.DataFrame:
+  """
+  One single-author document per contribution of an author to a sponsor.
+  """
+  sponsors = [col for col in authors_contrib_df.columns if col not in ['Author(s) ID', 'All']]
+  rows = []
+  for author_id, nb_contribs in zip(authors_contrib_df['Author(s) ID'], authors_contrib_df[sponsors].to_numpy()):
+    for sponsor, nb_contrib in zip(sponsors, nb_contribs):
+      rows.extend([(author_id + ';', sponsor)] * int(nb_contrib))
+  df = pd.DataFrame(rows, columns=['Author(s) ID', 'Sponsor (clean)'])
+  df.insert(0, 'DOI', [str(i) for i in range(len(df.index))])
+  df['Year'] = np.nan
+  return df
+
+
+def _read_text(data_dir: str, filepath: str) -> str:
+  with open(os.path.join(data_dir, filepath), 'r', encoding='utf-8') as f:
+    return f.read()
+
+
+def _read_excel(data_dir: str, filepath: str) -> pd.DataFrame:
+  return pd.read_excel(os.path.join(data_dir, filepath), sheet_name=0)
+
+# endregion
+
+
+# region Checks
+# A check is (published, synthetic, reference, candidates):
+#   published(data_dir) -> list of (artifact, inputs, expected), expected is the published frame (.xlsx) or text (.csv)
+#     the reference must reproduce, None if the artifact is only an input. None if the stage has no published artifact.
+#   synthetic(ctx) -> inputs, see EquivalenceHarness.build_context().
+#   reference(inputs) and candidates[engine](inputs) -> DataFrame. Only these calls are timed.
+
+def _published_crosstab(data_dir: str) -> List[Tuple]:
+  blv_crosstab_df = _read_excel(data_dir, BLV_CROSSTAB_PATH)
+  return [(BLV_CROSSTAB_PATH, {'occurrences': _published_occurrences(blv_crosstab_df)}, blv_crosstab_df),
+          (TECH_OCCURRENCES_PATH, {'occurrences': _read_excel(data_dir, TECH_OCCURRENCES_PATH)}, None)]
+
+
+def _synthetic_crosstab(ctx: dict) -> dict:
+  return {'occurrences': ctx['occurrences']}
+
+
+def _reference_crosstab(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  return KeywordSearchAnalyzer.crosstab(inputs['occurrences'])
+
+
+def _sql_crosstab(inputs: dict) -> pd.DataFrame:
+  with DuckDBSession() as session:
+    return session.register(DuckDBSession.OCCURRENCES_VIEW, inputs['occurrences']).keyword_crosstab()
+
+
+def _published_temporal_crosstab(data_dir: str) -> List[Tuple]:
+  inputs = {'occurrences': _read_excel(data_dir, TECH_OCCURRENCES_PATH),
+            'years': _read_excel(data_dir, DOI_YEAR_PATH)['Year']}
+  return [(TECH_OCCURRENCES_PATH + ' + ' + DOI_YEAR_PATH, inputs, None)]
+
+
+def _synthetic_temporal_crosstab(ctx: dict) -> dict:
+  return {'occurrences': ctx['occurrences'], 'years': ctx['df']['Year']}
+
+
+def _reference_temporal_crosstab(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  return KeywordSearchAnalyzer.temporal_crosstab(inputs['occurrences'], inputs['years'])
+
+
+def _sql_temporal_crosstab(inputs: dict) -> pd.DataFrame:
+  with DuckDBSession() as session:
+    return session.register(DuckDBSession.OCCURRENCES_VIEW, inputs['occurrences']).keyword_temporal_crosstab(inputs['years'])
+
+
+def _intersections_inputs(crosstab_df: pd.DataFrame) -> dict:
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  import upsetplot # Not timed
+  _, all_groups_arr, data_arr = KeywordSearchAnalyzer.categories_groups(crosstab_df)
+  return {'all_groups_arr': all_groups_arr, 'data_arr': data_arr}
+
+
+def _published_intersections(data_dir: str) -> List[Tuple]:
+  return [(BLV_CROSSTAB_PATH, _intersections_inputs(_read_excel(data_dir, BLV_CROSSTAB_PATH)), None)]
+
+
+def _synthetic_intersections(ctx: dict) -> dict:
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  return _intersections_inputs(KeywordSearchAnalyzer.crosstab(ctx['occurrences']))
+
+
+def _reference_intersections(inputs: dict) -> pd.DataFrame:
+  """
+  Subsets of the UpSet plot as upsetplot aggregates its memberships: one boolean column per category and 'count'.
+  """
+  from upsetplot import from_memberships
+  upset_data = from_memberships(inputs['all_groups_arr'], data=pd.Series(inputs['data_arr']))
+  upset_data = upset_data.groupby(level=list(range(upset_data.index.nlevels)), sort=False).sum()
+  return upset_data.rename('count').reset_index()
+
+
+def _intersection_counts(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.intersection_counts import IntersectionCounts
+  intersection_counts = IntersectionCounts.from_memberships(inputs['all_groups_arr'], inputs['data_arr'])
+  categories = intersection_counts.get_categories()
+  subsets_df = pd.DataFrame([[category in membership for category in categories]
+                             for membership in intersection_counts.get_memberships()], columns=categories)
+  subsets_df['count'] = intersection_counts.get_counts()
+  return subsets_df
+
+
+def _published_count_with_percentage(data_dir: str) -> List[Tuple]:
+  venue_text = _read_text(data_dir, VENUE_PATH)
+  inputs = {'df': _published_venue_df(pd.read_csv(io.StringIO(venue_text))), 'column': 'Venue (sponsor)'}
+  return [(VENUE_PATH, inputs, venue_text)]
+
+
+def _synthetic_count_with_percentage(ctx: dict) -> dict:
+  return {'df': ctx['blurred_df'], 'column': 'Document Type'}
+
+
+def _reference_count_with_percentage(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analyzer_utils import count_with_percentage
+  df, column = inputs['df'], inputs['column']
+  if column == 'Venue (sponsor)' and column not in df.columns:
+    # As 2_Analyzer.ipynb
+    df = df.copy()
+    df["Venue (sponsor)"] = df["Sponsor (clean)"] + ' ' + df['Venue (clean)']
+    df["Venue (sponsor)"] = df["Venue (sponsor)"].str.strip()
+  return count_with_percentage(df, col_name=column).set_index(column)
+
+
+def _cube_count_with_percentage(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.descriptive_stats_cube import DescriptiveStatsCube
+  column = inputs['column']
+  return DescriptiveStatsCube.from_df(inputs['df'], dimensions=[column]).count_with_percentage(column).set_index(column)
+
+
+def _published_sponsor_doctype(data_dir: str) -> List[Tuple]:
+  sponsor_doctype_text = _read_text(data_dir, SPONSOR_DOCTYPE_PATH)
+  inputs = {'df': _published_sponsor_doctype_df(pd.read_csv(io.StringIO(sponsor_doctype_text)))}
+  return [(SPONSOR_DOCTYPE_PATH, inputs, sponsor_doctype_text)]
+
+
+def _synthetic_sponsor_doctype(ctx: dict) -> dict:
+  return {'df': ctx['blurred_df']}
+
+
+def _reference_sponsor_doctype(inputs: dict) -> pd.DataFrame:
+  """
+  Full set and coded subset side by side, as 2_Analyzer.ipynb.
+  """
+  def percentage_table(df: pd.DataFrame) -> pd.DataFrame:
+    df_spons_doc_type_groups = df[['DOI', 'Sponsor (clean)', 'Document Type']].pivot_table(values='DOI',
+                                                                                          index=['Sponsor (clean)', 'Document Type'],
+                                                                                          aggfunc='count')
+    df_spons_doc_type_groups["Perc."] = round(df_spons_doc_type_groups["DOI"]/df_spons_doc_type_groups["DOI"].sum()*100, 1)
+    return df_spons_doc_type_groups
+
+  df = inputs['df']
+  return pd.concat([percentage_table(df), percentage_table(df[df['Coded'] == 1])], axis=1)
+
+
+def _cube_sponsor_doctype(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.descriptive_stats_cube import DescriptiveStatsCube
+  index = ['Sponsor (clean)', 'Document Type']
+  cube = DescriptiveStatsCube.from_df(inputs['df'], dimensions=index + ['Coded'])
+  return pd.concat([cube.percentage_table(index), cube.select({'Coded': [1]}).percentage_table(index)], axis=1)
+
+
+def _published_author_sponsors(data_dir: str) -> List[Tuple]:
+  authors_contrib_text = _read_text(data_dir, AUTHORS_CONTRIB_PATH)
+  authors_contrib_df = pd.read_csv(io.StringIO(authors_contrib_text), dtype={'Author(s) ID': str})
+  return [(AUTHORS_CONTRIB_PATH, {'df': _published_authors_df(authors_contrib_df)}, authors_contrib_text)]
+
+
+def _synthetic_author_sponsors(ctx: dict) -> dict:
+  return {'df': ctx['df']}
+
+
+def _reference_author_sponsors(inputs: dict) -> pd.DataFrame:
+  from dataset_analysis.analysis.authorship_analyzer import AuthorshipAnalyzer
+  return AuthorshipAnalyzer.analyze(inputs['df']).authors_contrib_multiple_sponsors()
+
+
+def _author_table_sponsors(inputs: dict) -> pd.DataFrame:
+  """
+  Authors of more than one paper who contributed to at least two sponsors, see authors_contrib_multiple_sponsors().
+  """
+  from dataset_analysis.analysis.author_table import AuthorTable
+  sponsor_output_df = AuthorTable.from_df(inputs['df']).sponsor_output_df().sort_index()
+  sponsor_output_df['All'] = sponsor_output_df.sum(axis=1)
+  multiple_sponsors = (sponsor_output_df['All'] > 1) & ((sponsor_output_df.drop(columns='All') > 0).sum(axis=1) >= 2)
+  return sponsor_output_df[multiple_sponsors]
+
+
+def _synthetic_keyword_search(ctx: dict) -> dict:
+  return {'df': ctx['df']}
+
+
+def _keyword_search(inputs: dict,
+                    use_token_index: bool = False,
+                    nb_workers: int = None,
+                    occurrence_store: KeywordOccurrenceStore = None) -> pd.DataFrame:
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  analyzer = KeywordSearchAnalyzer(df=inputs['df'], keywords_search_spec=REGEXP_SEARCH_TERMS, search_in_cols='TAK')
+  analyzer.prepare()
+  analyzer.process(occurrence_store=occurrence_store, use_token_index=use_token_index, nb_workers=nb_workers)
+  return analyzer.get_keyword_occurrence_df()
+
+
+def _sharded_keyword_search(inputs: dict) -> pd.DataFrame:
+  """
+  Sharded search of all the documents, without the serial search of small datasets (MIN_SHARDED_DOCS).
+  """
+  from dataset_analysis.analysis.keyword_search_analyser import KeywordSearchAnalyzer
+  from dataset_analysis.analysis.sharded_search import find_occurrences_sharded
+  search_df = KeywordSearchAnalyzer.build_search_df(inputs['df'], 'TAK')
+  return pd.DataFrame(find_occurrences_sharded(pattern=KeywordSearchAnalyzer.build_pattern(REGEXP_SEARCH_TERMS),
+                                               dois=search_df['DOI'].tolist(),
+                                               years=search_df['Year'].tolist(),
+                                               texts=search_df['TAK'].tolist(),
+                                               nb_workers=2,
+                                               min_sharded_docs=0))
+
+
+def _synthetic_incremental_search(ctx: dict) -> dict:
+  """
+  Store of the occurrences of the synthetic dataset (not timed), searched again after some documents were edited.
+  Some DOIs are missing or repeated: these documents are searched again on each update.
+  """
+  df = ctx['blurred_df']
+  store_path = os.path.join(ctx['work_dir'], 'occurrence_store_N' + str(len(df.index)))
+  _keyword_search({'df': df}, occurrence_store=KeywordOccurrenceStore(store_path, REGEXP_SEARCH_TERMS, 'TAK'))
+  edited_df = SyntheticCorpus(nb_docs=len(df.index), seed=ctx['seed']).edit_documents(df)
+  return {'df': edited_df, 'store_path': store_path}
+
+
+def _incremental_search(inputs: dict, use_token_index: bool = False) -> pd.DataFrame:
+  """
+  Search of the edited documents on a copy of the store (each repetition starts from the same store).
+  """
+  with tempfile.TemporaryDirectory() as tmp_dir:
+    store_path = os.path.join(tmp_dir, 'store')
+    shutil.copytree(inputs['store_path'], store_path)
+    return _keyword_search(inputs, use_token_index=use_token_index,
+                           occurrence_store=KeywordOccurrenceStore(store_path, REGEXP_SEARCH_TERMS, 'TAK'))
+
+
+def _synthetic_near_duplicates(ctx: dict) -> dict:
+  """
+  Records kept by the automatic filtering (only these are searched for near-duplicates),
+  some near-duplicates have the DOI of their record or no DOI.
+  """
+  df = SyntheticCorpus(nb_docs=len(ctx['df'].index), seed=ctx['seed']).add_near_duplicates(ctx['df'], same_doi_ratio=0.2,
+                                                                                             missing_doi_ratio=0.1)
+  complete = (df['Abstract'] != SyntheticCorpus.ABSTRACT_NA_FLAG) & df[['References', 'Document Type']].notnull().all(1)
+  return {'df': df[complete].reset_index(drop=True)}
+
+
+def _reference_near_duplicates(inputs: dict) -> pd.DataFrame:
+  """
+  Exact detection. A DOI is removed from the initial set only if no kept record has it.
+  """
+  from dataset_analysis.filtering.near_duplicate_detector import NearDuplicateDetector
+  df = inputs['df']
+  near_duplicates_df = NearDuplicateDetector().detect(df, exact=True)
+  kept_dois = df.loc[~df.index.isin(near_duplicates_df.index), 'DOI']
+  removed = near_duplicates_df['DOI'].notna() & ~near_duplicates_df['DOI'].isin(kept_dois)
+  return near_duplicates_df.assign(**{'Removed from initial set': removed})
+
+
+def _filter_near_duplicates(inputs: dict) -> pd.DataFrame:
+  """
+  Filtering with the MinHash/LSH detector, DOIs removed from the initial set by filter_initial_set().
+  """
+  from dataset_analysis.filtering.dataset_filter_processor import DatasetFilterProcessor
+  from dataset_analysis.filtering.near_duplicate_detector import NearDuplicateDetector
+  result = DatasetFilterProcessor.filter_df(inputs['df'], [], NearDuplicateDetector())
+  near_duplicates_df = result.get_near_duplicates_df()
+  removed = near_duplicates_df['DOI'].isin(result.get_all_removed_doi())
+  return near_duplicates_df.assign(**{'Removed from initial set': removed})
+
+
+def _sql_candidates(candidate: Callable) -> Dict[str, Callable]:
+  """
+  DuckDB is optional, its fast paths are only checked when it is installed.
+  """
+  return {'duckdb': candidate} if DuckDBSession.is_available() else {}
+
+
+CHECKS: Dict[str, Tuple[Callable, Callable, Callable, Dict[str, Callable]]] = {
+  'crosstab': (_published_crosstab, _synthetic_crosstab, _reference_crosstab,
+               _sql_candidates(_sql_crosstab)),
+  'temporal_crosstab': (_published_temporal_crosstab, _synthetic_temporal_crosstab, _reference_temporal_crosstab,
+                        _sql_candidates(_sql_temporal_crosstab)),
+  'upset_intersections': (_published_intersections, _synthetic_intersections, _reference_intersections,
+                          {'intersection_counts': _intersection_counts}),
+  'count_with_percentage': (_published_count_with_percentage, _synthetic_count_with_percentage, _reference_count_with_percentage,
+                            {'desc_stats_cube': _cube_count_with_percentage}),
+  'sponsor_doctype': (_published_sponsor_doctype, _synthetic_sponsor_doctype, _reference_sponsor_doctype,
+                      {'desc_stats_cube': _cube_sponsor_doctype}),
+  'author_sponsors': (_published_author_sponsors, _synthetic_author_sponsors, _reference_author_sponsors,
+                      {'author_table': _author_table_sponsors}),
+  'keyword_search': (None, _synthetic_keyword_search, _keyword_search,
+                     {'token_index': lambda inputs: _keyword_search(inputs, use_token_index=True),
+                      'sharded': _sharded_keyword_search}),
+  'incremental_search': (None, _synthetic_incremental_search, _keyword_search,
+                         {'occurrence_store': _incremental_search,
+                          'occurrence_store_token_index': lambda inputs: _incremental_search(inputs, use_token_index=True)}),
+  # Exact verification of all pairs sharing a shingle: a pair missed by the LSH bands is a difference
+  'near_duplicates': (None, _synthetic_near_duplicates, _reference_near_duplicates,
+                      {'minhash_lsh': _filter_near_duplicates})
+}
+
+
+def register_candidate(stage: str, engine: str, candidate: Callable):
+  """
+  Add a fast path of a stage: candidate(inputs) must return the frame of the reference.
+  """
+  if stage not in CHECKS:
+    raise ValueError(stage + ' must be in [' + ', '.join(CHECKS.keys()) + '].')
+  CHECKS[stage][3][engine] = candidate
+
+# endregion
+
+
+class EquivalenceHarness:
+  """
+  Run the reference and the fast paths of each stage on the published artifacts and on synthetic datasets,
+  assert that their frames are equal and record the speedup of each fast path.
+  A failing engine (exception) is reported with its error and does not stop the harness.
+  """
+
+
+  def __init__(self,
+               sizes: List[int] = [1000],
+               repeat: int = 3,
+               seed: int = 0,
+               stages: List[str] = None,
+               data_dir: str = PUBLISHED_DIR,
+               published: bool = True,
+               work_dir: str = None):
+    """
+    sizes: Numbers of documents of the synthetic datasets.
+    repeat: Number of timed repetitions per engine.
+    stages: Subset of CHECKS, all stages by default.
+    data_dir: Folder of the published results.
+    published: Also run the stages on the published artifacts.
+    work_dir: Folder of the temporary files of the stages (e.g. occurrence stores).
+    """
+    stages = stages if stages is not None else list(CHECKS.keys())
+    unknown_stages = [stage for stage in stages if stage not in CHECKS]
+    if len(unknown_stages) > 0:
+      raise ValueError(', '.join(unknown_stages) + ' must be in [' + ', '.join(CHECKS.keys()) + '].')
+
+    self.__sizes: List[int] = sizes
+    self.__repeat: int = repeat
+    self.__seed: int = seed
+    self.__stages: List[str] = stages
+    self.__data_dir: str = data_dir
+    self.__published: bool = published
+    self.__work_dir: str = work_dir
+    self.__results: List[dict] = []
+
+
+  def run(self) -> List[dict]:
+    self.__results = []
+    if self.__published:
+      for stage in self.__stages:
+        published = CHECKS[stage][0]
+        if published is None:
+          continue
+        try:
+          sources = published(self.__data_dir)
+        except Exception as e:
+          self.__results.append({'stage': stage, 'source': 'published', 'engine': 'reference',
+                                 'status': ERROR, 'error': BenchmarkSuite.error_message(e)})
+          continue
+        for artifact, inputs, expected in sources:
+          self.__run_stage(stage, 'published: ' + artifact, inputs, expected)
+
+    with tempfile.TemporaryDirectory(dir=self.__work_dir) as tmp_dir:
+      for size in self.__sizes:
+        ctx = EquivalenceHarness.build_context(size=size, seed=self.__seed, work_dir=tmp_dir)
+        for stage in self.__stages:
+          self.__run_stage(stage, 'synthetic', CHECKS[stage][1](ctx), None)
+    return self.__results
+
+
+  def __run_stage(self, stage: str, source: str, inputs: dict, expected):
+    _, _, reference, candidates = CHECKS[stage]
+    result = {'stage': stage, 'source': source, 'nb rows': EquivalenceHarness.nb_rows(inputs)}
+
+    reference_result, reference_df = self.__time(reference, inputs)
+    reference_result['engine'] = 'reference'
+    if 'error' not in reference_result:
+      reference_result['status'], message = EquivalenceHarness.compare_published(reference_df, expected)
+      if message is not None:
+        reference_result['error'] = message
+    self.__results.append({**result, **reference_result})
+
+    for engine, candidate in candidates.items():
+      candidate_result, candidate_df = self.__time(candidate, inputs)
+      candidate_result['engine'] = engine
+      if 'error' not in candidate_result:
+        if reference_df is None:
+          candidate_result['status'] = ERROR
+          candidate_result['error'] = 'No reference frame'
+        else:
+          candidate_result['status'], message = EquivalenceHarness.compare(reference_df, candidate_df)
+          if message is not None:
+            candidate_result['error'] = message
+      if reference_result['min (s)'] is not None and candidate_result['min (s)']:
+        candidate_result['speedup'] = reference_result['min (s)'] / candidate_result['min (s)']
+      self.__results.append({**result, **candidate_result})
+
+
+  def __time(self, engine: Callable, inputs: dict) -> Tuple[dict, pd.DataFrame]:
+    """
+    Timings of repeat calls and the frame of the last call.
+    """
+    result = {}
+    timings = []
+    frame = None
+    try:
+      for _ in range(self.__repeat):
+        # Analyzers print their intermediate results
+        with contextlib.redirect_stdout(io.StringIO()):
+          start = time.perf_counter()
+          frame = engine(inputs)
+          timings.append(time.perf_counter() - start)
+    except Exception as e:
+      result['status'] = ERROR
+      result['error'] = BenchmarkSuite.error_message(e)
+      frame = None
+    result['timings (s)'] = timings
+    result['min (s)'] = min(timings) if len(timings) > 0 else None
+    return result, frame
+
+
+  @staticmethod
+  def compare(reference_df: pd.DataFrame, candidate_df: pd.DataFrame) -> Tuple[str, str]:
+    """
+    Status of a fast path and the first line of the difference.
+    """
+    try:
+      pd.testing.assert_frame_equal(reference_df, candidate_df)
+    except AssertionError as e:
+      return DIFFERENT, ' '.join(str(e).split())
+    return EQUAL, None
+
+
+  @staticmethod
+  def compare_published(reference_df: pd.DataFrame, expected) -> Tuple[str, str]:
+    """
+    Status of the reference against a published frame (.xlsx, axis names are not saved) or text (.csv, to_csv() of the table).
+    """
+    if expected is None:
+      return REFERENCE, None
+    if isinstance(expected, pd.DataFrame):
+      try:
+        pd.testing.assert_frame_equal(reference_df, expected, check_names=False)
+      except AssertionError as e:
+        return DIFFERENT, ' '.join(str(e).split())
+      return EQUAL, None
+
+    reference_lines = reference_df.to_csv().splitlines()
+    expected_lines = expected.splitlines()
+    if reference_lines == expected_lines:
+      return EQUAL, None
+    if sorted(reference_lines) == sorted(expected_lines):
+      # Same rows, only the labels of rows with the same values moved
+      nb_index_cols = reference_df.index.nlevels
+      values = lambda line: line.split(',')[nb_index_cols:]
+      if all(values(reference_line) == values(expected_line) for reference_line, expected_line in zip(reference_lines, expected_lines)):
+        return TIES_REORDERED, None
+    line_number = next((i for i, (reference_line, expected_line) in enumerate(zip(reference_lines, expected_lines))
+                        if reference_line != expected_line), min(len(reference_lines), len(expected_lines)))
+    return DIFFERENT, ('line ' + str(line_number + 1) + ': ' + repr(reference_lines[line_number] if line_number < len(reference_lines) else None)
+                       + ' != ' + repr(expected_lines[line_number] if line_number < len(expected_lines) else None))
+
+
+  @staticmethod
+  def build_context(size: int, seed: int, work_dir: str) -> dict:
+    """
+    Synthetic dataset of one size and its keyword occurrences (reference search).
+    work_dir: Folder of the files of the stages (e.g. occurrence stores).
+    """
+    corpus = SyntheticCorpus(nb_docs=size, seed=seed)
+    df = corpus.generate()
+    return {'df': df,
+            'blurred_df': corpus.blur_dois(df), # Missing DOIs are rows but not DOIs of the pivot tables
+            'occurrences': _keyword_search({'df': df}),
+            'seed': seed,
+            'work_dir': work_dir}
+
+
+  @staticmethod
+  def nb_rows(inputs: dict) -> int:
+    """
+    Length of the first frame or list of the inputs.
+    """
+    return next((len(value) for value in inputs.values() if isinstance(value, (pd.DataFrame, pd.Series, list))), None)
+
+
+  def get_stages(self) -> List[str]:
+    return self.__stages
+
+
+  def get_results_df(self) -> pd.DataFrame:
+    return pd.DataFrame(self.__results)
+
+
+  def get_failures(self) -> List[dict]:
+    return [result for result in self.__results if result.get('status') in FAILED_STATUSES]
+
+
+  def is_equivalent(self) -> bool:
+    return len(self.get_failures()) == 0
+
+
+  def metadata(self) -> dict:
+    return {'date': datetime.now(timezone.utc).isoformat(),
+            'git commit': BenchmarkSuite.git_commit(),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'sizes': self.__sizes,
+            'repeat': self.__repeat,
+            'seed': self.__seed,
+            'published': self.__data_dir if self.__published else None}
+
+
+  def to_json(self, filepath: str):
+    with open(filepath, 'w', encoding='utf-8') as f:
+      json.dump({'metadata': self.metadata(), 'results': self.__results}, f, indent=2)
+
+
+def main():
+  parser = argparse.ArgumentParser(description='Check that the fast paths reproduce the reference and the published results.')
+  parser.add_argument('--sizes', type=int, nargs='*', default=[1000], help='Numbers of documents of the synthetic datasets.')
+  parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per engine.')
+  parser.add_argument('--seed', type=int, default=0)
+  parser.add_argument('--stages', nargs='+', default=None, choices=list(CHECKS.keys()), help='Stages to check (all by default).')
+  parser.add_argument('--data-dir', default=PUBLISHED_DIR, help='Folder of the published results.')
+  parser.add_argument('--no-published', action='store_true', help='Only check the synthetic datasets.')
+  parser.add_argument('--out', default=os.path.join(DEFAULT_OUT_DIR, 'equivalence.json'), help='JSON output filepath.')
+  args = parser.parse_args()
+
+  harness = EquivalenceHarness(sizes=args.sizes, repeat=args.repeat, seed=args.seed, stages=args.stages,
+                               data_dir=args.data_dir, published=not args.no_published)
+  harness.run()
+  harness.to_json(args.out)
+  print('Results: ' + args.out)
+  results_df = harness.get_results_df()
+  print(results_df[[col for col in ['stage', 'source', 'nb rows', 'engine', 'status', 'min (s)', 'speedup']
+                    if col in results_df.columns]].to_string())
+  for failure in harness.get_failures():
+    print(failure['stage'] + ' (' + failure['source'] + ', ' + failure['engine'] + '): ' + str(failure.get('error')))
+  sys.exit(0 if harness.is_equivalent() else 1)
+
+
+if __name__ == '__main__':
+  main()
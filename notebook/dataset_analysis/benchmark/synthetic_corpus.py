@@ -0,0 +1,232 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import List
+
+
+class SyntheticCorpus:
+  """
+  Generate synthetic Scopus-like datasets.
+  Private datasets (data/private/...) cannot be shared, synthetic frames have the same shape
+  and contain BLV denominations and technologies so that every analyzer stage has matches.
+  """
+
+  YEARS: List[int] = list(range(2010, 2023))
+  SPONSORS: List[str] = ['ACM', 'IEEE', 'ACM/IEEE']
+  DOCUMENT_TYPES: List[str] = ['Conference Paper', 'Article', 'Review']
+  CLUSTERS: List[str] = ['1', '2', '3', '4']
+
+  BLV_TERMS: List[str] = ['visually impaired', 'people with visual impairments', 'blind people', 'blind users',
+                          'low vision users', 'people with low vision', 'partially sighted', 'deafblind',
+                          'eye disorders', 'blindness']
+  TECH_TERMS: List[str] = ['smartphone', 'haptic feedback', 'braille display', 'screen reader', 'audio description',
+                           'virtual reality', 'augmented reality', 'deep learning', 'wearable camera', 'tactile map',
+                           'navigation aid', 'voice assistant']
+  FILLER_WORDS: List[str] = ['study', 'system', 'design', 'users', 'evaluation', 'interaction', 'accessibility',
+                             'participants', 'results', 'approach', 'interface', 'information', 'navigation',
+                             'tasks', 'method', 'performance', 'support', 'propose', 'present', 'explore',
+                             'the', 'of', 'and', 'with', 'for', 'in', 'to', 'a', 'we', 'our', 'this', 'that']
+  COPYRIGHT_TRAILERS: List[str] = ['© {} IEEE.', '© {} ACM.', 'Copyright {} ACM.',
+                                   '© {} Association for Computing Machinery.',
+                                   '© {} Copyright held by the owner/author(s). Publication rights licensed to ACM.']
+
+  ABSTRACT_NA_FLAG: str = '[No abstract available]'
+  TOKEN_PATTERN = re.compile(r'[a-z]+|\.')
+
+  CODING_CATEGORIES = {
+    'Issue Addressed': ('Problem', ['Navigation', 'Reading', 'Social', 'Education', 'Graphics']),
+    'Contribution type': ('Contribution', ['Artifact', 'Empirical', 'Survey', 'Method']),
+    'User type': ('Human', ['B', 'LV', 'BLV', 'S', 'DB']),
+    'Visual use strategy': ('System', ['Substitution', 'Enhancement', 'N/S'])
+  }
+
+
+  def __init__(self, nb_docs: int, seed: int = 0, abstract_nb_words: int = 150, nb_authors: int = None):
+    """
+    nb_docs: Number of documents (rows).
+    seed: Seed of the random generator, same seed gives the same dataset.
+    abstract_nb_words: Mean number of words of an abstract.
+    nb_authors: Size of the authors pool, by default a third of the number of documents.
+    """
+    self.__nb_docs: int = nb_docs
+    self.__rng = np.random.default_rng(seed)
+    self.__abstract_nb_words: int = abstract_nb_words
+    self.__nb_authors: int = nb_authors if nb_authors is not None else max(nb_docs // 3, 10)
+
+
+  def generate(self, na_ratio: float = 0.02) -> pd.DataFrame:
+    """
+    Create the dataset.
+    na_ratio: Ratio of rows with missing abstract, references or document type (removed by filtering).
+    """
+    rng = self.__rng
+    n = self.__nb_docs
+
+    df = pd.DataFrame({
+      'Authors': [self.__authors_names(rng.integers(1, 6)) for _ in range(n)],
+      'Author(s) ID': [self.__authors_ids(rng.integers(1, 6)) for _ in range(n)],
+      'Title': [self.__text(rng.integers(6, 16), tech_prob=0.3, blv_prob=0.3).capitalize() for _ in range(n)],
+      'Year': rng.choice(SyntheticCorpus.YEARS, size=n),
+      'DOI': ['10.0000/synthetic.' + str(i) for i in range(n)],
+      'Abstract': [self.__abstract() for _ in range(n)],
+      'Author Keywords': [self.__keywords() for _ in range(n)],
+      'References': ['Ref ' + str(i) for i in range(n)],
+      'Document Type': rng.choice(SyntheticCorpus.DOCUMENT_TYPES, size=n, p=[0.7, 0.25, 0.05]),
+      'Sponsor (clean)': rng.choice(SyntheticCorpus.SPONSORS, size=n, p=[0.5, 0.35, 0.15]),
+      'Cluster': rng.choice(SyntheticCorpus.CLUSTERS, size=n),
+      'VOS cluster': rng.choice(SyntheticCorpus.CLUSTERS, size=n),
+      'Filtered': rng.choice(['', '4a', '4b'], size=n, p=[0.9, 0.05, 0.05]),
+      'Coded': (rng.random(size=n) < 0.1).astype(int)
+    })
+
+    # Missing values, as in Scopus exports
+    df.loc[rng.random(size=n) < na_ratio, 'Abstract'] = SyntheticCorpus.ABSTRACT_NA_FLAG
+    df.loc[rng.random(size=n) < na_ratio, 'References'] = np.nan
+    df.loc[rng.random(size=n) < na_ratio, 'Document Type'] = np.nan
+
+    return df
+
+
+  def add_near_duplicates(self, df: pd.DataFrame, ratio: float = 0.02, nb_edits: int = 3,
+                          same_doi_ratio: float = 0.0, missing_doi_ratio: float = 0.0) -> pd.DataFrame:
+    """
+    Copy of df with near-duplicates of some rows appended (new DOI, a few abstract words replaced),
+    as the same paper exported by both sponsors or a preprint and its final version.
+    ratio: Ratio of duplicated rows.
+    nb_edits: Number of replaced words per abstract.
+    same_doi_ratio: Ratio of near-duplicates keeping the DOI of their record (same paper in two merged exports).
+    missing_doi_ratio: Ratio of near-duplicates without DOI.
+    """
+    rng = self.__rng
+    duplicates_df = df.iloc[np.flatnonzero(rng.random(size=len(df.index)) < ratio)].copy()
+    abstracts = []
+    for abstract in duplicates_df['Abstract']:
+      if abstract == SyntheticCorpus.ABSTRACT_NA_FLAG:
+        abstracts.append(abstract)
+        continue
+      words = str(abstract).split(' ')
+      for position in rng.integers(0, len(words), size=nb_edits):
+        words[position] = rng.choice(SyntheticCorpus.FILLER_WORDS)
+      abstracts.append(' '.join(words))
+    duplicates_df['Abstract'] = abstracts
+    doi_draws = rng.random(size=len(duplicates_df.index))
+    duplicates_df['DOI'] = [doi if draw < same_doi_ratio else None if draw < same_doi_ratio + missing_doi_ratio else doi + '.dup'
+                            for doi, draw in zip(duplicates_df['DOI'], doi_draws)]
+    return pd.concat([df, duplicates_df], ignore_index=True)
+
+
+  def edit_documents(self, df: pd.DataFrame, ratio: float = 0.05) -> pd.DataFrame:
+    """
+    Copy of df with the BLV terms of the titles and abstracts of some rows replaced by 'sighted users',
+    as documents corrected between two runs of an incremental search.
+    ratio: Ratio of edited rows.
+    """
+    edited_df = df.copy()
+    edited = self.__rng.random(size=len(df.index)) < ratio
+    blv_pattern = '|'.join(re.escape(term) for term in SyntheticCorpus.BLV_TERMS)
+    for col in ['Title', 'Abstract']:
+      edited_df.loc[edited, col] = edited_df.loc[edited, col].str.replace(blv_pattern, 'sighted users', case=False, regex=True)
+    return edited_df
+
+
+  def blur_dois(self, df: pd.DataFrame, ratio: float = 0.01) -> pd.DataFrame:
+    """
+    Copy of df with the DOI of some rows missing and of some others repeated (DOI of the previous row),
+    as in merged exports.
+    ratio: Ratio of missing DOIs, and of repeated DOIs.
+    """
+    blurred_df = df.copy()
+    draws = self.__rng.random(size=len(df.index))
+    repeated = np.flatnonzero(draws[1:] < ratio) + 1
+    blurred_df.iloc[repeated, blurred_df.columns.get_loc('DOI')] = df['DOI'].values[repeated - 1]
+    blurred_df.loc[draws > 1 - ratio, 'DOI'] = None
+    return blurred_df
+
+
+  def generate_coding(self, nb_coded_docs: int = None) -> pd.DataFrame:
+    """
+    Create an in-depth coding table (as coding.xlsx): ['DOI', 'Authors', 'Year', 'Theme', 'Category', 'Code']
+    One or more codes per DOI and category.
+    """
+    rng = self.__rng
+    nb_coded_docs = nb_coded_docs if nb_coded_docs is not None else max(self.__nb_docs // 10, 1)
+
+    rows = []
+    for i in range(nb_coded_docs):
+      doi = '10.0000/synthetic.' + str(i)
+      authors = self.__authors_names(rng.integers(1, 4))
+      year = int(rng.choice(SyntheticCorpus.YEARS))
+      for category, (theme, codes) in SyntheticCorpus.CODING_CATEGORIES.items():
+        for code in rng.choice(codes, size=rng.integers(1, 3), replace=False):
+          rows.append({'DOI': doi, 'Authors': authors, 'Year': year,
+                       'Theme': theme, 'Category': category, 'Code': code})
+    return pd.DataFrame(rows)
+
+
+  def tokens(self, df: pd.DataFrame) -> List[str]:
+    """
+    Lower case word and '.' tokens of titles and abstracts, without NLTK dependencies.
+    Used to benchmark collocations independently of the tokenization.
+    """
+    tokens = []
+    for doc_tokens in self.doc_tokens(df):
+      tokens.extend(doc_tokens)
+    return tokens
+
+
+  def doc_tokens(self, df: pd.DataFrame) -> List[List[str]]:
+    """
+    Tokens of each document, see tokens().
+    """
+    docs_tokens = []
+    for title, abstract in zip(df['Title'], df['Abstract']):
+      doc_tokens = SyntheticCorpus.TOKEN_PATTERN.findall(str(title).lower())
+      if abstract != SyntheticCorpus.ABSTRACT_NA_FLAG:
+        doc_tokens.extend(SyntheticCorpus.TOKEN_PATTERN.findall(str(abstract).lower()))
+      docs_tokens.append(doc_tokens)
+    return docs_tokens
+
+
+  def __text(self, nb_words: int, tech_prob: float, blv_prob: float) -> str:
+    rng = self.__rng
+    words = list(rng.choice(SyntheticCorpus.FILLER_WORDS, size=nb_words))
+    if rng.random() < blv_prob:
+      words.insert(rng.integers(0, len(words) + 1), rng.choice(SyntheticCorpus.BLV_TERMS))
+    if rng.random() < tech_prob:
+      words.insert(rng.integers(0, len(words) + 1), rng.choice(SyntheticCorpus.TECH_TERMS))
+    return ' '.join(words)
+
+
+  def __abstract(self) -> str:
+    rng = self.__rng
+    nb_words = max(int(rng.normal(self.__abstract_nb_words, self.__abstract_nb_words / 4)), 10)
+    sentences = []
+    while nb_words > 0:
+      sentence_nb_words = int(min(rng.integers(8, 25), nb_words))
+      sentences.append(self.__text(sentence_nb_words, tech_prob=0.2, blv_prob=0.15).capitalize() + '.')
+      nb_words -= sentence_nb_words
+
+    if rng.random() < 0.8:
+      trailer = rng.choice(SyntheticCorpus.COPYRIGHT_TRAILERS)
+      sentences.append(trailer.format(rng.choice(SyntheticCorpus.YEARS)))
+    return ' '.join(sentences)
+
+
+  def __keywords(self) -> str:
+    rng = self.__rng
+    keywords = list(rng.choice(SyntheticCorpus.TECH_TERMS + SyntheticCorpus.BLV_TERMS,
+                               size=rng.integers(2, 7), replace=False))
+    return '; '.join(keywords)
+
+
+  def __authors_ids(self, nb_authors: int) -> str:
+    """
+    Scopus format, separators are placed at the end of the string: '57190000001;57190000002;'
+    """
+    ids = self.__rng.choice(self.__nb_authors, size=nb_authors, replace=False) + 57190000000
+    return ''.join(str(author_id) + ';' for author_id in ids)
+
+
+  def __authors_names(self, nb_authors: int) -> str:
+    ids = self.__rng.choice(self.__nb_authors, size=nb_authors, replace=False)
+    return ', '.join('Author' + str(author_id) + ' A.' for author_id in ids)
@@ -0,0 +1,94 @@
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import pandas as pd
+
+from .file_utils import get_file_extension
+
+"""
+Export of analysis tables.
+  - Large tables can be written to Parquet (CSV if pyarrow is not installed): LARGE_TABLE_FORMAT.
+    The analyzers keep 'xlsx' by default, the format read back by the notebooks.
+  - Excel files are written row by row with the xlsxwriter 'constant_memory' mode,
+    pandas/openpyxl is only used if xlsxwriter is not installed.
+  - Several tables can be written concurrently.
+"""
+
+EXPORT_FORMATS: List[str] = ['parquet', 'csv', 'xlsx']
+
+# Default format of large tables, e.g. complete keyword occurrences
+LARGE_TABLE_FORMAT: str = 'parquet' if importlib.util.find_spec('pyarrow') is not None else 'csv'
+
+
+# Number format of the datetime cells (e.g., datetime64 columns), as DataFrame.to_excel()
+EXCEL_DATETIME_FORMAT: str = 'YYYY-MM-DD HH:MM:SS'
+
+
+def rename_with_format(filepath: str, suffix: str, export_format: str) -> str:
+  """
+  Add a suffix to a filename and replace its extension: (out.xlsx, '_complete', 'parquet') -> out_complete.parquet
+  """
+  if export_format not in EXPORT_FORMATS:
+    raise ValueError(export_format + ' must be in [' + ', '.join(EXPORT_FORMATS) + '].')
+  path = Path(filepath)
+  return str(path.with_name(path.stem + suffix + '.' + export_format))
+
+
+def export_df(df: pd.DataFrame, filepath: str) -> str:
+  """
+  Export a dataframe (without index) according to the extension of the filepath.
+  """
+  export_format = get_file_extension(filepath).lower()
+  if export_format == 'parquet':
+    df.to_parquet(filepath, index=False)
+  elif export_format == 'csv':
+    df.to_csv(filepath, index=False)
+  elif export_format == 'xlsx':
+    to_excel_streaming(df, filepath)
+  else:
+    raise ValueError(export_format + ' must be in [' + ', '.join(EXPORT_FORMATS) + '].')
+  return filepath
+
+
+def to_excel_streaming(df: pd.DataFrame, filepath: str):
+  """
+  Write an Excel file row by row, only one row is held in memory by xlsxwriter.
+  Rows must be written in order in 'constant_memory' mode,
+  DataFrame.to_excel() writes column by column and cannot be used with this mode.
+  """
+  if importlib.util.find_spec('xlsxwriter') is None:
+    df.to_excel(filepath, index=False)
+    return
+
+  import xlsxwriter
+  # Cell text is written as text: no conversion to formulas (e.g., '=...') or hyperlinks.
+  # Dates are formatted as by DataFrame.to_excel(), not written as bare serial numbers
+  workbook = xlsxwriter.Workbook(filepath, {'constant_memory': True,
+                                            'strings_to_formulas': False,
+                                            'strings_to_urls': False,
+                                            'default_date_format': EXCEL_DATETIME_FORMAT})
+  try:
+    worksheet = workbook.add_worksheet()
+    header_format = workbook.add_format({'bold': True})
+    worksheet.write_row(0, 0, [str(col) for col in df.columns], header_format)
+
+    # Missing values are written as empty cells
+    values_df = df.astype(object).where(df.notna(), None)
+    for row_index, row in enumerate(values_df.itertuples(index=False, name=None), start=1):
+      worksheet.write_row(row_index, 0, row)
+  finally:
+    workbook.close()
+
+
+def export_dfs(exports: List[Tuple[pd.DataFrame, str]], max_workers: int = None) -> List[str]:
+  """
+  Export several dataframes concurrently, one thread per file.
+  exports: [(df, filepath), ...]
+  Return the filepaths, raise the first export error.
+  """
+  max_workers = max_workers if max_workers is not None else max(len(exports), 1)
+  with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='export') as executor:
+    futures = [executor.submit(export_df, df, filepath) for df, filepath in exports]
+    return [future.result() for future in futures]
@@ -0,0 +1,99 @@
+import multiprocessing
+import pickle
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List
+
+"""
+Asynchronous figure export.
+Analysis functions submit their figures and return immediately, the export overlaps with the next analysis.
+  - Plotly figures are exported one after the other by a single thread,
+    all figures share the same persistent kaleido process (plotly.io.kaleido.scope).
+  - Matplotlib figures are pickled when submitted and saved in a process pool.
+
+Usage:
+  export_queue = FigureExportQueue()
+  future = temporal_analyzer(..., export_queue=export_queue)
+  ...
+  export_queue.wait()
+"""
+
+
+def _init_matplotlib_worker():
+  import matplotlib
+  matplotlib.use('Agg') # No display in workers
+
+
+def _save_matplotlib_figure(pickled_fig: bytes, filepath: str, savefig_kwargs: dict) -> str:
+  fig = pickle.loads(pickled_fig)
+  fig.savefig(filepath, **savefig_kwargs)
+  return filepath
+
+
+class FigureExportQueue:
+
+
+  def __init__(self, max_matplotlib_workers: int = None):
+    """
+    max_matplotlib_workers: Size of the matplotlib process pool, number of CPUs by default.
+    """
+    self.__plotly_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1,
+                                                                    thread_name_prefix='kaleido-export')
+    self.__max_matplotlib_workers: int = max_matplotlib_workers
+    self.__matplotlib_executor: ProcessPoolExecutor = None # Started on first matplotlib figure
+    self.__futures: List[Future] = []
+
+
+  def submit_plotly(self, fig, filepath: str, **write_image_kwargs) -> Future:
+    """
+    Export a plotly figure with kaleido, e.g. submit_plotly(fig, 'fig.png', scale=3).
+    """
+    future = self.__plotly_executor.submit(FigureExportQueue.__write_plotly_image, fig, filepath, write_image_kwargs)
+    self.__futures.append(future)
+    return future
+
+
+  def submit_matplotlib(self, fig, filepath: str, **savefig_kwargs) -> Future:
+    """
+    Save a matplotlib figure, e.g. submit_matplotlib(plt.gcf(), 'fig.png', dpi=400).
+    The figure is pickled immediately, it can be shown or closed after the submission.
+    """
+    if self.__matplotlib_executor is None:
+      # Spawn, forking a process with running threads (kaleido) is unsafe
+      self.__matplotlib_executor = ProcessPoolExecutor(max_workers=self.__max_matplotlib_workers,
+                                                       mp_context=multiprocessing.get_context('spawn'),
+                                                       initializer=_init_matplotlib_worker)
+    future = self.__matplotlib_executor.submit(_save_matplotlib_figure, pickle.dumps(fig), filepath, savefig_kwargs)
+    self.__futures.append(future)
+    return future
+
+
+  def wait(self) -> List[str]:
+    """
+    Wait for all submitted exports, raise the first export error.
+    Return the exported filepaths.
+    """
+    futures = self.__futures
+    self.__futures = []
+    wait(futures)
+    return [future.result() for future in futures]
+
+
+  def shutdown(self):
+    self.wait()
+    self.__plotly_executor.shutdown()
+    if self.__matplotlib_executor is not None:
+      self.__matplotlib_executor.shutdown()
+
+
+  def __enter__(self):
+    return self
+
+
+  def __exit__(self, exc_type, exc_value, traceback):
+    self.shutdown()
+
+
+  @staticmethod
+  def __write_plotly_image(fig, filepath: str, write_image_kwargs: dict) -> str:
+    fig.write_image(filepath, engine='kaleido', **write_image_kwargs)
+    return filepath
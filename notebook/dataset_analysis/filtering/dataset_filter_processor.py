@@ -1,90 +1,104 @@
+import numpy as np
 import pandas as pd
 from typing import List
 from .pred_filter import PredefinedFilter
+from .dataset_filter_result import DatasetFilterResult
+from .near_duplicate_detector import NearDuplicateDetector
 
 
 class DatasetFilterProcessor:
   """
   Filter a dataset:
-    1. Automatically by identifying empty values
+    1. Automatically by identifying empty values,
+      and near-duplicates when a NearDuplicateDetector is given (the first record of each group is kept)
     2. Manually by parametrized filters.
       A column must be defined as filter: e.g., 'Filtered (manual)'
+  filter_df() is the pure version of process(): a loaded dataset is filtered
+  without being modified and the removed DOIs are returned in a new DatasetFilterResult.
   """
 
   SCOPUS_ABSTRACT_NA_FLAG:str = '[No abstract available]'
   
 
-  def __init__(self, scopus_dataset: str, predefined_filters:List[PredefinedFilter]):
+  def __init__(self, scopus_dataset: str, predefined_filters:List[PredefinedFilter],
+               near_duplicate_detector: NearDuplicateDetector = None):
+    """
+    near_duplicate_detector: Remove the duplicate and near-duplicate records, no deduplication by default.
+    """
     self.__scopus_dataset: str = scopus_dataset
-    self.__df: pd.DataFrame = None
-    self.__na_abstract_doi: List[str] = None
-    self.__na_refs_doi: List[str] = None
-    self.__na_doctype_doi: List[str] = None
     self.__predefined_filters: List[PredefinedFilter] = predefined_filters
+    self.__near_duplicate_detector: NearDuplicateDetector = near_duplicate_detector
+    self.__result: DatasetFilterResult = None
   
 
   def process(self):
     # Load dataset
-    self.__df: pd.DataFrame = pd.read_excel(self.__scopus_dataset, sheet_name=0)
-    self.__load_summary = {"operation": "Load dataset",
-                           "type": "N/A",
-                           "nb rows": len(self.__df.index)}
+    df: pd.DataFrame = pd.read_excel(self.__scopus_dataset, sheet_name=0)
+    self.__result = DatasetFilterProcessor.filter_df(df, self.__predefined_filters, self.__near_duplicate_detector)
+    for filter, removed_dois in zip(self.__predefined_filters, self.__result.get_predefined_removed_dois()):
+      filter.set_removed_dois(removed_dois)
+
 
+  @staticmethod
+  def filter_df(df: pd.DataFrame, predefined_filters: List[PredefinedFilter],
+                near_duplicate_detector: NearDuplicateDetector = None) -> DatasetFilterResult:
+    """
+    df and the predefined filters are not modified.
+    """
     # Automatic filtering: Abstract and References
-    self.__df.loc[self.__df["Abstract"] == DatasetFilterProcessor.SCOPUS_ABSTRACT_NA_FLAG, "Abstract"] = pd.NA # Replace Scopus flag by NA
-    self.__na_abstract_doi = self.__df[self.__df['Abstract'].isna()]['DOI'].tolist()
-    self.__na_refs_doi = self.__df[self.__df['References'].isna()]['DOI'].tolist()
-    self.__na_doctype_doi = self.__df[self.__df['Document Type'].isna()]['DOI'].tolist()
+    abstracts = df['Abstract'].mask(df['Abstract'] == DatasetFilterProcessor.SCOPUS_ABSTRACT_NA_FLAG) # Scopus flag as NA
+    na_abstract_doi = df.loc[abstracts.isna(), 'DOI'].tolist()
+    na_refs_doi = df[df['References'].isna()]['DOI'].tolist()
+    na_doctype_doi = df[df['Document Type'].isna()]['DOI'].tolist()
     # Filter main dataframe
-    self.__df = self.__df[self.__df[['Abstract', 'References', 'Document Type']].notnull().all(1)]
+    filtered_df = df[abstracts.notnull() & df[['References', 'Document Type']].notnull().all(1)]
+
+    # Automatic filtering: near-duplicates of the remaining records
+    near_duplicates_df = None
+    if near_duplicate_detector is not None:
+      # Detection on positions: the labels of a merged dataset can be repeated
+      columns = list(dict.fromkeys(near_duplicate_detector.get_columns() + ['DOI']))
+      near_duplicates_df = near_duplicate_detector.detect(filtered_df[columns].reset_index(drop=True))
+      duplicated = np.zeros(len(filtered_df.index), dtype=bool)
+      duplicated[near_duplicates_df.index.to_numpy()] = True
+      near_duplicates_df.index = filtered_df.index[duplicated] # Positions are in increasing order
+      filtered_df = filtered_df[~duplicated]
 
     # Predefined filtering
-    for filter in self.__predefined_filters:
-      predefined_filter_df = self.__df.loc[self.__df[filter.get_column_name()] == filter.get_flag()]
-      filter.set_removed_dois(predefined_filter_df['DOI'].tolist())
-      self.__df.drop(predefined_filter_df.index, inplace=True)
+    predefined_removed_dois = []
+    for filter in predefined_filters:
+      flagged = filtered_df[filter.get_column_name()] == filter.get_flag()
+      predefined_removed_dois.append(filtered_df.loc[flagged, 'DOI'].tolist())
+      filtered_df = filtered_df[~flagged]
+
+    return DatasetFilterResult(df=filtered_df,
+                               nb_loaded_rows=len(df.index),
+                               na_abstract_doi=na_abstract_doi,
+                               na_refs_doi=na_refs_doi,
+                               na_doctype_doi=na_doctype_doi,
+                               near_duplicates_df=near_duplicates_df,
+                               predefined_filters=predefined_filters,
+                               predefined_removed_dois=predefined_removed_dois)
   
 
   def get_df(self) -> pd.DataFrame:
-    return self.__df
+    return self.__result.get_df()
+
+
+  def get_result(self) -> DatasetFilterResult:
+    return self.__result
   
 
-  def get_all_removed_doi(self) -> List[str]: # TODO dataframe with reason and DOI
-    all_doi_arr = [self.__na_abstract_doi, self.__na_refs_doi, self.__na_doctype_doi]
-    for predefined_filter in self.__predefined_filters:
-      all_doi_arr.append(predefined_filter.get_removed_dois())
+  def get_near_duplicates_df(self) -> pd.DataFrame:
+    return self.__result.get_near_duplicates_df()
+
 
-    all_removed_doi:List[str] = []
-    for doi_arr in all_doi_arr:
-      for doi in doi_arr:
-        all_removed_doi.append(doi)
-    
-    return all_removed_doi
+  def get_all_removed_doi(self) -> List[str]: # TODO dataframe with reason and DOI
+    return self.__result.get_all_removed_doi()
 
 
   def summary(self) -> pd.DataFrame:
-    summary_arr = []
-    summary_arr.append(self.__load_summary)
-    summary_arr.append({"operation": "Remove N/A abstract",
-                        "type": "automatic",
-                        "nb rows": len(self.__na_abstract_doi)})
-    summary_arr.append({"operation": "Remove N/A references",
-                        "type": "automatic",
-                        "nb rows": len(self.__na_refs_doi)})
-    summary_arr.append({"operation": "Remove N/A document type",
-                        "type": "automatic",
-                        "nb rows": len(self.__na_doctype_doi)})
-    # Manual filtering
-    for filter in self.__predefined_filters:
-      summary_arr.append({"operation": filter.get_operation(),
-                          "type": filter.get_type(),
-                          "nb rows": filter.get_nb_removed_dois()})
-    
-    summary_arr.append({"operation": "Export dataset",
-                        "type": "N/A",
-                        "nb rows": len(self.__df.index)})
-
-    return pd.DataFrame(summary_arr)
+    return self.__result.summary()
   
 
   def filter_initial_set(self, cleaned_dataset_path:str, output_path:str):
@@ -0,0 +1,111 @@
+import pandas as pd
+from typing import List
+
+from .pred_filter import PredefinedFilter
+
+
+class DatasetFilterResult:
+  """
+  Result of a dataset filtering, see DatasetFilterProcessor.filter_df().
+  A result is never modified after its creation, it can be shared between threads.
+  The filtered frame is shared, it must not be modified in place.
+  """
+
+
+  def __init__(self,
+               df: pd.DataFrame,
+               nb_loaded_rows: int,
+               na_abstract_doi: List[str],
+               na_refs_doi: List[str],
+               na_doctype_doi: List[str],
+               near_duplicates_df: pd.DataFrame,
+               predefined_filters: List[PredefinedFilter],
+               predefined_removed_dois: List[List[str]]):
+    """
+    near_duplicates_df: Removed near-duplicates, see NearDuplicateDetector.detect(), None without deduplication.
+    predefined_removed_dois: DOIs removed by each predefined filter (same order).
+    """
+    self.__df: pd.DataFrame = df
+    self.__nb_loaded_rows: int = nb_loaded_rows
+    self.__na_abstract_doi: List[str] = na_abstract_doi
+    self.__na_refs_doi: List[str] = na_refs_doi
+    self.__na_doctype_doi: List[str] = na_doctype_doi
+    self.__near_duplicates_df: pd.DataFrame = near_duplicates_df
+    self.__predefined_filters: List[PredefinedFilter] = predefined_filters
+    self.__predefined_removed_dois: List[List[str]] = predefined_removed_dois
+
+
+  def get_df(self) -> pd.DataFrame:
+    return self.__df
+
+
+  def get_na_abstract_doi(self) -> List[str]:
+    return self.__na_abstract_doi
+
+
+  def get_na_refs_doi(self) -> List[str]:
+    return self.__na_refs_doi
+
+
+  def get_na_doctype_doi(self) -> List[str]:
+    return self.__na_doctype_doi
+
+
+  def get_near_duplicates_df(self) -> pd.DataFrame:
+    return self.__near_duplicates_df
+
+
+  def get_near_duplicate_doi(self) -> List[str]:
+    """
+    DOIs of the removed near-duplicates, without the missing DOIs and the DOIs of kept records
+    (e.g., the same paper in two merged exports): removing these DOIs never removes a kept record.
+    """
+    if self.__near_duplicates_df is None:
+      return []
+    dois = self.__near_duplicates_df['DOI']
+    return dois[dois.notna() & ~dois.isin(self.__df['DOI'])].tolist()
+
+
+  def get_predefined_removed_dois(self) -> List[List[str]]:
+    return self.__predefined_removed_dois
+
+
+  def get_all_removed_doi(self) -> List[str]:
+    all_doi_arr = [self.__na_abstract_doi, self.__na_refs_doi, self.__na_doctype_doi, self.get_near_duplicate_doi()] \
+                  + self.__predefined_removed_dois
+
+    all_removed_doi:List[str] = []
+    for doi_arr in all_doi_arr:
+      all_removed_doi.extend(doi_arr)
+    return all_removed_doi
+
+
+  def summary(self) -> pd.DataFrame:
+    summary_arr = []
+    summary_arr.append({"operation": "Load dataset",
+                        "type": "N/A",
+                        "nb rows": self.__nb_loaded_rows})
+    summary_arr.append({"operation": "Remove N/A abstract",
+                        "type": "automatic",
+                        "nb rows": len(self.__na_abstract_doi)})
+    summary_arr.append({"operation": "Remove N/A references",
+                        "type": "automatic",
+                        "nb rows": len(self.__na_refs_doi)})
+    summary_arr.append({"operation": "Remove N/A document type",
+                        "type": "automatic",
+                        "nb rows": len(self.__na_doctype_doi)})
+    if self.__near_duplicates_df is not None:
+      summary_arr.append({"operation": "Remove near-duplicates",
+                          "type": "automatic",
+                          "nb rows": len(self.__near_duplicates_df.index)})
+    # Manual filtering
+    for filter, removed_dois in zip(self.__predefined_filters, self.__predefined_removed_dois):
+      summary_arr.append({"operation": filter.get_operation(),
+                          "type": filter.get_type(),
+                          "nb rows": len(removed_dois)})
+
+    summary_arr.append({"operation": "Export dataset",
+                        "type": "N/A",
+                        "nb rows": len(self.__df.index)})
+
+    return pd.DataFrame(summary_arr)
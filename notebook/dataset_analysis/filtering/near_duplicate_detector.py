@@ -0,0 +1,251 @@
+import re
+import numpy as np
+import pandas as pd
+from typing import List
+
+
+class NearDuplicateDetector:
+  """
+  Find duplicate and near-duplicate records of a dataset (same paper with several DOIs,
+  preprint and final version, ACM and IEEE exports of the same paper, ...) without comparing all pairs.
+
+  1. Shingles: lower case word n-grams of the concatenated text columns (Title and Abstract by default),
+    hashed to 32 bits.
+  2. MinHash: num_perm minimums per record of universal hashes (a * x + b) mod (2**61 - 1) of its shingles,
+    a and b drawn in [1, 2**61 - 1), the product is reduced modulo the Mersenne prime without overflow.
+    The probability that two records share a minimum is the Jaccard similarity of their shingles.
+  3. LSH banding: signatures are cut in bands of rows values, records with the same band are candidates.
+    A pair of similarity s is a candidate with probability 1 - (1 - s**rows)**bands.
+  4. Candidates are verified with the exact Jaccard similarity of their shingles (no false positive),
+    records linked by a verified pair form a group of duplicates.
+
+  The first record of each group (dataset order) is kept, the others are duplicates.
+  detect(df, exact=True) verifies all pairs sharing a shingle instead of the LSH candidates:
+  same groups without false negative, quadratic in the number of records sharing frequent shingles (reference of the equivalence harness).
+  Records with less than shingle_size words have no shingle and are never duplicates.
+  Source:
+  - Leskovec, Rajaraman, Ullman. Mining of Massive Datasets, chapter 3 (http://www.mmds.org/).
+  """
+
+  TOKEN_PATTERN = re.compile(r'\w+')
+
+  _MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+  _MAX_HASH = np.uint64((1 << 32) - 1)
+  _LOW_29_BITS = np.uint64((1 << 29) - 1)
+  CHUNK_SIZE: int = 1 << 15
+
+
+  def __init__(self,
+               threshold: float = 0.8,
+               shingle_size: int = 3,
+               num_perm: int = 128,
+               bands: int = 32,
+               columns: List[str] = ['Title', 'Abstract'],
+               seed: int = 0):
+    """
+    threshold: Minimum Jaccard similarity of the shingles of two duplicates.
+    shingle_size: Number of words of a shingle.
+    num_perm: Number of hash functions (length of the signatures), must be a multiple of bands.
+    bands: Number of LSH bands. The similarity from which pairs are likely candidates is about (1 / bands)**(bands / num_perm),
+      it must stay below threshold: (1/32)**(1/4) = 0.42 by default, pairs of similarity 0.8 are candidates with probability > 0.9999
+      (the hashes are approximately min-wise independent, see _universal_hash()).
+    columns: Text columns of a record.
+    seed: Seed of the hash functions, same seed gives the same candidates.
+    """
+    if num_perm % bands != 0:
+      raise ValueError('num_perm must be a multiple of bands: ' + str(num_perm) + ' % ' + str(bands) + ' != 0')
+
+    self.__threshold: float = threshold
+    self.__shingle_size: int = shingle_size
+    self.__num_perm: int = num_perm
+    self.__bands: int = bands
+    self.__columns: List[str] = columns
+    rng = np.random.default_rng(seed)
+    self.__a: np.ndarray = rng.integers(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+    self.__b: np.ndarray = rng.integers(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+
+  def get_threshold(self) -> float:
+    return self.__threshold
+
+
+  def get_columns(self) -> List[str]:
+    return self.__columns
+
+
+  def shingles(self, texts: List[str]):
+    """
+    Sorted unique shingle hashes of all the records, concatenated, and the offset of each record (length nb records + 1):
+    shingles of record i are shingles[offsets[i]:offsets[i + 1]].
+    """
+    documents = [NearDuplicateDetector.TOKEN_PATTERN.findall(text.lower()) for text in texts]
+    tokens = [token for document in documents for token in document]
+    token_ids = pd.factorize(pd.Series(tokens, dtype=object))[0].astype(np.uint64)
+    doc_ids = np.repeat(np.arange(len(documents), dtype=np.uint64), [len(document) for document in documents])
+
+    # Shingles never cross two records
+    starts = np.arange(max(len(tokens) - self.__shingle_size + 1, 0))
+    starts = starts[doc_ids[starts] == doc_ids[starts + self.__shingle_size - 1]]
+    keys = np.zeros(len(starts), dtype=np.uint64)
+    for offset in range(self.__shingle_size):
+      keys = keys * np.uint64(1000003) ^ token_ids[starts + offset] # Wraps around, collisions are only a few more shared shingles
+    hashes = pd.util.hash_array(keys) & NearDuplicateDetector._MAX_HASH
+
+    # One (record, shingle) pair per shingle of a record, sorted by record
+    pairs = np.unique((doc_ids[starts] << np.uint64(32)) | hashes)
+    pair_doc_ids = (pairs >> np.uint64(32)).astype(np.int64)
+    offsets = np.searchsorted(pair_doc_ids, np.arange(len(documents) + 1))
+    return pairs & NearDuplicateDetector._MAX_HASH, offsets
+
+
+  @staticmethod
+  def _universal_hash(a: np.uint64, b: np.uint64, x: np.ndarray) -> np.ndarray:
+    """
+    (a * x + b) mod (2**61 - 1) for a, b < 2**61 - 1 and x < 2**32, without overflow:
+    a * x = a_high * x * 2**32 + a_low * x with a_high < 2**29 and a_low < 2**32,
+    and 2**61 = 1 modulo 2**61 - 1 (v = (v & p) + (v >> 61)). In place operations, x is large.
+    """
+    p = NearDuplicateDetector._MERSENNE_PRIME
+    hashes = x * (a & NearDuplicateDetector._MAX_HASH) # a_low * x < 2**64
+    buffer = hashes >> np.uint64(61)
+    hashes &= p
+    hashes += buffer # Below 2**61 + 8
+    high = x * (a >> np.uint64(32)) # a_high * x < 2**61
+    # high * 2**32 = (high >> 29) * 2**61 + (high mod 2**29) * 2**32, congruent to (high >> 29) + (high mod 2**29) * 2**32
+    np.right_shift(high, np.uint64(29), out=buffer)
+    high &= NearDuplicateDetector._LOW_29_BITS
+    high <<= np.uint64(32)
+    hashes += high
+    hashes += buffer
+    hashes += b # Below 2**63
+    np.right_shift(hashes, np.uint64(61), out=buffer)
+    hashes &= p
+    hashes += buffer # Below 2**61 + 4
+    np.subtract(hashes, p, out=hashes, where=hashes >= p)
+    return hashes
+
+
+  def signatures(self, shingles: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    MinHash signatures (nb records, num_perm), see shingles().
+    Records without shingle have the maximum value everywhere.
+    """
+    nb_docs = len(offsets) - 1
+    signatures = np.full((nb_docs, self.__num_perm), NearDuplicateDetector._MERSENNE_PRIME, dtype=np.uint64)
+    non_empty = np.flatnonzero(np.diff(offsets) > 0)
+    if len(non_empty) == 0:
+      return signatures
+    # Chunks of records of about CHUNK_SIZE shingles: the hashes of a chunk stay in cache for all the permutations
+    chunk_ids = offsets[non_empty] // NearDuplicateDetector.CHUNK_SIZE
+    bounds = np.flatnonzero(np.concatenate(([True], chunk_ids[1:] != chunk_ids[:-1], [True])))
+    for start, end in zip(bounds[:-1], bounds[1:]):
+      docs = non_empty[start:end]
+      first_shingle = offsets[docs[0]]
+      chunk_shingles = shingles[first_shingle:offsets[docs[-1] + 1]]
+      chunk_offsets = offsets[docs] - first_shingle
+      for i in range(self.__num_perm):
+        hashes = NearDuplicateDetector._universal_hash(self.__a[i], self.__b[i], chunk_shingles)
+        signatures[docs, i] = np.minimum.reduceat(hashes, chunk_offsets)
+    return signatures
+
+
+  def candidate_pairs(self, signatures: np.ndarray) -> np.ndarray:
+    """
+    Unique pairs (i, j), i < j, of records sharing at least one band of their signatures, array (nb pairs, 2).
+    """
+    rows = self.__num_perm // self.__bands
+    non_empty = np.flatnonzero(signatures[:, 0] != NearDuplicateDetector._MERSENNE_PRIME)
+    pair_keys = []
+    for band in range(self.__bands):
+      band_keys = np.zeros(len(non_empty), dtype=np.uint64)
+      for value in signatures[non_empty, band * rows:(band + 1) * rows].T:
+        band_keys = band_keys * np.uint64(1000003) ^ value # Wraps around, collisions are removed by the verification
+      order = np.argsort(band_keys, kind='stable')
+      sorted_keys = band_keys[order]
+      # Buckets: runs of equal keys
+      bounds = np.flatnonzero(np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1], [True])))
+      for start, end in zip(bounds[:-1], bounds[1:]):
+        if end - start < 2:
+          continue
+        members = np.sort(non_empty[order[start:end]])
+        i, j = np.triu_indices(len(members), k=1)
+        pair_keys.append(members[i].astype(np.int64) * len(signatures) + members[j])
+
+    if len(pair_keys) == 0:
+      return np.zeros((0, 2), dtype=np.int64)
+    return np.stack(np.divmod(np.unique(np.concatenate(pair_keys)), len(signatures)), axis=1)
+
+
+  @staticmethod
+  def shingle_pairs(shingles: np.ndarray, offsets: np.ndarray):
+    """
+    Unique pairs (i, j), i < j, of records sharing at least one shingle, array (nb pairs, 2),
+    and their number of common shingles. Exact candidates (all pairs of non-zero similarity), see shingles().
+    """
+    nb_docs = len(offsets) - 1
+    doc_ids = np.repeat(np.arange(nb_docs, dtype=np.int64), np.diff(offsets))
+    order = np.argsort(shingles, kind='stable')
+    sorted_shingles = shingles[order]
+    bounds = np.flatnonzero(np.concatenate(([True], sorted_shingles[1:] != sorted_shingles[:-1], [True])))
+    pair_keys = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+      if end - start < 2:
+        continue
+      members = doc_ids[order[start:end]] # Increasing: records are in order and have each shingle once
+      i, j = np.triu_indices(len(members), k=1)
+      pair_keys.append(members[i] * nb_docs + members[j])
+
+    if len(pair_keys) == 0:
+      return np.zeros((0, 2), dtype=np.int64), np.zeros(0, dtype=np.int64)
+    unique_pair_keys, nb_common = np.unique(np.concatenate(pair_keys), return_counts=True)
+    return np.stack(np.divmod(unique_pair_keys, nb_docs), axis=1), nb_common
+
+
+  @staticmethod
+  def jaccard(shingles: np.ndarray, offsets: np.ndarray, i: int, j: int) -> float:
+    shingles_i = shingles[offsets[i]:offsets[i + 1]]
+    shingles_j = shingles[offsets[j]:offsets[j + 1]]
+    nb_common = len(np.intersect1d(shingles_i, shingles_j, assume_unique=True))
+    return nb_common / (len(shingles_i) + len(shingles_j) - nb_common)
+
+
+  def detect(self, df: pd.DataFrame, exact: bool = False) -> pd.DataFrame:
+    """
+    Duplicate records of df (all records of a group except the first one), indexed as df:
+    'DOI', 'Duplicate of' (DOI of the kept record of the group), 'Jaccard' (similarity with the kept record,
+    can be below threshold when the record is only similar to another duplicate).
+    exact: Verify all pairs sharing a shingle instead of the LSH candidates (slow).
+    df is not modified.
+    """
+    if len(df.index) == 0:
+      return pd.DataFrame({'DOI': [], 'Duplicate of': [], 'Jaccard': []}, index=df.index)
+    texts = df[self.__columns].fillna('').astype(str).agg(' '.join, axis=1).tolist()
+    shingles, offsets = self.shingles(texts)
+    if exact:
+      pairs, nb_common = NearDuplicateDetector.shingle_pairs(shingles, offsets)
+      nb_shingles = np.diff(offsets)
+      similarities = nb_common / (nb_shingles[pairs[:, 0]] + nb_shingles[pairs[:, 1]] - nb_common)
+      similar_pairs = pairs[similarities >= self.__threshold].tolist()
+    else:
+      similar_pairs = [(i, j) for i, j in self.candidate_pairs(self.signatures(shingles, offsets)).tolist()
+                       if NearDuplicateDetector.jaccard(shingles, offsets, i, j) >= self.__threshold]
+
+    # Groups of duplicates (union-find), the root is the first record of its group
+    parents = list(range(len(texts)))
+    def find(i: int) -> int:
+      while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+      return i
+
+    for i, j in similar_pairs:
+      root_i, root_j = find(i), find(j)
+      if root_i != root_j:
+        parents[max(root_i, root_j)] = min(root_i, root_j)
+
+    duplicates = [(i, find(i)) for i in range(len(texts)) if find(i) != i]
+    dois = df['DOI'].tolist()
+    return pd.DataFrame({'DOI': [dois[i] for i, _ in duplicates],
+                         'Duplicate of': [dois[root] for _, root in duplicates],
+                         'Jaccard': [NearDuplicateDetector.jaccard(shingles, offsets, i, root) for i, root in duplicates]},
+                        index=df.index[[i for i, _ in duplicates]])
@@ -0,0 +1,237 @@
+import cProfile
+import functools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import List
+
+import pandas as pd
+
+try:
+  import resource # Unix only
+except ImportError:
+  resource = None
+
+"""
+Opt-in per-stage instrumentation of the analyzer facade (analyzer_utils).
+Record wall time, CPU time, peak memory and number of rows per stage as structured events.
+  - 'peak alloc (MB)': peak of the memory allocated during the stage, above its memory at start (tracemalloc, opt-in).
+  - 'process peak rss (MB)': peak resident set size of the process since its start, not of the stage.
+
+Usage:
+  from dataset_analysis import profiling_utils
+  profiling_utils.enable_profiling(cprofile_dir=None, trace_memory=False)
+  regexp_counter_analysis(...)
+  profiling_utils.profiling_summary()
+"""
+
+
+class StageProfiler:
+  """
+  Collect one event per stage.
+  Disabled by default, stages are then executed without any measure.
+  Stages can run in several threads (e.g., concurrent facade calls): each thread has its own stack of running stages.
+  tracemalloc is process-wide: the memory peak of a stage then includes the allocations of the other threads.
+  """
+
+  def __init__(self):
+    self.__enabled: bool = False
+    self.__cprofile_dir: str = None
+    self.__trace_memory: bool = False
+    self.__started_tracing: bool = False # tracemalloc started by the profiler, stopped when disabled
+    self.__events: List[dict] = []
+    self.__events_lock = threading.Lock()
+    # Per thread: 'stack', running stages (name, cProfile) from outer to inner,
+    # and 'memory_peaks', traced memory peak of the running stages, excluding the time after a reset
+    self.__local = threading.local()
+
+
+  def enable(self, cprofile_dir: str = None, trace_memory: bool = False):
+    """
+    cprofile_dir: If set, dump a cProfile file per stage in this folder (<stage>_<n>.prof).
+    trace_memory: Record the peak memory of each stage with tracemalloc, allocations are then slower.
+    """
+    self.__enabled = True
+    self.__cprofile_dir = cprofile_dir
+    if cprofile_dir is not None:
+      os.makedirs(cprofile_dir, exist_ok=True)
+    self.__trace_memory = trace_memory
+    if trace_memory and not tracemalloc.is_tracing():
+      tracemalloc.start()
+      self.__started_tracing = True
+
+
+  def disable(self):
+    self.__enabled = False
+    if self.__started_tracing and len(self.__get_stack()) == 0:
+      tracemalloc.stop()
+      self.__started_tracing = False
+    self.__trace_memory = False
+
+
+  def is_enabled(self) -> bool:
+    return self.__enabled
+
+
+  def reset(self):
+    with self.__events_lock:
+      self.__events = []
+
+
+  def __get_stack(self) -> List[tuple]:
+    if not hasattr(self.__local, 'stack'):
+      self.__local.stack = []
+    return self.__local.stack
+
+
+  def __get_memory_peaks(self) -> List[int]:
+    if not hasattr(self.__local, 'memory_peaks'):
+      self.__local.memory_peaks = []
+    return self.__local.memory_peaks
+
+
+  @contextmanager
+  def stage(self, name: str, rows: int = None):
+    """
+    Measure a stage. The yielded event can be completed, e.g., with the number of output rows:
+      with profiler.stage('process') as event:
+        ...
+        event['rows'] = len(df)
+    Stages can be nested (in the same thread), their name is then prefixed by their parents: 'regexp_counter_analysis/process'.
+    With a cProfile folder, the profile of a parent stage is paused during its nested stages.
+    The memory peak of a parent stage includes its nested stages.
+    """
+    if not self.__enabled:
+      yield {}
+      return
+
+    stack = self.__get_stack()
+    event = {'stage': '/'.join([stage_name for stage_name, _ in stack] + [name]),
+             'rows': rows}
+    profile = cProfile.Profile() if self.__cprofile_dir is not None else None
+    parent_profile = stack[-1][1] if len(stack) > 0 else None
+
+    if parent_profile is not None:
+      parent_profile.disable()
+    stack.append((name, profile))
+    memory_start = self.__start_memory_peak() if self.__trace_memory else None
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    if profile is not None:
+      profile.enable()
+    try:
+      yield event
+    finally:
+      if profile is not None:
+        profile.disable()
+      event['wall (s)'] = time.perf_counter() - wall_start
+      event['cpu (s)'] = time.process_time() - cpu_start
+      if memory_start is not None:
+        event['peak alloc (MB)'] = (self.__stop_memory_peak() - memory_start) / (1024 * 1024)
+      event['process peak rss (MB)'] = StageProfiler.peak_rss_mb()
+      stack.pop()
+      with self.__events_lock:
+        event_index = len(self.__events)
+        self.__events.append(event)
+
+      if profile is not None:
+        prof_filename = event['stage'].replace('/', '.').replace(' ', '_') + '_' + str(event_index) + '.prof'
+        prof_filepath = os.path.join(self.__cprofile_dir, prof_filename)
+        profile.dump_stats(prof_filepath)
+        event['cprofile'] = prof_filepath
+      if parent_profile is not None:
+        parent_profile.enable()
+
+
+  def __start_memory_peak(self) -> int:
+    """
+    Save the peak of the parent stage, reset the peak for the new stage and return the current traced memory.
+    """
+    memory_peaks = self.__get_memory_peaks()
+    current, peak = tracemalloc.get_traced_memory()
+    if len(memory_peaks) > 0:
+      memory_peaks[-1] = max(memory_peaks[-1], peak)
+    tracemalloc.reset_peak()
+    memory_peaks.append(current)
+    return current
+
+
+  def __stop_memory_peak(self) -> int:
+    """
+    Return the traced memory peak of the stage, also a peak of its parent.
+    """
+    memory_peaks = self.__get_memory_peaks()
+    peak = max(memory_peaks.pop(), tracemalloc.get_traced_memory()[1])
+    if len(memory_peaks) > 0:
+      memory_peaks[-1] = max(memory_peaks[-1], peak)
+    tracemalloc.reset_peak()
+    return peak
+
+
+  def profiled(self, name: str = None):
+    """
+    Decorator version of stage(). The stage name is the function name by default.
+    """
+    def decorator(func):
+      stage_name = name if name is not None else func.__name__.strip('_')
+
+      @functools.wraps(func)
+      def wrapper(*args, **kwargs):
+        with self.stage(stage_name):
+          return func(*args, **kwargs)
+      return wrapper
+    return decorator
+
+
+  def get_events(self) -> List[dict]:
+    with self.__events_lock:
+      return list(self.__events)
+
+
+  def summary(self) -> pd.DataFrame:
+    """
+    One row per stage event, in completion order (nested stages before their parent).
+    """
+    columns = ['stage', 'rows', 'wall (s)', 'cpu (s)', 'peak alloc (MB)', 'process peak rss (MB)', 'cprofile']
+    return pd.DataFrame(self.get_events(), columns=columns)
+
+
+  @staticmethod
+  def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the process since its start, None if not available (Windows).
+    It does not decrease: a stage using less memory than a previous one reports the previous peak.
+    """
+    if resource is None:
+      return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+# Shared profiler of the package
+PROFILER = StageProfiler()
+
+
+def enable_profiling(cprofile_dir: str = None, trace_memory: bool = False):
+  PROFILER.reset()
+  PROFILER.enable(cprofile_dir=cprofile_dir, trace_memory=trace_memory)
+
+
+def disable_profiling():
+  PROFILER.disable()
+
+
+def profiling_summary() -> pd.DataFrame:
+  return PROFILER.summary()
+
+
+def stage(name: str, rows: int = None):
+  return PROFILER.stage(name, rows=rows)
+
+
+def profiled(name: str = None):
+  return PROFILER.profiled(name)
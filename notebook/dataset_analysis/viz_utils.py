@@ -1,21 +1,29 @@
+from concurrent.futures import Future
 from typing import List
 from plotly.subplots import make_subplots
 import plotly.graph_objects as go
 import plotly.io as pio
 
 from .analysis.temporal_plot_data import TemporalPlotData
+from .analysis.temporal_series_data import TemporalSeriesData
+from .figure_export import FigureExportQueue
 
 pio.templates.default = "simple_white" # plotly_white
 #pio.kaleido.scope.default_format = "svg"
 
+# Number of series from which WebGL traces (Scattergl) are used by default
+WEBGL_MIN_SERIES: int = 50
+
 
 def multiple_line_plot(multiplot_title: str,
                        temp_plots: List[TemporalPlotData],
                        figname:str,
                        height:int=400,
-                       width:int=700):
+                       width:int=700,
+                       export_queue: FigureExportQueue = None) -> Future:
   """
   Create multiple lineplots in one plot.
+  If an export queue is set, the figure is exported asynchronously and the export future is returned.
   - https://plotly.com/python/subplots/
   - https://plotly.com/python-api-reference/generated/plotly.subplots.make_subplots.html; 
   - https://plotly.com/python/hover-text-and-formatting/
@@ -40,4 +48,47 @@ def multiple_line_plot(multiplot_title: str,
   fig.update_layout(height=height, width=width, title_text=multiplot_title, font=dict(size=16))
 
   #fig.write_image(f'{figname}.eps', engine="kaleido")
+  if export_queue is not None:
+    return export_queue.submit_plotly(fig, f'{figname}.png', scale=3)
+
+  fig.write_image(f'{figname}.png', engine="kaleido", scale=3)
+  return None
+
+
+def multiple_line_plot_batch(multiplot_title: str,
+                             temporal_series: TemporalSeriesData,
+                             figname:str,
+                             height:int=400,
+                             width:int=700,
+                             webgl: bool = None,
+                             export_queue: FigureExportQueue = None) -> Future:
+  """
+  Same plot as multiple_line_plot() from columnar series.
+  All traces are built from array views and added in one call.
+  webgl: Use Scattergl traces, for the interactive display of many series.
+    None (default): Only from WEBGL_MIN_SERIES series.
+    Static export of WebGL traces by kaleido is slower without GPU.
+  """
+  nb_series = len(temporal_series)
+  if webgl is None:
+    webgl = nb_series >= WEBGL_MIN_SERIES
+  scatter = go.Scattergl if webgl else go.Scatter
+
+  subplot_titles = [f"<b>{title}</b>" for title in temporal_series.get_titles()]
+  fig = make_subplots(rows=nb_series,
+                      cols=1,
+                      subplot_titles=subplot_titles,
+                      x_title='Years')
+
+  x = temporal_series.get_x()
+  values = temporal_series.get_values()
+  traces = [scatter(x=x, y=values[i], showlegend=False) for i in range(nb_series)]
+  fig.add_traces(traces, rows=list(range(1, nb_series + 1)), cols=[1] * nb_series)
+
+  fig.update_layout(height=height, width=width, title_text=multiplot_title, font=dict(size=16))
+
+  if export_queue is not None:
+    return export_queue.submit_plotly(fig, f'{figname}.png', scale=3)
+
   fig.write_image(f'{figname}.png', engine="kaleido", scale=3)
+  return None